@@ -0,0 +1,222 @@
+"""
+Chord analyses persisted in SQLite, shared by the GUI, the command line, the
+naming service and batch workers, across sessions and processes. Entries are
+keyed by the canonical note set and the naming rules version
+(chord_templates.rules_version), and a cache written by other rules is
+emptied when opened. Beyond max_entries, the least recently used entries are
+evicted. It only imports the standard library, so that the command line
+stays fast to start.
+"""
+import json
+import os
+import sqlite3
+import time
+
+SCHEMA = [
+    "CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)",
+    """CREATE TABLE IF NOT EXISTS analyses (
+        notes TEXT NOT NULL,
+        version TEXT NOT NULL,
+        result TEXT NOT NULL,
+        used REAL NOT NULL,
+        PRIMARY KEY (notes, version)
+    ) WITHOUT ROWID""",
+    "CREATE INDEX IF NOT EXISTS analyses_used ON analyses (used)",
+]
+
+
+def cache_key(notes: str) -> str:
+    # chords are note sets, so the order of the notes does not matter
+    return " ".join(sorted(notes.split()))
+
+
+def analyse_notes(notes: str) -> dict:
+    from chord import Chord
+    from note import Note
+    chord = Chord(notes)
+    # unique variant names, best first
+    names = list(dict.fromkeys(str(variant) for variant in chord.variants))
+    root = Note.PITCH_INDEX[chord.variants[0].root.pitch] if chord.variants else -1
+    return {"name": str(chord), "names": names, "root": root, "mask": chord.pc_mask}
+
+
+def cache_path() -> str | None:
+    # PYCHORDWIZARD_CACHE overrides the location, and disables the cache if empty
+    path = os.environ.get("PYCHORDWIZARD_CACHE")
+    if path is not None:
+        return path or None
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "pychordwizard", "analysis.sqlite3")
+
+
+class AnalysisCache():
+    """
+    Readers never block each other or the writers (write-ahead log), and
+    writers wait for each other up to timeout seconds. Reading only rewrites
+    the last use of an entry every touch_interval seconds, and the size is
+    checked every evict_every writes, so that the bound is approximate.
+    """
+
+    def __init__(self, path: str, max_entries: int = 200000, version: str | None = None,
+                 touch_interval: float = 60., evict_every: int = 256, timeout: float = 30.) -> None:
+        if version is None:
+            from chord_templates import rules_version
+            version = rules_version()
+        self.path = path
+        self.max_entries = max_entries
+        self.version = version
+        self.touch_interval = touch_interval
+        self.evict_every = evict_every
+        self.timeout = timeout
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        self.connection = None
+        self.pid = None
+        self.connect()
+
+    def connect(self) -> sqlite3.Connection:
+        # connections do not survive a fork, every process opens its own
+        if self.connection is not None and self.pid == os.getpid():
+            return self.connection
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        connection = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None)
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=NORMAL")
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            for statement in SCHEMA:
+                connection.execute(statement)
+            row = connection.execute("SELECT value FROM meta WHERE key = 'version'").fetchone()
+            if row is None or row[0] != self.version:
+                # written by other naming rules: nothing can be reused. Their
+                # processes may still be running, hence the version in the key
+                connection.execute("DELETE FROM analyses WHERE version != ?", (self.version,))
+                connection.execute("INSERT OR REPLACE INTO meta VALUES ('version', ?)", (self.version,))
+            connection.execute("COMMIT")
+        except BaseException:
+            connection.execute("ROLLBACK")
+            connection.close()
+            raise
+        self.connection = connection
+        self.pid = os.getpid()
+        return connection
+
+    def close(self) -> None:
+        if self.connection is not None and self.pid == os.getpid():
+            self.connection.close()
+        self.connection = None
+
+    def __len__(self) -> int:
+        return self.connect().execute("SELECT COUNT(*) FROM analyses WHERE version = ?",
+                                      (self.version,)).fetchone()[0]
+
+    def get_many(self, keys: list[str]) -> dict[str, dict]:
+        # cached results of the given canonical keys
+        connection = self.connect()
+        found = {}
+        stale = []
+        now = time.time()
+        for start in range(0, len(keys), 500):
+            chunk = keys[start:start + 500]
+            rows = connection.execute(
+                f"SELECT notes, result, used FROM analyses WHERE version = ? "
+                f"AND notes IN ({','.join('?' * len(chunk))})", [self.version] + chunk)
+            for notes, result, used in rows:
+                found[notes] = json.loads(result)
+                if now - used >= self.touch_interval:
+                    stale.append(notes)
+        self.hits += len(found)
+        self.misses += len(set(keys)) - len(found)
+        if stale:
+            with self.transaction() as connection:
+                connection.executemany("UPDATE analyses SET used = ? WHERE notes = ? AND version = ?",
+                                       [(now, notes, self.version) for notes in stale])
+        return found
+
+    def put_many(self, results: dict[str, dict]) -> None:
+        now = time.time()
+        with self.transaction() as connection:
+            connection.executemany("INSERT OR REPLACE INTO analyses VALUES (?, ?, ?, ?)",
+                                   [(notes, self.version, json.dumps(result), now)
+                                    for notes, result in results.items()])
+        before = self.writes
+        self.writes += len(results)
+        if self.writes // self.evict_every != before // self.evict_every:
+            self.evict()
+
+    def evict(self) -> int:
+        # drops the least recently used entries beyond max_entries
+        with self.transaction() as connection:
+            excess = connection.execute("SELECT COUNT(*) FROM analyses").fetchone()[0] - self.max_entries
+            if excess <= 0:
+                return 0
+            connection.execute(
+                "DELETE FROM analyses WHERE (notes, version) IN "
+                "(SELECT notes, version FROM analyses ORDER BY used LIMIT ?)", (excess,))
+        return excess
+
+    def clear(self) -> None:
+        with self.transaction() as connection:
+            connection.execute("DELETE FROM analyses")
+
+    def transaction(self) -> "Transaction":
+        return Transaction(self.connect())
+
+    def get(self, notes: str) -> dict | None:
+        key = cache_key(notes)
+        return self.get_many([key]).get(key)
+
+    def analyse(self, notes: str) -> dict:
+        key = cache_key(notes)
+        result = self.get_many([key]).get(key)
+        if result is None:
+            result = analyse_notes(key)
+            self.put_many({key: result})
+        return result
+
+
+class Transaction():
+    # takes the write lock up front, so that concurrent writers wait for it
+    # instead of failing to upgrade a read lock
+    def __init__(self, connection: sqlite3.Connection) -> None:
+        self.connection = connection
+
+    def __enter__(self) -> sqlite3.Connection:
+        self.connection.execute("BEGIN IMMEDIATE")
+        return self.connection
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.connection.execute("ROLLBACK" if exc_type else "COMMIT")
+
+
+# one cache per path and process, see default_cache
+_caches = {}
+
+
+def default_cache() -> AnalysisCache | None:
+    path = cache_path()
+    if path is None:
+        return None
+    if path not in _caches:
+        try:
+            _caches[path] = AnalysisCache(path)
+        except (OSError, sqlite3.Error):
+            # e.g. a read-only home: analyses are simply not kept
+            _caches[path] = None
+    return _caches[path]
+
+
+def analyse(notes: str) -> dict:
+    """
+    The analysis of the notes ({"name", "names", "root", "mask"}), from the
+    default cache when possible.
+    """
+    cache = default_cache()
+    if cache is not None:
+        try:
+            return cache.analyse(notes)
+        except sqlite3.Error:
+            pass
+    return analyse_notes(notes)
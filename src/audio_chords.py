@@ -0,0 +1,278 @@
+import struct
+import wave
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterable, Iterator
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+from chord import Chord
+from note import Note
+from shared_tables import attach_naming_tables, publish_naming_tables
+
+
+class ChordSegment():
+    def __init__(self, start: float, end: float, name: str, pitch_classes: tuple[int, ...] = (),
+                 bass: int = -1) -> None:
+        self.start = start
+        self.end = end
+        self.name = name
+        self.pitch_classes = pitch_classes
+        self.bass = bass
+
+    def __str__(self) -> str:
+        return f"{self.start:.2f}-{self.end:.2f} {self.name}"
+
+
+class WavReader():
+    """
+    Reads PCM or float WAV files in fixed-size chunks of mono float32 samples.
+    The sample data is memory-mapped whenever numpy has a matching dtype and
+    falls back to the wave module otherwise (e.g. 24-bit PCM).
+    """
+    PCM_DTYPE_MAP = {
+        1: np.uint8,
+        2: np.int16,
+        4: np.int32,
+    }
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self.data_offset = -1
+        self.dtype = None
+        with open(path, "rb") as f:
+            riff, _, wave_id = struct.unpack("<4sI4s", f.read(12))
+            if riff != b"RIFF" or wave_id != b"WAVE":
+                raise ValueError(f"{path} is not a WAV file")
+            while True:
+                header = f.read(8)
+                if len(header) < 8:
+                    break
+                chunk_id, size = struct.unpack("<4sI", header)
+                if chunk_id == b"fmt ":
+                    fmt = f.read(size)
+                    self.format_tag, self.channels, self.sample_rate = struct.unpack(
+                        "<HHI", fmt[:8])
+                    self.sample_width = struct.unpack("<H", fmt[14:16])[0] // 8
+                    f.seek(size % 2, 1)
+                elif chunk_id == b"data":
+                    self.data_offset = f.tell()
+                    self.num_frames = size // (self.channels * self.sample_width)
+                    break
+                else:
+                    # chunks are word aligned
+                    f.seek(size + size % 2, 1)
+        if self.data_offset < 0:
+            raise ValueError(f"{path} has no data chunk")
+
+        # 1: integer PCM, 3: IEEE float, 0xFFFE: extensible (assume PCM)
+        if self.format_tag == 3:
+            self.dtype = {4: np.float32, 8: np.float64}.get(self.sample_width)
+        else:
+            self.dtype = self.PCM_DTYPE_MAP.get(self.sample_width)
+
+    def chunks(self, chunk_size: int) -> Iterator[np.ndarray]:
+        if self.dtype is not None:
+            yield from self.mapped_chunks(chunk_size)
+        else:
+            yield from self.wave_chunks(chunk_size)
+
+    def mapped_chunks(self, chunk_size: int) -> Iterator[np.ndarray]:
+        if self.num_frames == 0:
+            return
+        data = np.memmap(self.path, dtype=self.dtype, mode="r", offset=self.data_offset,
+                         shape=(self.num_frames, self.channels))
+        for start in range(0, self.num_frames, chunk_size):
+            yield self.to_mono(np.asarray(data[start:start + chunk_size]))
+
+    def wave_chunks(self, chunk_size: int) -> Iterator[np.ndarray]:
+        with wave.open(self.path, "rb") as w:
+            while True:
+                raw = w.readframes(chunk_size)
+                if not raw:
+                    break
+                # widen packed little endian samples to int32
+                packed = np.frombuffer(raw, dtype=np.uint8).reshape(-1, self.sample_width)
+                widened = np.zeros((packed.shape[0], 4), dtype=np.uint8)
+                widened[:, 4 - self.sample_width:] = packed
+                samples = widened.view("<i4").reshape(-1, self.channels) >> \
+                    (8 * (4 - self.sample_width))
+                yield self.to_mono(samples)
+
+    def to_mono(self, samples: np.ndarray) -> np.ndarray:
+        samples = samples.astype(np.float32)
+        if self.dtype == np.uint8:
+            samples -= 128.
+        return samples.mean(axis=1)
+
+
+class ChromaChordRecognizer():
+    """
+    Offline WAV to chord timeline. Frames are analysed in batches with one FFT
+    call per chunk, folded into a 12-bin chromagram, thresholded to pitch-class
+    sets and named with the Chord rules.
+    """
+
+    def __init__(self, frame_size: int = 4096, hop_size: int = 2048, chunk_frames: int = 256,
+                 threshold: float = 0.5, max_notes: int = 4, smoothing: int = 5,
+                 min_duration: float = 0.25, fmin: float = 55., fmax: float = 2000.,
+                 bass_fmax: float = 250., silence: float = 1e-3) -> None:
+        self.frame_size = frame_size
+        self.hop_size = hop_size
+        # number of analysis frames computed per FFT batch
+        self.chunk_frames = chunk_frames
+        # relative (to the strongest pitch class) energy needed to count as present
+        self.threshold = threshold
+        self.max_notes = max_notes
+        # length in frames of the majority filter applied on the pitch-class sets
+        self.smoothing = smoothing
+        # segments shorter than this (in seconds) are merged into their neighbour
+        self.min_duration = min_duration
+        self.fmin = fmin
+        self.fmax = fmax
+        self.bass_fmax = bass_fmax
+        # frames whose RMS is below this (full scale = 1) are considered silent
+        self.silence = silence
+        self.window = np.hanning(frame_size).astype(np.float32)
+        self.chroma_maps = {}
+        self.names = {}
+
+    def chroma_map(self, sample_rate: int) -> tuple[np.ndarray, np.ndarray]:
+        if sample_rate not in self.chroma_maps:
+            freqs = np.fft.rfftfreq(self.frame_size, 1. / sample_rate)
+            valid = (freqs >= self.fmin) & (freqs <= self.fmax)
+            midi = np.zeros_like(freqs)
+            midi[valid] = 69 + 12 * np.log2(freqs[valid] / 440.)
+            pcs = np.round(midi).astype(int) % 12
+            chroma_map = np.zeros((len(freqs), 12), dtype=np.float32)
+            chroma_map[valid, pcs[valid]] = 1.
+            bass_map = chroma_map.copy()
+            bass_map[freqs > self.bass_fmax] = 0.
+            self.chroma_maps[sample_rate] = (chroma_map, bass_map)
+        return self.chroma_maps[sample_rate]
+
+    def frames(self, chunks: Iterable[np.ndarray]) -> Iterator[np.ndarray]:
+        # re-chunk the sample stream into batches of overlapping frames, carrying
+        # the tail of each chunk over to the next one
+        carry = np.zeros(0, dtype=np.float32)
+        for chunk in chunks:
+            buffer = np.concatenate((carry, chunk))
+            if len(buffer) < self.frame_size:
+                carry = buffer
+                continue
+            batch = sliding_window_view(buffer, self.frame_size)[::self.hop_size]
+            carry = buffer[len(batch) * self.hop_size:]
+            yield batch
+
+    def chromagram(self, batch: np.ndarray, sample_rate: int) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        chroma_map, bass_map = self.chroma_map(sample_rate)
+        spectrum = np.abs(np.fft.rfft(batch * self.window, axis=1))
+        rms = np.sqrt(np.mean(batch ** 2, axis=1))
+        return spectrum @ chroma_map, spectrum @ bass_map, rms
+
+    def active_pitch_classes(self, chroma: np.ndarray, rms: np.ndarray) -> np.ndarray:
+        peak = chroma.max(axis=1, keepdims=True)
+        active = chroma >= self.threshold * peak
+        # only keep the strongest max_notes pitch classes of each frame
+        rank = np.argsort(np.argsort(-chroma, axis=1), axis=1)
+        active &= rank < self.max_notes
+        active[(rms < self.silence) | (peak[:, 0] <= 0)] = False
+        return active
+
+    def smooth(self, active: np.ndarray) -> np.ndarray:
+        if self.smoothing <= 1 or len(active) == 0:
+            return active
+        half = self.smoothing // 2
+        padded = np.pad(active, ((half, self.smoothing - 1 - half), (0, 0)), mode="edge")
+        votes = sliding_window_view(padded, self.smoothing, axis=0).mean(axis=-1)
+        return votes > 0.5
+
+    def chord_name(self, pitch_classes: tuple[int, ...], bass: int) -> str:
+        key = (pitch_classes, bass)
+        if key not in self.names:
+            notes = set(Note(f"{Note.PITCHES_SHARP[pc]}4") for pc in pitch_classes if pc != bass)
+            if bass >= 0:
+                notes.add(Note(f"{Note.PITCHES_SHARP[bass]}3"))
+            self.names[key] = str(Chord(notes))
+        return self.names[key]
+
+    def segments(self, active: np.ndarray, bass: np.ndarray, sample_rate: int) -> list[ChordSegment]:
+        frame_time = self.hop_size / sample_rate
+        if len(active) == 0:
+            return []
+
+        # change points: frames whose pitch-class set or bass differs from the previous
+        masks = active @ (1 << np.arange(12))
+        masks[~active.any(axis=1)] = 0
+        bass = np.where(masks > 0, bass, -1)
+        change = np.flatnonzero((np.diff(masks) != 0) | (np.diff(bass) != 0)) + 1
+        starts = np.concatenate(([0], change))
+        ends = np.concatenate((change, [len(masks)]))
+
+        segments = []
+        for start, end in zip(starts, ends):
+            pcs = tuple(int(pc) for pc in np.flatnonzero(active[start]))
+            bass_pc = int(bass[start])
+            name = self.chord_name(pcs, bass_pc) if pcs else ""
+            segment = ChordSegment(start * frame_time, end * frame_time, name, pcs, bass_pc)
+            if segments and segment.end - segment.start < self.min_duration:
+                # too short: absorb into the previous segment
+                segments[-1].end = segment.end
+            elif segments and segments[-1].name == name:
+                segments[-1].end = segment.end
+            else:
+                segments.append(segment)
+
+        # a short first segment can only be merged forward
+        if len(segments) > 1 and segments[0].end - segments[0].start < self.min_duration:
+            segments[1].start = segments[0].start
+            del segments[0]
+        return [segment for segment in segments if segment.name]
+
+    def recognize(self, path: str) -> list[ChordSegment]:
+        reader = WavReader(path)
+        # integer samples are scaled to full scale = 1
+        if reader.dtype in (np.float32, np.float64):
+            scale = 1.
+        else:
+            scale = 1. / (1 << (8 * reader.sample_width - 1))
+        chunks = (chunk * scale for chunk in
+                  reader.chunks(self.chunk_frames * self.hop_size))
+
+        actives = []
+        basses = []
+        for batch in self.frames(chunks):
+            chroma, bass_chroma, rms = self.chromagram(batch, reader.sample_rate)
+            actives.append(self.active_pitch_classes(chroma, rms))
+            bass = np.argmax(bass_chroma, axis=1)
+            bass[bass_chroma.max(axis=1) <= 0] = -1
+            basses.append(bass)
+
+        if not actives:
+            return []
+        active = self.smooth(np.concatenate(actives))
+        bass = np.concatenate(basses)
+        # the bass only counts when it belongs to the detected pitch classes
+        in_set = (bass >= 0) & active[np.arange(len(bass)), np.maximum(bass, 0)]
+        bass = np.where(in_set, bass, -1)
+        return self.segments(active, bass, reader.sample_rate)
+
+
+def recognize_files(paths: Iterable[str], processes: int = 1,
+                    recognizer: ChromaChordRecognizer | None = None) -> list[tuple[str, list[ChordSegment]]]:
+    paths = list(paths)
+    if recognizer is None:
+        recognizer = ChromaChordRecognizer()
+    if processes == 1 or len(paths) <= 1:
+        return [(path, recognizer.recognize(path)) for path in paths]
+    with ProcessPoolExecutor(max_workers=processes, initializer=attach_naming_tables,
+                             initargs=(publish_naming_tables(),)) as executor:
+        return list(zip(paths, executor.map(recognizer.recognize, paths)))
+
+
+if __name__ == '__main__':
+    import sys
+    for path, segments in recognize_files(sys.argv[1:], processes=None):
+        print(path)
+        for segment in segments:
+            print(f"  {segment}")
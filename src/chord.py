@@ -1,17 +1,28 @@
 from note import Note
+from chord_templates import ChordTemplate, default_library
 from collections import OrderedDict
 
 
 class Chord():
+    __slots__ = ("notes", "pc_mask", "variants")
 
     def __init__(self, notes: str | set[Note]) -> None:
         self.variants = []
+        self.pc_mask = 0
 
         if isinstance(notes, str):
             notes = set([Note(n) for n in notes.split()])
         self.notes = sorted(list(filter(None, notes)))
         if len(self.notes) > 0:
             bass = self.notes[0]
+            # one root per pitch class, at its lowest note: doubled notes in
+            # other octaves would only repeat the same variants
+            roots = []
+            for i, note in enumerate(self.notes):
+                pc = note.check_pitch_ind(note.pitch)
+                if pc >= 0 and not self.pc_mask & (1 << pc):
+                    self.pc_mask |= 1 << pc
+                    roots.append((i, pc))
             if len(self.notes) == 1:
                 self.variants = [NoteVariant(self.notes, bass)]
             elif len(self.notes) == 2:
@@ -19,10 +30,10 @@ class Chord():
                     IntervalVariant(self.notes, bass),
                 ]
             else:
-                for i in range(len(self.notes)):
-                    next = [self.notes[(j+i) % len(self.notes)]
-                            for j in range(len(self.notes))]
-                    self.variants += [ChordVariant(next, bass)]
+                # best template quality over every possible root at once
+                matches = default_library().match_roots(self.pc_mask)
+                # all variants share the chord's notes, which keep the voicing
+                self.variants = [ChordVariant(self.notes, bass, matches[pc], i) for i, pc in roots]
             self.variants.sort()
 
     def __str__(self) -> str:
@@ -33,22 +44,58 @@ class Chord():
 
 
 class Variant():
-    def __init__(self, notes: list[Note], bass: Note) -> None:
-        self.root = notes[0]
-        self.notes = notes
-        self.sorted_notes = sorted(notes)
+    """
+    One reading of a chord. Variants are compact: they share the chord's
+    note list, keep only where their root is in it, and format their names
+    when these are first asked for.
+    """
+    __slots__ = ("chord_notes", "offset", "bass", "formatted")
+
+    def __init__(self, notes: list[Note], bass: Note, offset: int = 0) -> None:
+        self.chord_notes = notes
+        # index of the root in chord_notes
+        self.offset = offset
         self.bass = bass
-        self.name_short = ""
-        self.name_complete = ""
+        # (name_short, name_complete) once formatted
+        self.formatted = None
+
+    @property
+    def root(self) -> Note:
+        return self.chord_notes[self.offset]
+
+    @property
+    def notes(self) -> list[Note]:
+        # the chord's notes from the root on
+        return self.chord_notes[self.offset:] + self.chord_notes[:self.offset]
+
+    @property
+    def sorted_notes(self) -> list[Note]:
+        return sorted(self.chord_notes)
+
+    @property
+    def name_short(self) -> str:
+        if self.formatted is None:
+            self.formatted = self.format_names()
+        return self.formatted[0]
+
+    @property
+    def name_complete(self) -> str:
+        if self.formatted is None:
+            self.formatted = self.format_names()
+        return self.formatted[1]
+
+    def format_names(self) -> tuple[str, str]:
+        return "", ""
 
     def __str__(self) -> str:
         return self.name_short
 
 
 class NoteVariant(Variant):
-    def __init__(self, notes: list[Note], bass: Note) -> None:
-        super().__init__(notes, bass)
-        self.name_short = self.root.pitch
+    __slots__ = ()
+
+    def format_names(self) -> tuple[str, str]:
+        return self.root.pitch, self.root.pitch
 
     def __lt__(self, __o: "NoteVariant"):
         return self.root < __o.root
@@ -70,25 +117,23 @@ class IntervalVariant(Variant):
         11: [("M7", "Major seventh")],
     }
 
-    def __init__(self, notes: list[Note], bass: Note) -> None:
-        super().__init__(notes, bass)
-        self.form(self.sorted_notes[0], self.sorted_notes[1])
+    __slots__ = ()
 
     def __lt__(self, __o: "IntervalVariant"):
         return self.sorted_notes[0] < __o.sorted_notes[0]
 
-    def form(self, n0: Note, n1: Note) -> None:
+    def format_names(self) -> tuple[str, str]:
+        n0, n1 = self.sorted_notes[:2]
         interval = (n1 - n0) % 12
         possible_names = self.INTERVAL_MAP[interval]
         if len(possible_names) == 1:
-            self.name_short, self.name_complete = possible_names[0]
+            name_short, name_complete = possible_names[0]
         else:
             if n1.accident == '#' or n0.accident == 'b':
-                self.name_short, self.name_complete = possible_names[0]
+                name_short, name_complete = possible_names[0]
             else:
-                self.name_short, self.name_complete = possible_names[1]
-        self.name_short = n0.pitch + self.name_short
-        self.name_complete = n0.pitch + self.name_complete
+                name_short, name_complete = possible_names[1]
+        return n0.pitch + name_short, n0.pitch + name_complete
 
 
 class ChordVariant(Variant):
@@ -158,23 +203,75 @@ class ChordVariant(Variant):
         9: "13",
     }
 
-    def __init__(self, notes: list[Note], bass: Note) -> None:
-        super().__init__(notes, bass)
-        self.triad = {}
-        self.extensions = {}
-        self.alterations = None
-        self.third = {}
-        self.fifth = {}
-        self.seventh = {}
+    # heuristic analyses by interval mask, shared by all variants
+    ANALYSES = {}
+
+    __slots__ = ("template", "template_extras", "score")
+
+    def __init__(self, notes: list[Note], bass: Note,
+                 match: tuple[ChordTemplate, float, int] | None = None, offset: int = 0) -> None:
+        super().__init__(notes, bass, offset)
+        self.template = None
+        self.template_extras = 0
+        self.score = 0.
 
         if len(notes) > 2:
-            # TODO: remove notes in different octaves
-            self.distances = [notes[i] - notes[0]
-                              for i in range(1, len(notes))]
-            self.form(self.distances)
+            if match is None:
+                match = default_library().match(self.interval_mask() | 1)
+            if match is not None:
+                self.template, self.score, self.template_extras = match
+                if (self.root - self.bass) % 12 == 0:
+                    # without octaves the lowest note is only a hint at the bass
+                    library = default_library()
+                    self.score += library.root_bonus if self.bass.octave >= 0 else library.lowest_bonus
+
+    def interval_mask(self) -> int:
+        # intervals above the root within one octave, without the root itself
+        root = self.root.check_pitch_ind(self.root.pitch)
+        mask = 0
+        for note in self.chord_notes:
+            mask |= 1 << ((note.check_pitch_ind(note.pitch) - root) % 12)
+        return mask & ~1
+
+    def analysis(self) -> tuple[tuple[str, ...], ...]:
+        # (triad, third, fifth, seventh, extensions)
+        if len(self.chord_notes) <= 2:
+            return (), (), (), (), ()
+        mask = self.interval_mask()
+        if mask not in self.ANALYSES:
+            self.ANALYSES[mask] = self.analyse(mask)
+        return self.ANALYSES[mask]
+
+    @property
+    def triad(self) -> tuple[str, ...]:
+        return self.analysis()[0]
+
+    @property
+    def third(self) -> tuple[str, ...]:
+        return self.analysis()[1]
+
+    @property
+    def fifth(self) -> tuple[str, ...]:
+        return self.analysis()[2]
+
+    @property
+    def seventh(self) -> tuple[str, ...]:
+        return self.analysis()[3]
+
+    @property
+    def extensions(self) -> tuple[str, ...]:
+        return self.analysis()[4]
 
     def __lt__(self, __o: "ChordVariant") -> bool:
-        if self.triad and not __o.triad:
+        # variants matching a template quality rank by their score, the others
+        # fall back to the triad/extension heuristics below
+        if self.template and not __o.template:
+            return True
+        elif __o.template and not self.template:
+            return False
+        elif self.template and __o.template:
+            return self.score > __o.score
+        elif self.triad and not __o.triad:
             return True
         elif __o.triad and not self.triad:
             return False
@@ -192,27 +289,46 @@ class ChordVariant(Variant):
         else:
             return True
 
-    def update_name(self) -> None:
+    def format_names(self) -> tuple[str, str]:
+        if self.template:
+            return self.format_template_names()
+        if len(self.chord_notes) <= 2:
+            return "", ""
+        triad, _, _, seventh, extensions = self.analysis()
         name_short = self.root.pitch
-        for key in self.triad:
+        for key in triad:
             name_short += self.TRIAD_NAME_MAP[key]
-        if self.seventh:
-            name_short += f"{','.join([key for key in self.seventh])}"
-        if self.extensions:
-            name_short += f"({','.join([key for key in self.extensions])})"
+        if seventh:
+            name_short += f"{','.join(seventh)}"
+        if extensions:
+            name_short += f"({','.join(extensions)})"
         if self.bass and self.root.letter != self.bass.letter:
             name_short += f'/{self.bass.letter}'
-        self.name_short = name_short
-
-    def form(self, dists: list[int]) -> None:
-        # restrain everything to one octave and remove repeated intervals and unissons to the root
-        # this also takes care of negative intervals
-        filt_dists = set([dist % 12 for dist in dists if dist % 12])
+        return name_short, ""
+
+    def format_template_names(self) -> tuple[str, str]:
+        extensions = default_library().extension_names(self.template, self.template_extras)
+        name_short = self.root.pitch + self.template.symbol
+        name_complete = f"{self.root.pitch} {self.template.name}"
+        if extensions:
+            name_short += f"({','.join(extensions)})"
+            name_complete += f" ({', '.join(extensions)})"
+        # slash chords only when the bass is actually known
+        if self.bass.octave >= 0 and (self.root - self.bass) % 12:
+            name_short += f"/{self.bass.pitch}"
+            name_complete += f" over {self.bass.pitch}"
+        return name_short, name_complete
+
+    @classmethod
+    def analyse(cls, mask: int) -> tuple[tuple[str, ...], ...]:
+        # unisons with the root and repeated intervals are already gone from the mask
+        filt_dists = set(dist for dist in range(1, 12) if mask & (1 << dist))
+        triad = third = fifth = seventh = ()
 
         # find third
         third_name = ""
         third_dist = -1
-        for dist, name in self.THIRD_MAP.items():
+        for dist, name in cls.THIRD_MAP.items():
             if dist in filt_dists:
                 third_name = name
                 third_dist = dist
@@ -221,45 +337,33 @@ class ChordVariant(Variant):
         # find fifth
         fifth_name = ""
         fifth_dist = -1
-        for dist, name in self.FIFTH_MAP.items():
+        for dist, name in cls.FIFTH_MAP.items():
             if dist in filt_dists:
                 fifth_name = name
                 fifth_dist = dist
                 break
 
         # try to make the triad, given the third and fith from above
-        if (third_name, fifth_name) in self.TRIAD_MAP:
-            mapped_fith, triad_name = self.TRIAD_MAP[(third_name, fifth_name)]
-            self.third[third_name] = None
+        if (third_name, fifth_name) in cls.TRIAD_MAP:
+            mapped_fith, triad_name = cls.TRIAD_MAP[(third_name, fifth_name)]
+            third = (third_name,)
             filt_dists.remove(third_dist)
             if mapped_fith:
-                self.fifth[mapped_fith] = None
+                fifth = (mapped_fith,)
                 filt_dists.remove(fifth_dist)
-            self.triad[triad_name] = None
+            triad = (triad_name,)
 
         # deal with seventh(s)
-        dists_to_remove = []
-        for dist, name in self.SEVENTH_MAP.items():
+        for dist, name in cls.SEVENTH_MAP.items():
             if dist in filt_dists:
-                self.seventh[name] = None
-                dists_to_remove += [dist]
+                seventh += (name,)
+                filt_dists.remove(dist)
                 # notice we don't break here, as we can have multiple 7ths
-        for dist in dists_to_remove:
-            filt_dists.remove(dist)
 
-        # deal with remaining extensions
-        if self.triad:
-            if not self.seventh:
-                ext_map = self.TRIAD_EXTENSION_MAP
-            else:
-                ext_map = self.SEVENTH_EXTENSION_MAP
-            keys_to_remove = []
-            for dist in filt_dists:
-                if dist in self.TRIAD_EXTENSION_MAP:
-                    ext = ext_map[dist]
-                    self.extensions[ext] = None
-                    keys_to_remove += [dist]
-            for key in keys_to_remove:
-                filt_dists.remove(key)
-
-        self.update_name()
+        # deal with remaining extensions, lowest first
+        extensions = ()
+        if triad:
+            ext_map = cls.SEVENTH_EXTENSION_MAP if seventh else cls.TRIAD_EXTENSION_MAP
+            extensions = tuple(ext_map[dist] for dist in sorted(filt_dists) if dist in ext_map)
+
+        return triad, third, fifth, seventh, extensions
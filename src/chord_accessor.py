@@ -0,0 +1,117 @@
+"""
+Chord naming over whole columns. Every distinct value is named once and the
+results are broadcast back to the rows, a chunk of rows at a time so that
+the intermediate arrays stay bounded. Values are note strings ("C3 E3 G3")
+or pitch-class bitmasks (bit 0 is C). With pandas installed, Series get a
+.chord accessor:
+
+    df["name"] = df["notes"].chord.name()
+    df["quality"] = df["notes"].chord.quality()
+
+Without it, name_column does the same over NumPy arrays and lists.
+"""
+import numpy as np
+
+from chord import Chord
+from note import Note
+
+try:
+    import pandas as pd
+except ImportError:
+    pd = None
+
+FIELDS = ("name", "quality", "root")
+CHUNK_SIZE = 1 << 20
+
+
+def mask_notes(mask: int) -> str:
+    # pitch-class bitmask -> notes without octaves
+    return " ".join(Note.PITCHES_SHARP[pc] for pc in range(12) if mask & (1 << pc))
+
+
+def describe(notes: str) -> tuple[str, str, str]:
+    # (name, quality, root) of the best variant, empty when nothing is named
+    chord = Chord(notes)
+    if not chord.variants:
+        return "", "", ""
+    top = chord.variants[0]
+    template = getattr(top, "template", None)
+    quality = template.name if template is not None else top.name_complete[len(top.root.pitch):].strip()
+    return str(chord), quality, top.root.pitch
+
+
+def is_missing(value) -> bool:
+    return value is None or (isinstance(value, float) and value != value)
+
+
+class ChordNamer():
+    """
+    Names column values through a cache shared by all the chunks (and all
+    the columns named with the same namer). Note strings are keyed by their
+    sorted notes, since chords are note sets.
+    """
+
+    def __init__(self) -> None:
+        self.cache = {}
+
+    def lookup(self, value) -> tuple[str, str, str]:
+        if is_missing(value):
+            return "", "", ""
+        if isinstance(value, (int, np.integer)):
+            key = mask_notes(int(value))
+        else:
+            key = " ".join(sorted(str(value).split()))
+        if key not in self.cache:
+            self.cache[key] = describe(key)
+        return self.cache[key]
+
+    def factorize(self, chunk) -> tuple[np.ndarray, list]:
+        # (codes, unique values); pandas hashes, NumPy sorts
+        if pd is not None:
+            codes, uniques = pd.factorize(chunk, use_na_sentinel=False)
+            return codes, list(uniques)
+        chunk = np.asarray(chunk)
+        if chunk.dtype != object:
+            uniques, codes = np.unique(chunk, return_inverse=True)
+            return codes, list(uniques)
+        index = {}
+        codes = np.fromiter((index.setdefault(value, len(index)) for value in chunk.tolist()),
+                            dtype=np.intp, count=len(chunk))
+        return codes, list(index)
+
+    def column(self, values, field: str = "name", chunk_size: int = CHUNK_SIZE) -> np.ndarray:
+        """
+        The given field of every value, as an object array of strings.
+        """
+        position = FIELDS.index(field)
+        result = np.empty(len(values), dtype=object)
+        for start in range(0, len(values), chunk_size):
+            codes, uniques = self.factorize(values[start:start + chunk_size])
+            described = np.array([self.lookup(value)[position] for value in uniques], dtype=object)
+            result[start:start + chunk_size] = described[codes]
+        return result
+
+
+def name_column(values, field: str = "name", chunk_size: int = CHUNK_SIZE) -> np.ndarray:
+    return ChordNamer().column(values, field, chunk_size)
+
+
+if pd is not None:
+    @pd.api.extensions.register_series_accessor("chord")
+    class ChordAccessor():
+        def __init__(self, series: "pd.Series") -> None:
+            self.series = series
+            self.namer = ChordNamer()
+
+        def field(self, field: str, chunk_size: int = CHUNK_SIZE) -> "pd.Series":
+            values = self.namer.column(self.series.array, field, chunk_size)
+            return pd.Series(values, index=self.series.index, name=field)
+
+        def name(self, chunk_size: int = CHUNK_SIZE) -> "pd.Series":
+            return self.field("name", chunk_size)
+
+        def quality(self, chunk_size: int = CHUNK_SIZE) -> "pd.Series":
+            return self.field("quality", chunk_size)
+
+        def root(self, chunk_size: int = CHUNK_SIZE) -> "pd.Series":
+            return self.field("root", chunk_size)
@@ -0,0 +1,131 @@
+import gzip
+import json
+import os
+import time
+from typing import Iterable, Iterator
+
+from chord import Chord
+from note import Note
+
+# bump when the corpus (not the naming) changes, so that old golden files are
+# never compared against a different set of inputs
+CORPUS_VERSION = 1
+
+GOLDEN_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.path.pardir,
+                           "tests", "golden", f"chord_names_v{CORPUS_VERSION}.json.gz")
+
+# doubled spellings grow quickly, so they are only generated for small sets
+MAX_DOUBLED_SIZE = 6
+
+
+def pitch_classes(mask: int) -> list[int]:
+    return [pc for pc in range(12) if mask & (1 << pc)]
+
+
+def note_name(pitch: int) -> str:
+    # pitch in semitones above C0
+    return f"{Note.PITCHES_SHARP[pitch % 12]}{pitch // 12}"
+
+
+def spellings(mask: int, bass: int) -> list[str]:
+    """
+    Multi-octave spellings of a pitch-class set over the given bass: close
+    position, spread (every other note up an octave) and, for small sets,
+    doubled an octave higher.
+    """
+    bass_pitch = 3 * 12 + bass
+    above = sorted(bass_pitch + (pc - bass) % 12 for pc in pitch_classes(mask) if pc != bass)
+
+    close = [bass_pitch] + above
+    spread = [bass_pitch - 12] + [pitch + 12 * (i % 2) for i, pitch in enumerate(above)]
+    result = [close, spread]
+    if len(close) <= MAX_DOUBLED_SIZE:
+        result.append(close + [pitch + 12 for pitch in close])
+    return [" ".join(note_name(pitch) for pitch in pitches) for pitches in result]
+
+
+def corpus() -> Iterator[tuple[int, str]]:
+    """
+    Every non-empty pitch-class set, once without octaves and once per bass
+    note and spelling, as (set size, notes) pairs in a fixed order.
+    """
+    for mask in range(1, 1 << 12):
+        size = mask.bit_count()
+        yield size, " ".join(Note.PITCHES_SHARP[pc] for pc in pitch_classes(mask))
+        for bass in pitch_classes(mask):
+            for notes in spellings(mask, bass):
+                yield size, notes
+
+
+def chord_names(chord: Chord) -> list[str]:
+    return [str(variant) for variant in chord.variants]
+
+
+def name_corpus(entries: Iterable[tuple[int, str]]) -> tuple[dict[str, list[str]], dict[int, tuple[int, float]]]:
+    # names every entry and measures the throughput per set size
+    names = {}
+    throughput = {}
+    for size, notes in entries:
+        start = time.perf_counter()
+        chord = Chord(notes)
+        elapsed = time.perf_counter() - start
+        names[notes] = chord_names(chord)
+        count, seconds = throughput.get(size, (0, 0.))
+        throughput[size] = (count + 1, seconds + elapsed)
+    return names, throughput
+
+
+def write_golden(names: dict[str, list[str]], path: str = GOLDEN_PATH) -> None:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    # mtime=0 keeps the file byte-identical for identical names
+    with open(path, "wb") as raw, gzip.GzipFile(fileobj=raw, mode="wb", mtime=0) as f:
+        f.write(json.dumps({"version": CORPUS_VERSION, "names": names},
+                           indent=0, separators=(",", ":")).encode())
+
+
+def load_golden(path: str = GOLDEN_PATH) -> dict[str, list[str]]:
+    with gzip.open(path, "rt") as f:
+        golden = json.load(f)
+    if golden["version"] != CORPUS_VERSION:
+        raise ValueError(f"{path} is a version {golden['version']} corpus, "
+                         f"expected version {CORPUS_VERSION}")
+    return golden["names"]
+
+
+def compare(golden: dict[str, list[str]], names: dict[str, list[str]]) -> list[tuple[str, list[str], list[str]]]:
+    # (notes, golden names, current names) for every entry that differs
+    diffs = []
+    for notes in sorted(set(golden) | set(names)):
+        expected = golden.get(notes)
+        current = names.get(notes)
+        if expected != current:
+            diffs.append((notes, expected, current))
+    return diffs
+
+
+if __name__ == '__main__':
+    import argparse
+    parser = argparse.ArgumentParser(
+        description="Name every pitch-class set and compare against the golden file")
+    parser.add_argument("--golden", default=GOLDEN_PATH)
+    parser.add_argument("--update", action="store_true", help="rewrite the golden file")
+    parser.add_argument("--show", type=int, default=20, help="number of differences to print")
+    args = parser.parse_args()
+
+    names, throughput = name_corpus(corpus())
+    print(f"{'size':>4} {'chords':>8} {'seconds':>9} {'chords/s':>10}")
+    total_count, total_seconds = 0, 0.
+    for size, (count, seconds) in sorted(throughput.items()):
+        print(f"{size:>4} {count:>8} {seconds:>9.3f} {count / seconds:>10.0f}")
+        total_count += count
+        total_seconds += seconds
+    print(f"{'all':>4} {total_count:>8} {total_seconds:>9.3f} {total_count / total_seconds:>10.0f}")
+
+    if args.update:
+        write_golden(names, args.golden)
+        print(f"Wrote {args.golden}")
+    else:
+        diffs = compare(load_golden(args.golden), names)
+        for notes, expected, current in diffs[:args.show]:
+            print(f"{notes}: {expected} -> {current}")
+        print(f"{len(diffs)} of {len(names)} entries differ")
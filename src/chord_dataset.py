@@ -0,0 +1,250 @@
+import gzip
+import hashlib
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from chord import Chord
+from chord_templates import default_library, rules_version
+from note import Note
+from shared_tables import attach_naming_tables, publish_naming_tables
+from tuning import NUM_STRINGS_TUNING_MAP, parse_tuning, semitones, string_notes
+from voicing import MUTED, find_voicings
+
+DATASET_VERSION = 1
+MANIFEST = "manifest.json"
+
+def dataset_tunings(extra: list[str] = [], strings: list[int] | None = None) -> list[tuple[str, list[str]]]:
+    # (name, tuning) for every known tuning (with one of the given numbers of
+    # strings, if any), then the user ones
+    tunings = [(f"{num_strings} {name}", parse_tuning(tuning))
+               for num_strings, named in NUM_STRINGS_TUNING_MAP.items()
+               for name, tuning in named.items()
+               if strings is None or int(num_strings) in strings]
+    tunings += [(f"{len(parse_tuning(tuning))} Custom {tuning}", parse_tuning(tuning)) for tuning in extra]
+    return tunings
+
+
+def quality_pitch_classes(root: int) -> list[tuple[str, frozenset[int]]]:
+    # every quality with all its tones and, if different, with the required ones only
+    result = []
+    for template in default_library().templates:
+        for mask in dict.fromkeys([template.required | template.optional, template.required]):
+            pcs = frozenset([root] + [(root + dist) % 12 for dist in range(1, 12) if mask & (1 << dist)])
+            result.append((template.symbol, pcs))
+    return result
+
+
+# names by interval structure, so that transposed voicings are only named once
+_name_cache = {}
+
+
+def voicing_name(pitches: list[int]) -> str:
+    pitches = sorted(set(pitches))
+    bass = pitches[0] % 12
+    intervals = tuple(pitch - pitches[0] for pitch in pitches)
+    cached = _name_cache.get(intervals) or _name_cache.get((bass, intervals))
+    if cached is None:
+        notes = set(Note(f"{Note.PITCHES_SHARP[pitch % 12]}{pitch // 12}") for pitch in pitches)
+        chord = Chord(notes)
+        top = chord.variants[0]
+        name = str(chord)
+        if getattr(top, "template", None) is None:
+            # heuristic names are not transposed, they are cached per bass
+            _name_cache[(bass, intervals)] = name
+            return name
+        # template names are root + quality + extensions [+ "/" + bass], with
+        # sharp spellings only, so they transpose with the bass
+        root_offset = (top.root - top.bass) % 12
+        slash = root_offset != 0
+        middle = name[len(top.root.pitch):len(name) - (len(top.bass.pitch) + 1 if slash else 0)]
+        cached = _name_cache[intervals] = (root_offset, middle, slash)
+    if isinstance(cached, str):
+        return cached
+    root_offset, middle, slash = cached
+    name = Note.PITCHES_SHARP[(bass + root_offset) % 12] + middle
+    return name + "/" + Note.PITCHES_SHARP[bass] if slash else name
+
+
+def shard_path(out_dir: str, index: int) -> str:
+    return os.path.join(out_dir, f"chunk-{index:04d}.jsonl.gz")
+
+
+def build_shard(index: int, tuning_name: str, tuning: list[str], shape_root: int, capos: int,
+                num_frets: int, max_span: int, out_dir: str) -> tuple[int, int, str]:
+    """
+    Voicings of every quality over one root at capo 0, and the same shapes at
+    every capo position, where they sound transposed up by the capo. Written
+    to a chunk file atomically, so that finished chunks are checkpoints.
+    """
+    open_pitches = [semitones(note) for note in string_notes(tuning)]
+    rows = []
+    for symbol, pcs in quality_pitch_classes(shape_root):
+        voicings = find_voicings(pcs, open_pitches, -1, num_frets, max_span)
+        for voicing in voicings.tolist():
+            played = [open_pitches[string] + fret for string, fret in enumerate(voicing) if fret != MUTED]
+            text = ",".join("x" if fret == MUTED else str(fret) for fret in voicing)
+            for capo in range(capos + 1):
+                name = voicing_name([pitch + capo for pitch in played])
+                rows.append((capo, Note.PITCHES_SHARP[(shape_root + capo) % 12], symbol, text, name))
+    rows.sort(key=lambda row: row[0])
+
+    path = shard_path(out_dir, index)
+    header = {"tuning_name": tuning_name, "tuning": "-".join(tuning), "shape_root": Note.PITCHES_SHARP[shape_root],
+              "fields": ["capo", "root", "quality", "voicing", "name"]}
+    lines = [json.dumps(header)] + [json.dumps(list(row), ensure_ascii=False) for row in rows]
+    tmp_path = path + ".tmp"
+    # mtime=0 keeps identical chunks byte-identical between runs
+    with open(tmp_path, "wb") as raw, gzip.GzipFile(fileobj=raw, mode="wb", mtime=0) as f:
+        f.write(("\n".join(lines) + "\n").encode())
+    os.replace(tmp_path, path)
+    return index, len(rows), path
+
+
+def file_digest(path: str) -> str:
+    with open(path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def count_rows(path: str) -> int:
+    with gzip.open(path, "rt") as f:
+        # minus the header
+        return sum(1 for _ in f) - 1
+
+
+def stored_config(out_dir: str) -> dict | None:
+    # configuration of a previous (possibly interrupted) run
+    for name in ["checkpoint.json", MANIFEST]:
+        path = os.path.join(out_dir, name)
+        if os.path.exists(path):
+            with open(path) as f:
+                config = json.load(f)
+            config.pop("chunks", None)
+            return config
+    return None
+
+
+def generate(out_dir: str, extra_tunings: list[str] = [], strings: list[int] | None = None,
+             capos: int = 12, num_frets: int = 12, max_span: int = 4, processes: int | None = None,
+             force: bool = False, progress=sys.stderr) -> dict:
+    """
+    Writes one gzipped JSON-lines chunk per tuning and root shape plus a
+    manifest. Chunks left by an interrupted run with the same configuration
+    and naming rules are kept; everything else is regenerated.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    tunings = dataset_tunings(extra_tunings, strings)
+    config = {
+        "version": DATASET_VERSION,
+        "rules": rules_version(),
+        "tunings": ["-".join(tuning) for _, tuning in tunings],
+        "capos": capos,
+        "num_frets": num_frets,
+        "max_span": max_span,
+    }
+    jobs = [(index, name, tuning, root)
+            for index, (name, tuning, root) in enumerate(
+                (name, tuning, root) for name, tuning in tunings for root in range(12))]
+
+    # chunks are only reused for the very same configuration and naming rules
+    checkpoint = os.path.join(out_dir, "checkpoint.json")
+    if force or stored_config(out_dir) != config:
+        for name in os.listdir(out_dir):
+            if name.startswith("chunk-") or name == MANIFEST:
+                os.remove(os.path.join(out_dir, name))
+    with open(checkpoint, "w") as f:
+        json.dump(config, f)
+
+    counts = {}
+    todo = []
+    for job in jobs:
+        if os.path.exists(shard_path(out_dir, job[0])):
+            counts[job[0]] = count_rows(shard_path(out_dir, job[0]))
+        else:
+            todo.append(job)
+    if progress and len(todo) < len(jobs):
+        progress.write(f"Resuming: {len(jobs) - len(todo)} of {len(jobs)} chunks already done\n")
+
+    start = time.perf_counter()
+    done = 0
+
+    def report(index: int, count: int) -> None:
+        nonlocal done
+        done += 1
+        counts[index] = count
+        if progress:
+            elapsed = time.perf_counter() - start
+            eta = elapsed / done * (len(todo) - done)
+            _, name, _, root = jobs[index]
+            progress.write(f"[{done}/{len(todo)}] {name} {Note.PITCHES_SHARP[root]}: {count} rows, "
+                           f"{elapsed:.0f}s elapsed, {eta:.0f}s left\n")
+            progress.flush()
+
+    args = [(index, name, tuning, root, capos, num_frets, max_span, out_dir) for index, name, tuning, root in todo]
+    if processes == 1:
+        for job_args in args:
+            index, count, _ = build_shard(*job_args)
+            report(index, count)
+    else:
+        # the biggest instruments first, so that no long job is left for the end
+        args.sort(key=lambda job_args: -len(job_args[2]))
+        # the workers map the naming tables published once, instead of building their own
+        with ProcessPoolExecutor(processes, initializer=attach_naming_tables,
+                                 initargs=(publish_naming_tables(),)) as executor:
+            futures = [executor.submit(build_shard, *job_args) for job_args in args]
+            for future in as_completed(futures):
+                index, count, _ = future.result()
+                report(index, count)
+
+    chunks = []
+    for index, name, tuning, root in jobs:
+        path = shard_path(out_dir, index)
+        chunks.append({"file": os.path.basename(path), "tuning_name": name, "tuning": "-".join(tuning),
+                       "shape_root": Note.PITCHES_SHARP[root], "rows": counts[index],
+                       "sha256": file_digest(path)})
+    manifest = dict(config, chunks=chunks)
+    with open(os.path.join(out_dir, MANIFEST), "w") as f:
+        json.dump(manifest, f, indent=1)
+    os.remove(checkpoint)
+    return manifest
+
+
+def read_chunk(path: str):
+    # yields dicts, one per voicing
+    with gzip.open(path, "rt") as f:
+        header = json.loads(f.readline())
+        for line in f:
+            row = dict(zip(header["fields"], json.loads(line)))
+            row["tuning"] = header["tuning"]
+            yield row
+
+
+def main(argv: list[str] | None = None) -> int:
+    import argparse
+    parser = argparse.ArgumentParser(
+        prog="pychordwizard dataset",
+        description="Generate the chord chart dataset: every voicing of every root and quality, "
+                    "for every tuning and capo position")
+    parser.add_argument("out", help="output directory")
+    parser.add_argument("--tuning", action="append", default=[],
+                        help="additional tuning, e.g. D-A-D-G-A-D (repeatable)")
+    parser.add_argument("--strings", type=lambda value: [int(n) for n in value.split(",")], default=None,
+                        help="only the built-in tunings with these numbers of strings, e.g. 6,7")
+    parser.add_argument("--capos", type=int, default=12, help="highest capo position")
+    parser.add_argument("--frets", type=int, default=12)
+    parser.add_argument("--max-span", type=int, default=4)
+    parser.add_argument("--processes", type=int, default=None)
+    parser.add_argument("--force", action="store_true", help="discard chunks of a previous run")
+    args = parser.parse_args(argv)
+
+    manifest = generate(args.out, args.tuning, args.strings, args.capos, args.frets, args.max_span,
+                        args.processes, args.force)
+    rows = sum(chunk["rows"] for chunk in manifest["chunks"])
+    print(f"{len(manifest['chunks'])} chunks, {rows} rows in {args.out}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,125 @@
+import wave
+from collections import OrderedDict
+
+import numpy as np
+
+from tuning import semitones, string_notes
+from voicing import MUTED
+
+SAMPLE_RATE = 22050
+
+
+def voicing_frequencies(voicing: tuple[int, ...], tuning: list[str], capo: int = 0) -> list[tuple[int, float]]:
+    # (string, frequency in Hz) of every played string, frets counted from the capo
+    open_pitches = [semitones(note) for note in string_notes(tuning)]
+    result = []
+    for string, fret in enumerate(voicing):
+        if fret != MUTED:
+            # semitones above C0 to MIDI: C0 is MIDI 12
+            midi = open_pitches[string] + fret + capo + 12
+            result.append((string, 440. * 2 ** ((midi - 69) / 12.)))
+    return result
+
+
+def write_wav(path: str, samples: np.ndarray, sample_rate: int = SAMPLE_RATE) -> str:
+    # mono 16-bit PCM, samples in [-1, 1]
+    pcm = np.round(np.clip(samples, -1., 1.) * 32767).astype("<i2")
+    with wave.open(path, "wb") as w:
+        w.setnchannels(1)
+        w.setsampwidth(2)
+        w.setframerate(sample_rate)
+        w.writeframes(pcm.tobytes())
+    return path
+
+
+class ChordPreview():
+    """
+    Renders voicings as strummed plucked strings. Every string is a sum of
+    harmonics with the spectrum of a string plucked at pluck_position, the
+    higher ones decaying faster; all strings are computed at once, and then
+    start strum seconds apart, from the lowest one up. Buffers are cached per (voicing, tuning, capo), the
+    least recently used ones are dropped beyond cache_size.
+    """
+
+    def __init__(self, sample_rate: int = SAMPLE_RATE, duration: float = 1.5, strum: float = 0.025,
+                 harmonics: int = 8, decay: float = 2.5, pluck_position: float = 0.2,
+                 cache_size: int = 128) -> None:
+        self.sample_rate = sample_rate
+        self.duration = duration
+        self.strum = strum
+        self.harmonics = harmonics
+        self.decay = decay
+        self.pluck_position = pluck_position
+        self.cache_size = cache_size
+        self.cache = OrderedDict()
+
+    def render(self, voicing: tuple[int, ...], tuning: list[str], capo: int = 0) -> np.ndarray:
+        """
+        Mono float32 samples in [-1, 1]. The returned buffer is shared with
+        the cache, and therefore read-only.
+        """
+        key = (tuple(voicing), tuple(tuning), capo)
+        if key in self.cache:
+            self.cache.move_to_end(key)
+            return self.cache[key]
+        samples = self.synthesize(voicing_frequencies(voicing, tuning, capo))
+        samples.setflags(write=False)
+        self.cache[key] = samples
+        if len(self.cache) > self.cache_size:
+            self.cache.popitem(last=False)
+        return samples
+
+    def synthesize(self, strings: list[tuple[int, float]]) -> np.ndarray:
+        num_samples = int(self.duration * self.sample_rate)
+        out = np.zeros(num_samples, dtype=np.float32)
+        if not strings:
+            return out
+        freqs = np.array([freq for _, freq in strings], dtype=np.float32)
+        k = np.arange(1, self.harmonics + 1, dtype=np.float32)
+        # (string, harmonic) partials, those above Nyquist are silenced
+        partials = freqs[:, None] * k[None, :]
+        amplitudes = np.abs(np.sin(np.pi * k * self.pluck_position)) / k ** 2
+        amplitudes = np.where(partials < self.sample_rate / 2, amplitudes[None, :], 0.).astype(np.float32)
+        # low strings ring longer, high partials die out first
+        rates = self.decay * (0.5 + partials / 440.) ** 0.5 * k[None, :] ** 0.5
+
+        # damped partials as complex exponentials e^(z n): the value at sample
+        # m * block + n is e^(z n) * e^(z block m), so every string is one
+        # matrix product of block-start weights by the first block
+        z = (-rates + 2j * np.pi * partials) / self.sample_rate
+        block = int(np.ceil(np.sqrt(num_samples)))
+        num_blocks = -(-num_samples // block)
+        head = np.exp(z[..., None] * np.arange(block))
+        steps = amplitudes[..., None] * np.exp(z[..., None] * (block * np.arange(num_blocks)))
+        signals = np.matmul(steps.transpose(0, 2, 1), head).imag
+        signals = signals.reshape(len(strings), -1)[:, :num_samples].astype(np.float32)
+
+        # strummed from the lowest played string up
+        for i in range(len(strings)):
+            onset = min(num_samples, int(round(i * self.strum * self.sample_rate)))
+            out[onset:] += signals[i, :num_samples - onset]
+        # a short fade-in avoids a click at the onset of the first string
+        fade = min(num_samples, int(0.002 * self.sample_rate))
+        out[:fade] *= np.linspace(0., 1., fade, dtype=np.float32)
+        peak = np.abs(out).max()
+        if peak > 0:
+            out *= 0.9 / peak
+        return out
+
+    def save(self, path: str, voicing: tuple[int, ...], tuning: list[str], capo: int = 0) -> str:
+        return write_wav(path, self.render(voicing, tuning, capo), self.sample_rate)
+
+
+if __name__ == '__main__':
+    import argparse
+    from tuning import parse_tuning
+    parser = argparse.ArgumentParser(description="Render a voicing, e.g. x32010, to a WAV file")
+    parser.add_argument("voicing")
+    parser.add_argument("out")
+    parser.add_argument("--tuning", default="E-A-D-G-B-E")
+    parser.add_argument("--capo", type=int, default=0)
+    args = parser.parse_args()
+
+    frets = args.voicing.split(",") if "," in args.voicing else list(args.voicing)
+    voicing = tuple(MUTED if fret in "xX" else int(fret) for fret in frets)
+    print(ChordPreview().save(args.out, voicing, parse_tuning(args.tuning), args.capo))
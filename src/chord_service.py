@@ -0,0 +1,357 @@
+import asyncio
+import json
+import time
+from collections import OrderedDict, deque
+
+from analysis_cache import AnalysisCache, cache_key, default_cache, analyse_notes as name_chord
+
+# JSON-RPC 2.0 error codes
+PARSE_ERROR = -32700
+INVALID_REQUEST = -32600
+METHOD_NOT_FOUND = -32601
+INVALID_PARAMS = -32602
+
+
+class ServiceMetrics():
+    def __init__(self, window: int = 10000) -> None:
+        self.requests = 0
+        self.cache_hits = 0
+        self.batches = 0
+        self.batched = 0
+        self.max_queue_depth = 0
+        self.connections = 0
+        # latencies of the last requests, from reception to response
+        self.latencies = deque(maxlen=window)
+
+    def report(self, queue_depth: int) -> dict:
+        latencies = sorted(self.latencies)
+
+        def percentile(p: float) -> float:
+            if not latencies:
+                return 0.
+            return latencies[min(len(latencies) - 1, int(p * len(latencies)))]
+        return {
+            "requests": self.requests,
+            "cache_hits": self.cache_hits,
+            "batches": self.batches,
+            "mean_batch_size": self.batched / self.batches if self.batches else 0.,
+            "queue_depth": queue_depth,
+            "max_queue_depth": self.max_queue_depth,
+            "connections": self.connections,
+            "latency_p50": percentile(0.5),
+            "latency_p95": percentile(0.95),
+            "latency_max": latencies[-1] if latencies else 0.,
+        }
+
+
+class ChordService():
+    """
+    Chord naming over newline-delimited JSON-RPC 2.0, on localhost TCP or a
+    Unix socket. Requests from all connections that miss the shared cache are
+    queued and named in batches: the batcher waits at most batch_delay after
+    the first queued request for more of them, up to batch_size. Requests may
+    be pipelined, responses are sent as soon as they are ready.
+
+    Methods: name {"notes": "C E G"}, name_many {"notes": [...]}, metrics, ping.
+    With a store, batches are looked up in the persistent analysis cache
+    before being named, and what is named is added to it.
+    """
+
+    def __init__(self, batch_size: int = 512, batch_delay: float = 0.001,
+                 cache_size: int = 65536, store: AnalysisCache | None = None) -> None:
+        self.batch_size = batch_size
+        self.batch_delay = batch_delay
+        self.cache_size = cache_size
+        self.cache = OrderedDict()
+        self.store = store
+        self.pending = {}
+        self.queue = None
+        self.metrics = ServiceMetrics()
+        self.server = None
+        self.batcher = None
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0, path: str | None = None) -> asyncio.AbstractServer:
+        self.queue = asyncio.Queue()
+        self.batcher = asyncio.get_running_loop().create_task(self.runBatcher())
+        if path is not None:
+            self.server = await asyncio.start_unix_server(self.handleConnection, path)
+        else:
+            self.server = await asyncio.start_server(self.handleConnection, host, port)
+        return self.server
+
+    def address(self) -> tuple | str:
+        return self.server.sockets[0].getsockname()
+
+    async def stop(self) -> None:
+        self.server.close()
+        await self.server.wait_closed()
+        self.batcher.cancel()
+        try:
+            await self.batcher
+        except asyncio.CancelledError:
+            pass
+
+    def lookup(self, notes: str) -> asyncio.Future:
+        # cached result, an already pending one, or a new one for the batcher
+        key = cache_key(notes)
+        future = asyncio.get_running_loop().create_future()
+        if key in self.cache:
+            self.cache.move_to_end(key)
+            self.metrics.cache_hits += 1
+            future.set_result(self.cache[key])
+        elif key in self.pending:
+            self.pending[key].append(future)
+        else:
+            self.pending[key] = [future]
+            self.queue.put_nowait(key)
+            self.metrics.max_queue_depth = max(self.metrics.max_queue_depth, self.queue.qsize())
+        return future
+
+    async def runBatcher(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            keys = [await self.queue.get()]
+            deadline = loop.time() + self.batch_delay
+            while len(keys) < self.batch_size:
+                if self.queue.empty():
+                    timeout = deadline - loop.time()
+                    if timeout <= 0:
+                        break
+                    try:
+                        keys.append(await asyncio.wait_for(self.queue.get(), timeout))
+                    except asyncio.TimeoutError:
+                        break
+                else:
+                    keys.append(self.queue.get_nowait())
+            self.nameBatch(keys)
+
+    def nameBatch(self, keys: list[str]) -> None:
+        self.metrics.batches += 1
+        self.metrics.batched += len(keys)
+        stored = self.store.get_many(keys) if self.store is not None else {}
+        named = {}
+        for key in keys:
+            try:
+                result = stored[key] if key in stored else name_chord(key)
+            except Exception as e:
+                for future in self.pending.pop(key):
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            if key not in stored:
+                named[key] = result
+            self.cache[key] = result
+            if len(self.cache) > self.cache_size:
+                self.cache.popitem(last=False)
+            for future in self.pending.pop(key):
+                if not future.done():
+                    future.set_result(result)
+        if named:
+            self.store.put_many(named)
+
+    async def handleConnection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self.metrics.connections += 1
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                self.handleLine(line, writer)
+                # keeps the output buffer bounded when a client pipelines a lot
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            self.metrics.connections -= 1
+            writer.close()
+
+    def handleLine(self, line: bytes, writer: asyncio.StreamWriter) -> None:
+        received = time.perf_counter()
+        try:
+            request = json.loads(line)
+        except ValueError:
+            self.respond(writer, None, received, error=(PARSE_ERROR, "Parse error"))
+            return
+        if not isinstance(request, dict) or "method" not in request:
+            self.respond(writer, None, received, error=(INVALID_REQUEST, "Invalid request"))
+            return
+        request_id = request.get("id")
+        method = request["method"]
+        params = request.get("params", {})
+        self.metrics.requests += 1
+
+        if method == "ping":
+            self.respond(writer, request_id, received, result="pong")
+        elif method == "metrics":
+            self.respond(writer, request_id, received, result=self.metrics.report(self.queue.qsize()))
+        elif method == "name":
+            notes = params.get("notes") if isinstance(params, dict) else (params[0] if params else None)
+            if not isinstance(notes, str):
+                self.respond(writer, request_id, received, error=(INVALID_PARAMS, "notes must be a string"))
+                return
+            future = self.lookup(notes)
+            if future.done():
+                self.respondFuture(writer, request_id, received, future)
+            else:
+                future.add_done_callback(
+                    lambda f: self.respondFuture(writer, request_id, received, f))
+        elif method == "name_many":
+            notes = params.get("notes") if isinstance(params, dict) else params
+            if not isinstance(notes, list) or not all(isinstance(n, str) for n in notes):
+                self.respond(writer, request_id, received, error=(INVALID_PARAMS, "notes must be a list of strings"))
+                return
+            future = asyncio.gather(*[self.lookup(n) for n in notes])
+            future.add_done_callback(
+                lambda f: self.respondFuture(writer, request_id, received, f))
+        else:
+            self.respond(writer, request_id, received, error=(METHOD_NOT_FOUND, f"Unknown method {method}"))
+
+    def respondFuture(self, writer: asyncio.StreamWriter, request_id, received: float,
+                      future: asyncio.Future) -> None:
+        if future.exception() is not None:
+            self.respond(writer, request_id, received, error=(INVALID_PARAMS, str(future.exception())))
+        else:
+            self.respond(writer, request_id, received, result=future.result())
+
+    def respond(self, writer: asyncio.StreamWriter, request_id, received: float,
+                result=None, error: tuple[int, str] | None = None) -> None:
+        if writer.is_closing():
+            return
+        response = {"jsonrpc": "2.0", "id": request_id}
+        if error is not None:
+            response["error"] = {"code": error[0], "message": error[1]}
+        else:
+            response["result"] = result
+        writer.write(json.dumps(response, separators=(",", ":")).encode() + b"\n")
+        self.metrics.latencies.append(time.perf_counter() - received)
+
+
+class ChordServiceError(Exception):
+    def __init__(self, code: int, message: str) -> None:
+        super().__init__(message)
+        self.code = code
+
+
+class ChordServiceClient():
+    """
+    Persistent connection to a ChordService. Calls can be issued concurrently,
+    they are pipelined over the connection and matched by id.
+    """
+
+    def __init__(self) -> None:
+        self.reader = None
+        self.writer = None
+        self.next_id = 0
+        self.calls = {}
+        self.receiver = None
+
+    async def connect(self, host: str = "127.0.0.1", port: int = 0, path: str | None = None) -> None:
+        if path is not None:
+            self.reader, self.writer = await asyncio.open_unix_connection(path)
+        else:
+            self.reader, self.writer = await asyncio.open_connection(host, port)
+        self.receiver = asyncio.get_running_loop().create_task(self.receive())
+
+    async def close(self) -> None:
+        self.writer.close()
+        await self.writer.wait_closed()
+        self.receiver.cancel()
+        try:
+            await self.receiver
+        except asyncio.CancelledError:
+            pass
+
+    async def receive(self) -> None:
+        while True:
+            line = await self.reader.readline()
+            if not line:
+                break
+            response = json.loads(line)
+            future = self.calls.pop(response.get("id"), None)
+            if future is None or future.done():
+                continue
+            if "error" in response:
+                future.set_exception(ChordServiceError(response["error"]["code"], response["error"]["message"]))
+            else:
+                future.set_result(response["result"])
+        for future in self.calls.values():
+            if not future.done():
+                future.set_exception(ConnectionError("Connection closed"))
+        self.calls = {}
+
+    def send(self, method: str, params=None) -> asyncio.Future:
+        self.next_id += 1
+        future = asyncio.get_running_loop().create_future()
+        self.calls[self.next_id] = future
+        request = {"jsonrpc": "2.0", "id": self.next_id, "method": method}
+        if params is not None:
+            request["params"] = params
+        self.writer.write(json.dumps(request, separators=(",", ":")).encode() + b"\n")
+        return future
+
+    async def call(self, method: str, params=None):
+        future = self.send(method, params)
+        await self.writer.drain()
+        return await future
+
+    async def name(self, notes: str) -> dict:
+        return await self.call("name", {"notes": notes})
+
+    async def name_many(self, notes: list[str]) -> list[dict]:
+        return await self.call("name_many", {"notes": notes})
+
+    async def metrics(self) -> dict:
+        return await self.call("metrics")
+
+
+async def benchmark(host: str, port: int, path: str | None, requests: int, clients: int) -> float:
+    # requests per second over the given number of pipelining clients
+    from chord_corpus import corpus
+    notes = [entry for _, entry in corpus()][:requests]
+
+    async def run(client: ChordServiceClient, chunk: list[str]) -> None:
+        futures = [client.send("name", {"notes": n}) for n in chunk]
+        await client.writer.drain()
+        await asyncio.gather(*futures)
+
+    connected = []
+    for _ in range(clients):
+        client = ChordServiceClient()
+        await client.connect(host, port, path)
+        connected.append(client)
+    start = time.perf_counter()
+    await asyncio.gather(*[run(client, notes[i::clients]) for i, client in enumerate(connected)])
+    elapsed = time.perf_counter() - start
+    for client in connected:
+        await client.close()
+    return len(notes) / elapsed
+
+
+if __name__ == '__main__':
+    import argparse
+    parser = argparse.ArgumentParser(description="Chord naming service (newline-delimited JSON-RPC)")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--unix", default=None, help="listen on a Unix socket instead")
+    parser.add_argument("--batch-size", type=int, default=512)
+    parser.add_argument("--batch-delay", type=float, default=0.001)
+    parser.add_argument("--cache-size", type=int, default=65536)
+    parser.add_argument("--no-store", action="store_true",
+                        help="do not share the persistent analysis cache (see analysis_cache)")
+    parser.add_argument("--benchmark", type=int, default=0, metavar="N",
+                        help="send N requests to a running service and report the throughput")
+    parser.add_argument("--clients", type=int, default=4)
+    args = parser.parse_args()
+
+    if args.benchmark:
+        rate = asyncio.run(benchmark(args.host, args.port, args.unix, args.benchmark, args.clients))
+        print(f"{rate:.0f} requests/s")
+    else:
+        async def serve() -> None:
+            store = None if args.no_store else default_cache()
+            service = ChordService(args.batch_size, args.batch_delay, args.cache_size, store)
+            server = await service.start(args.host, args.port, args.unix)
+            print(f"Listening on {service.address()}")
+            async with server:
+                await server.serve_forever()
+        asyncio.run(serve())
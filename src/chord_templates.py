@@ -0,0 +1,167 @@
+import hashlib
+import json
+import os
+from array import array
+
+# interval names accepted in the template file, in semitones above the root
+INTERVAL_MAP = {
+    "b2": 1, "b9": 1,
+    "2": 2, "9": 2,
+    "#2": 3, "#9": 3, "b3": 3, "m3": 3,
+    "3": 4,
+    "4": 5, "11": 5,
+    "#4": 6, "#11": 6, "b5": 6,
+    "5": 7,
+    "#5": 8, "b6": 8, "b13": 8,
+    "6": 9, "13": 9, "bb7": 9,
+    "b7": 10, "7": 11, "maj7": 11,
+}
+
+DEFAULT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "chord_templates.json")
+
+# all intervals but the root
+ALL_INTERVALS = 0xFFE
+
+# sources whose changes can change the names, see rules_version
+RULES_FILES = ["chord.py", "chord_templates.py", "note.py", DEFAULT_PATH]
+
+
+def rules_version() -> str:
+    digest = hashlib.sha256()
+    directory = os.path.dirname(os.path.abspath(__file__))
+    for name in RULES_FILES:
+        with open(os.path.join(directory, name), "rb") as f:
+            digest.update(f.read())
+    return digest.hexdigest()[:16]
+
+
+def interval_mask(intervals: list[str | int]) -> int:
+    mask = 0
+    for interval in intervals:
+        semitones = interval if isinstance(interval, int) else INTERVAL_MAP[str(interval)]
+        mask |= 1 << (semitones % 12)
+    # the root is implied
+    return mask & ALL_INTERVALS
+
+
+def rotate(mask: int, root: int) -> int:
+    # pitch-class mask -> interval mask above the given root
+    return ((mask >> root) | (mask << (12 - root))) & 0xFFF
+
+
+class ChordTemplate():
+    def __init__(self, symbol: str, name: str = "", required: list[str | int] = [],
+                 optional: list[str | int] = [], forbidden: list[str | int] = [],
+                 weight: float = 1., seventh: bool | None = None) -> None:
+        self.symbol = symbol
+        self.name = name
+        self.required = interval_mask(required)
+        self.optional = interval_mask(optional) & ~self.required
+        self.forbidden = interval_mask(forbidden) & ~self.required
+        self.weight = weight
+        # whether remaining tones are spelled as seventh-chord extensions (9, 11, 13)
+        # or as added tones (add9, add11, 6)
+        if seventh is None:
+            seventh = bool(self.required & ((1 << 10) | (1 << 11)))
+        self.seventh = seventh
+
+    def __str__(self) -> str:
+        return self.symbol
+
+
+class ChordTemplateLibrary():
+    """
+    Chord qualities as required/optional/forbidden interval bitmasks. Tones of
+    a chord that a matching quality does not mention are tolerated at a score
+    penalty and spelled as extensions. The best quality for every one of the
+    4096 interval masks is computed once, so naming is a table lookup no matter
+    how many qualities there are.
+    """
+
+    def __init__(self, templates: list[ChordTemplate] = [], extensions: dict[str, dict[int, str]] = {},
+                 root_bonus: float = 4., lowest_bonus: float = 1.5, extra_penalty: float = 5.) -> None:
+        self.templates = list(templates)
+        self.extensions = extensions
+        self.root_bonus = root_bonus
+        self.lowest_bonus = lowest_bonus
+        self.extra_penalty = extra_penalty
+        self.table = None
+
+    @classmethod
+    def load(cls, path: str = DEFAULT_PATH) -> "ChordTemplateLibrary":
+        with open(path) as f:
+            data = json.load(f)
+        extensions = {
+            kind: {int(dist): name for dist, name in names.items()}
+            for kind, names in data["extensions"].items()
+        }
+        templates = [ChordTemplate(**quality) for quality in data["qualities"]]
+        return cls(templates, extensions, **data.get("scoring", {}))
+
+    def add(self, template: ChordTemplate) -> None:
+        self.templates.append(template)
+        self.table = None
+
+    def build(self) -> tuple[array, array, array]:
+        # per interval mask: template index (-1 for none), score and extra tones mask
+        index_table = array("h", [-1]) * (1 << 12)
+        score_table = array("d", [0.]) * (1 << 12)
+        extras_table = array("H", [0]) * (1 << 12)
+        for index, template in enumerate(self.templates):
+            explained = template.required | template.optional
+            free = ALL_INTERVALS & ~template.required & ~template.forbidden
+            # walk every subset of the free intervals
+            subset = free
+            while True:
+                mask = template.required | subset | 1
+                extras = mask & ~explained & ALL_INTERVALS
+                # among equally weighted qualities the more specific one wins
+                score = template.weight + 0.01 * template.required.bit_count() - \
+                    self.extra_penalty * extras.bit_count()
+                if index_table[mask] < 0 or score > score_table[mask]:
+                    index_table[mask] = index
+                    score_table[mask] = score
+                    extras_table[mask] = extras
+                if subset == 0:
+                    break
+                subset = (subset - 1) & free
+        self.table = (index_table, score_table, extras_table)
+        return self.table
+
+    def attach(self, index_table, score_table, extras_table) -> None:
+        """
+        Uses tables built elsewhere, e.g. views of shared memory (see
+        shared_tables), instead of building them. Anything indexable works.
+        """
+        self.table = (index_table, score_table, extras_table)
+
+    def match(self, mask: int) -> tuple[ChordTemplate, float, int] | None:
+        """
+        Best quality for an interval mask (bit 0 is the root) as a
+        (template, score, extra tones mask) tuple, or None.
+        """
+        index_table, score_table, extras_table = self.table if self.table is not None else self.build()
+        mask = (mask | 1) & 0xFFF
+        index = index_table[mask]
+        if index < 0:
+            return None
+        return self.templates[index], score_table[mask], extras_table[mask]
+
+    def match_roots(self, pc_mask: int) -> list[tuple[ChordTemplate, float, int] | None]:
+        # best quality over each of the 12 roots; roots not in the set get None
+        return [self.match(rotate(pc_mask, root)) if pc_mask & (1 << root) else None
+                for root in range(12)]
+
+    def extension_names(self, template: ChordTemplate, extras: int) -> list[str]:
+        names = self.extensions["seventh" if template.seventh else "triad"]
+        return [names[dist] for dist in range(1, 12) if extras & (1 << dist)]
+
+
+_default_library = None
+
+
+def default_library() -> ChordTemplateLibrary:
+    global _default_library
+    if _default_library is None:
+        _default_library = ChordTemplateLibrary.load()
+    return _default_library
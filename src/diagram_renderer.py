@@ -0,0 +1,192 @@
+import os
+import multiprocessing
+from typing import Iterable
+
+from PyQt5 import QtCore, QtGui, QtWidgets, QtSvg
+from PyQt5.QtCore import QRectF
+
+from fretboard_widget import FretboardView
+from voicing import MUTED
+
+
+_application = None
+
+
+def ensure_application() -> QtWidgets.QApplication:
+    # diagrams are rendered without any window, so the offscreen platform is enough
+    global _application
+    if QtWidgets.QApplication.instance() is None:
+        os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+        _application = QtWidgets.QApplication([])
+    return QtWidgets.QApplication.instance()
+
+
+class Diagram():
+    def __init__(self, voicing: tuple[int, ...], name: str = "",
+                 barres: list[tuple[int, tuple[int, int]]] = [], fret_start: int = -1) -> None:
+        self.voicing = tuple(voicing)
+        self.name = name
+        self.barres = list(barres)
+        # -1: pick the position automatically so that the shape fits the diagram
+        self.fret_start = fret_start
+
+    @classmethod
+    def fromAny(cls, diagram: "Diagram | tuple | dict") -> "Diagram":
+        if isinstance(diagram, Diagram):
+            return diagram
+        elif isinstance(diagram, dict):
+            return cls(**diagram)
+        else:
+            return cls(diagram)
+
+
+class DiagramRenderer():
+    """
+    Renders chord diagrams with the look of FretboardView without showing it.
+    One view (and thus one scene) and one image are reused for every diagram.
+    """
+    TITLE_HEIGHT = 24
+
+    def __init__(self, tuning: list[str] = ["E", "A", "D", "G", "B", "E"], num_frets: int = 5,
+                 width: int = 120, height: int = 180) -> None:
+        ensure_application()
+        self.num_frets = num_frets
+        self.width = width
+        self.height = height
+        self.view = FretboardView(num_frets=num_frets, tuning=tuning)
+        self.view.setOpenBottom(True)
+        # fixed source rectangle, so that every diagram is drawn at the same scale
+        self.source = self.view.scene().itemsBoundingRect()
+        self.image = QtGui.QImage(width, height, QtGui.QImage.Format_ARGB32_Premultiplied)
+        self.title_font = QtGui.QFont("Courier New", 10, weight=QtGui.QFont.Bold)
+
+    def setDiagram(self, diagram: Diagram) -> None:
+        fret_start = diagram.fret_start
+        fretted = [fret for fret in diagram.voicing if fret > 0] + \
+            [fret for fret, _ in diagram.barres]
+        if fret_start < 0:
+            if fretted and max(fretted) > self.num_frets:
+                fret_start = min(fretted) - 1
+            else:
+                fret_start = 0
+        # frets are drawn relative to the start position, as with a capo
+        voicing = tuple(fret - fret_start if fret > 0 else fret for fret in diagram.voicing)
+        barres = [(fret - fret_start, coord) for fret, coord in diagram.barres]
+        if self.view.fret_start != fret_start:
+            self.view.setCapo(fret_start)
+        self.view.setVoicing(voicing, barres)
+
+    def paint(self, painter: QtGui.QPainter, target: QRectF, diagram: Diagram) -> None:
+        self.setDiagram(diagram)
+        if diagram.name:
+            title_rect = QRectF(target.left(), target.top(), target.width(), self.TITLE_HEIGHT)
+            painter.setFont(self.title_font)
+            painter.setPen(QtCore.Qt.black)
+            painter.drawText(title_rect, QtCore.Qt.AlignCenter, diagram.name)
+            target = target.adjusted(0, self.TITLE_HEIGHT, 0, 0)
+        self.view.scene().render(painter, target, self.source, QtCore.Qt.KeepAspectRatio)
+
+    def render(self, diagram: "Diagram | tuple | dict") -> QtGui.QImage:
+        diagram = Diagram.fromAny(diagram)
+        self.image.fill(QtCore.Qt.white)
+        painter = QtGui.QPainter(self.image)
+        painter.setRenderHints(QtGui.QPainter.Antialiasing | QtGui.QPainter.TextAntialiasing)
+        self.paint(painter, QRectF(0, 0, self.width, self.height), diagram)
+        painter.end()
+        return self.image
+
+    def save(self, diagram: "Diagram | tuple | dict", path: str) -> str:
+        diagram = Diagram.fromAny(diagram)
+        if path.lower().endswith(".svg"):
+            generator = QtSvg.QSvgGenerator()
+            generator.setFileName(path)
+            generator.setSize(QtCore.QSize(self.width, self.height))
+            generator.setViewBox(QRectF(0, 0, self.width, self.height))
+            painter = QtGui.QPainter(generator)
+            self.paint(painter, QRectF(0, 0, self.width, self.height), diagram)
+            painter.end()
+        elif not self.render(diagram).save(path):
+            raise IOError(f"Could not write {path}")
+        return path
+
+    def saveSheet(self, diagrams: Iterable["Diagram | tuple | dict"], path: str, columns: int = 8) -> str:
+        diagrams = [Diagram.fromAny(diagram) for diagram in diagrams]
+        rows = max(1, (len(diagrams) + columns - 1) // columns)
+        sheet = QtGui.QImage(columns * self.width, rows * self.height,
+                             QtGui.QImage.Format_ARGB32_Premultiplied)
+        sheet.fill(QtCore.Qt.white)
+        painter = QtGui.QPainter(sheet)
+        painter.setRenderHints(QtGui.QPainter.Antialiasing | QtGui.QPainter.TextAntialiasing)
+        for i, diagram in enumerate(diagrams):
+            target = QRectF((i % columns) * self.width, (i // columns) * self.height,
+                            self.width, self.height)
+            self.paint(painter, target, diagram)
+        painter.end()
+        if not sheet.save(path):
+            raise IOError(f"Could not write {path}")
+        return path
+
+
+# one renderer per worker process, created by the pool initializer
+_worker_renderer = None
+
+
+def _init_worker(tuning: list[str], num_frets: int, width: int, height: int) -> None:
+    global _worker_renderer
+    _worker_renderer = DiagramRenderer(tuning, num_frets, width, height)
+
+
+def _render_batch(batch: list[tuple[str, "Diagram | tuple | dict"]]) -> list[str]:
+    return [_worker_renderer.save(diagram, path) for path, diagram in batch]
+
+
+def render_diagrams(diagrams: Iterable["Diagram | tuple | dict"], out_dir: str, fmt: str = "png",
+                    tuning: list[str] = ["E", "A", "D", "G", "B", "E"], num_frets: int = 5,
+                    width: int = 120, height: int = 180, processes: int | None = None,
+                    batch_size: int = 256) -> list[str]:
+    """
+    Renders every diagram to out_dir/<index>.<fmt> and returns the paths in
+    input order. Batches of diagrams are spread over worker processes, each
+    one reusing a single DiagramRenderer.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    diagrams = list(diagrams)
+    digits = max(5, len(str(len(diagrams))))
+    jobs = [(os.path.join(out_dir, f"{i:0{digits}d}.{fmt}"), diagram)
+            for i, diagram in enumerate(diagrams)]
+    batches = [jobs[i:i + batch_size] for i in range(0, len(jobs), batch_size)]
+
+    if processes == 1 or len(batches) <= 1:
+        _init_worker(tuning, num_frets, width, height)
+        return [path for batch in batches for path in _render_batch(batch)]
+
+    # spawn rather than fork: Qt does not survive being forked
+    context = multiprocessing.get_context("spawn")
+    with context.Pool(processes, _init_worker, (tuning, num_frets, width, height)) as pool:
+        return [path for paths in pool.map(_render_batch, batches) for path in paths]
+
+
+if __name__ == '__main__':
+    import argparse
+    parser = argparse.ArgumentParser(description="Render chord diagrams, one voicing per line (e.g. 'x32010 C')")
+    parser.add_argument("voicings")
+    parser.add_argument("out")
+    parser.add_argument("--sheet", action="store_true", help="write a single sprite sheet to OUT")
+    parser.add_argument("--format", default="png")
+    parser.add_argument("--processes", type=int, default=None)
+    args = parser.parse_args()
+
+    diagrams = []
+    with open(args.voicings) as f:
+        for line in f:
+            fields = line.split()
+            if not fields:
+                continue
+            frets = fields[0].split(",") if "," in fields[0] else list(fields[0])
+            voicing = tuple(MUTED if fret in "xX" else int(fret) for fret in frets)
+            diagrams.append(Diagram(voicing, " ".join(fields[1:])))
+
+    if args.sheet:
+        DiagramRenderer().saveSheet(diagrams, args.out)
+    else:
+        render_diagrams(diagrams, args.out, args.format, processes=args.processes)
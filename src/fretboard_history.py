@@ -0,0 +1,108 @@
+from collections import deque
+
+from voicing import MUTED
+
+
+class FretboardState():
+    """
+    Immutable snapshot of the fretboard: one fret per string (MUTED if none)
+    and the barres as sorted (fret, (left string, right string)) pairs. Edits
+    return a new state that shares everything that did not change, so keeping
+    the state of every edit costs one small tuple per edit.
+    """
+
+    def __init__(self, notes: tuple[int, ...], barres: tuple[tuple[int, tuple[int, int]], ...] = ()) -> None:
+        self.notes = notes
+        self.barres = barres
+
+    @classmethod
+    def empty(cls, num_strings: int) -> "FretboardState":
+        return cls((MUTED,) * num_strings)
+
+    def __eq__(self, __o: object) -> bool:
+        if not isinstance(__o, FretboardState):
+            return NotImplemented
+        return self.notes == __o.notes and self.barres == __o.barres
+
+    def __hash__(self) -> int:
+        return hash((self.notes, self.barres))
+
+    def with_note(self, string: int, fret: int) -> "FretboardState":
+        if self.notes[string] == fret:
+            return self
+        notes = self.notes[:string] + (fret,) + self.notes[string + 1:]
+        return FretboardState(notes, self.barres)
+
+    def with_barre(self, fret: int, string_coord: tuple[int, int]) -> "FretboardState":
+        barre = (fret, tuple(sorted(string_coord)))
+        if barre in self.barres:
+            return self
+        return FretboardState(self.notes, tuple(sorted(self.barres + (barre,))))
+
+    def without_barre(self, fret: int, string_coord: tuple[int, int]) -> "FretboardState":
+        barre = (fret, tuple(sorted(string_coord)))
+        if barre not in self.barres:
+            return self
+        return FretboardState(self.notes, tuple(b for b in self.barres if b != barre))
+
+    def diff(self, target: "FretboardState") -> tuple[list[tuple[int, int]], list, list]:
+        """
+        What it takes to go from this state to the target one: the (string,
+        fret) notes that change, and the barres to remove and to add.
+        """
+        notes = [(string, fret) for string, (current, fret) in enumerate(zip(self.notes, target.notes))
+                 if current != fret]
+        if self.barres is target.barres:
+            return notes, [], []
+        removed = [barre for barre in self.barres if barre not in target.barres]
+        added = [barre for barre in target.barres if barre not in self.barres]
+        return notes, removed, added
+
+
+class FretboardHistory():
+    """
+    Undo/redo stacks of FretboardState snapshots. Pushing a new state drops
+    the redo stack; with a limit, the oldest states are forgotten.
+    """
+
+    def __init__(self, initial: FretboardState, limit: int | None = None) -> None:
+        self.current = initial
+        self.undo_stack = deque(maxlen=limit)
+        self.redo_stack = []
+
+    def push(self, state: FretboardState) -> bool:
+        # returns whether the state is a new history entry
+        if state == self.current:
+            return False
+        self.undo_stack.append(self.current)
+        self.redo_stack = []
+        self.current = state
+        return True
+
+    def can_undo(self) -> bool:
+        return len(self.undo_stack) > 0
+
+    def can_redo(self) -> bool:
+        return len(self.redo_stack) > 0
+
+    def undo(self) -> FretboardState | None:
+        if not self.undo_stack:
+            return None
+        self.redo_stack.append(self.current)
+        self.current = self.undo_stack.pop()
+        return self.current
+
+    def redo(self) -> FretboardState | None:
+        if not self.redo_stack:
+            return None
+        self.undo_stack.append(self.current)
+        self.current = self.redo_stack.pop()
+        return self.current
+
+    def reset(self, state: FretboardState) -> None:
+        self.current = state
+        self.undo_stack.clear()
+        self.redo_stack = []
+
+    def __len__(self) -> int:
+        return len(self.undo_stack) + 1 + len(self.redo_stack)
@@ -1,63 +1,102 @@
 from PyQt5 import QtCore, QtGui
-from PyQt5.QtWidgets import QGraphicsRectItem, QGraphicsEllipseItem, QGraphicsSceneMouseEvent
+from PyQt5.QtWidgets import QGraphicsItem, QGraphicsRectItem, QGraphicsSceneMouseEvent
 from PyQt5.QtCore import QLineF, QPointF, QRectF, QSizeF
-from PyQt5.QtGui import QPen, QLinearGradient, QColor, QBrush, QPainter
+from PyQt5.QtGui import QPen, QLinearGradient, QColor, QBrush, QPainter, QPainterPath
+from voicing import CHORD_TONE, ROOT_TONE, SCALE_TONE
 
 
-class FretboardNoteItem(QGraphicsEllipseItem):
-    def __init__(self, fret: int, string: int, x: float, y: float, w: float, h: float, parent=None):
-        QGraphicsEllipseItem.__init__(self, x, y, w, h, parent)
-        self.m_fret = fret
-        self.m_string = string
+class FretboardNotesItem(QGraphicsItem):
+    """
+    Paints every fretted note and barre of the view in one pass. The view
+    keeps them as scene rectangles, {(fret, string): rect} for the notes (None
+    for open strings) and {fret: {(left, right): rect}} for the barres, and
+    hands them over with setNotes; presses are hit-tested arithmetically, so
+    editing never adds or removes scene items.
+    """
+    CIRCLE_SIZE = 6
 
-    def mousePressEvent(self, event):
-        self.scene().existing_note_pressed.emit(self.m_fret, self.m_string)
-        super().mousePressEvent(event)
-        event.accept()
+    def __init__(self, num_frets: int, num_strings: int, fret_w: int, fret_h: int,
+                 topLeft: QPointF, note_diameter: float, parent=None) -> None:
+        super().__init__(parent)
+        self.fret_w = fret_w
+        self.fret_h = fret_h
+        self.topLeft = topLeft
+        self.notes = {}
+        self.barres = {}
+        # barre being dragged, not committed yet
+        self.moving_barre = None
+        margin = max(note_diameter, self.CIRCLE_SIZE)
+        self.bounds = QRectF(topLeft, QSizeF((num_strings - 1) * fret_w, num_frets * fret_h)).adjusted(
+            -margin, -margin, margin, margin)
 
+    def setNotes(self, notes: dict, barres: dict, moving_barre: QRectF | None = None) -> None:
+        self.notes = notes
+        self.barres = barres
+        self.moving_barre = moving_barre
+        self.update()
 
-class FretboardBarreItem(QGraphicsRectItem):
-    CIRCLE_SIZE = 6
+    def boundingRect(self) -> QRectF:
+        return self.bounds
 
-    def __init__(self, fret: int, string_coords: tuple[int, int], x: float, y: float, w: float, h: float, parent=None):
-        QGraphicsRectItem.__init__(self, x, y, w, h, parent)
-        self.string_coords = tuple(sorted(string_coords))
-        self.fret = fret
+    def fretString(self, pos: QPointF) -> tuple[int, int]:
+        # same neck coordinates as FretboardItem.calculateFretString
+        fret = 1 + int((pos.y() - self.topLeft.y()) // self.fret_h)
+        string = int(round((pos.x() - self.topLeft.x()) / self.fret_w))
+        return (fret, string)
 
-    def mousePressEvent(self, event: 'QGraphicsSceneMouseEvent') -> None:
-        self.scene().barre_pressed.emit(self.fret, self.string_coords)
-        super().mousePressEvent(event)
-        event.accept()
+    def noteAt(self, pos: QPointF) -> tuple[int, int] | None:
+        coords = self.fretString(pos)
+        rect = self.notes.get(coords)
+        if rect is None:
+            return None
+        d = pos - rect.center()
+        r = rect.width() / 2.
+        return coords if d.x() * d.x() + d.y() * d.y() <= r * r else None
+
+    def barreAt(self, pos: QPointF) -> tuple[int, tuple[int, int]] | None:
+        fret, _ = self.fretString(pos)
+        for string_coords, rect in self.barres.get(fret, {}).items():
+            if self.barreContains(rect, pos):
+                return (fret, string_coords)
+        return None
+
+    def barreContains(self, rect: QRectF, pos: QPointF) -> bool:
+        r = self.CIRCLE_SIZE / 2.
+        return rect.adjusted(-r, 0, r, 0).contains(pos)
 
-    def shape(self) -> QtGui.QPainterPath:
-        path = super().shape()
-        # TODO: why doesn't this work?
-        cl, cr = self.getRoundingEllipseCenters()
-        path.addEllipse(cl, self.CIRCLE_SIZE / 2., self.CIRCLE_SIZE / 2.)
-        path.addEllipse(cr, self.CIRCLE_SIZE / 2., self.CIRCLE_SIZE / 2.)
-        path.setFillRule(QtCore.Qt.WindingFill)
-        return path
+    def mousePressEvent(self, event: QGraphicsSceneMouseEvent) -> None:
+        pos = event.pos()
+        barre = self.barreAt(pos)
+        if barre is not None:
+            self.scene().barre_pressed.emit(*barre)
+            event.accept()
+            return
+        note = self.noteAt(pos)
+        if note is not None:
+            self.scene().existing_note_pressed.emit(*note)
+            event.accept()
+            return
+        # empty spot: the fretboard below places a new note
+        event.ignore()
 
     def paint(self, painter: QtGui.QPainter, option, widget) -> None:
         painter.setBrush(QtCore.Qt.black)
         painter.setPen(QtCore.Qt.black)
-        # main rectangle
-        painter.drawRect(self.rect())
-        # left and right rounding corner ellipsi
-        cl, cr = self.getRoundingEllipseCenters()
-        painter.drawEllipse(cl, self.CIRCLE_SIZE / 2., self.CIRCLE_SIZE / 2.)
-        painter.drawEllipse(cr, self.CIRCLE_SIZE / 2., self.CIRCLE_SIZE / 2.)
-        self.scene().update()
+        for rect in self.notes.values():
+            if rect is not None:
+                painter.drawEllipse(rect)
+        for barres in self.barres.values():
+            for rect in barres.values():
+                self.paintBarre(painter, rect)
+        if self.moving_barre is not None:
+            self.paintBarre(painter, self.moving_barre)
 
-    def getRoundingEllipseCenters(self):
-        rect = self.rect()
-        bl = rect.bottomLeft()
-        tl = rect.topLeft()
-        br = rect.bottomRight()
-        tr = rect.topRight()
-        cl = QPointF(bl.x(), (bl.y() + tl.y()) / 2.)
-        cr = QPointF(br.x(), (br.y() + tr.y()) / 2.)
-        return (cl, cr)
+    def paintBarre(self, painter: QtGui.QPainter, rect: QRectF) -> None:
+        painter.drawRect(rect)
+        # left and right rounding corner ellipsi
+        r = self.CIRCLE_SIZE / 2.
+        painter.drawEllipse(QPointF(rect.left(), rect.center().y()), r, r)
+        painter.drawEllipse(QPointF(rect.right(), rect.center().y()), r, r)
 
 
 class FretboardItem(QGraphicsRectItem):
@@ -73,6 +112,16 @@ class FretboardItem(QGraphicsRectItem):
         self.fret_w = fret_w
         self.fret_h = fret_h
         self.topLeft = topLeft
+        # fret right above the item, when only a window of the neck is shown
+        self.first_fret = 0
+
+    def setWindow(self, first_fret: int, num_frets: int, topLeft: QPointF) -> None:
+        self.prepareGeometryChange()
+        self.first_fret = first_fret
+        self.num_frets = num_frets
+        self.topLeft = topLeft
+        self.setRect(QRectF(topLeft, QSizeF(
+            self.num_strings * self.fret_w, num_frets * self.fret_h)))
 
     def paintFretboard(self, painter: QPainter, fret_start: int, fret_end: int):
         fret_diff = fret_end - fret_start
@@ -149,7 +198,7 @@ class FretboardItem(QGraphicsRectItem):
         bottom = self.rect().bottom()
         ind_x = (x - left) / (right - left)
         ind_y = (y - top) / (bottom - top)
-        fret = 1 + int((ind_y * self.num_frets))
+        fret = self.first_fret + 1 + int((ind_y * self.num_frets))
         string = int(round(ind_x * self.num_strings))
 
         return (fret, string)
@@ -179,7 +228,6 @@ class StringButtonItem(QGraphicsRectItem):
             else:
                 painter.setBrush(QBrush())
             painter.drawEllipse(rect)
-        self.scene().update()
 
     def mousePressEvent(self, event: 'QGraphicsSceneMouseEvent') -> None:
         if self.is_active:
@@ -200,8 +248,17 @@ class FretboardInlayItem(QGraphicsRectItem):
         self.style = style
         self.num_strings = num_strings
 
+    def setFret(self, fret: int, y: float) -> None:
+        # inlay items are recycled while scrolling along the neck
+        self.fret = fret
+        rect = self.rect()
+        rect.moveTop(y)
+        self.setRect(rect)
+        self.update()
+
     def paint(self, painter: QtGui.QPainter, option, widget) -> None:
-        norm_fret = self.fret % 13
+        # the markers repeat every octave, with the double dot on 12, 24...
+        norm_fret = self.fret % 12 or 12
         rect = self.rect()
         center = rect.center()
         cx = center.x()
@@ -232,4 +289,49 @@ class FretboardInlayItem(QGraphicsRectItem):
                     cr = QPointF(cx + x_offset, center.y())
                 painter.drawEllipse(cl, self.size / 2., self.size / 2.)
                 painter.drawEllipse(cr, self.size / 2., self.size / 2.)
-        self.scene().update()
+
+
+class FretboardOverlayItem(QGraphicsItem):
+    """
+    Dots on many neck positions at once, e.g. every tone of a chord or a
+    scale, as a single item: one path per kind of position, painted with one
+    brush each and cached as a pixmap. It ignores the mouse, so that notes can
+    still be placed on top of it.
+    """
+    COLORS = {
+        SCALE_TONE: QColor(160, 160, 160),
+        CHORD_TONE: QColor(60, 110, 200),
+        ROOT_TONE: QColor(210, 60, 50),
+    }
+    # scale tones are drawn smaller than chord tones
+    SIZES = {SCALE_TONE: 0.7, CHORD_TONE: 1., ROOT_TONE: 1.}
+
+    def __init__(self, parent=None) -> None:
+        super().__init__(parent)
+        self.paths = {}
+        self.bounds = QRectF()
+        self.setAcceptedMouseButtons(QtCore.Qt.NoButton)
+        self.setCacheMode(QGraphicsItem.DeviceCoordinateCache)
+
+    def setPositions(self, positions: list[tuple[float, float, int]], diameter: float) -> None:
+        # (x, y, kind) of the dot centres
+        self.prepareGeometryChange()
+        self.paths = {}
+        for x, y, kind in positions:
+            if kind not in self.paths:
+                self.paths[kind] = QPainterPath()
+            radius = diameter * self.SIZES[kind] / 2.
+            self.paths[kind].addEllipse(QPointF(x, y), radius, radius)
+        self.bounds = QRectF()
+        for path in self.paths.values():
+            self.bounds = self.bounds.united(path.boundingRect())
+        self.update()
+
+    def boundingRect(self) -> QRectF:
+        return self.bounds
+
+    def paint(self, painter: QPainter, option, widget) -> None:
+        painter.setPen(QtCore.Qt.NoPen)
+        for kind in sorted(self.paths):
+            painter.setBrush(self.COLORS[kind])
+            painter.drawPath(self.paths[kind])
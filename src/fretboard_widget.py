@@ -1,9 +1,12 @@
 from PyQt5 import QtCore, QtGui, QtWidgets
 from PyQt5.QtWidgets import QGraphicsScene, QGraphicsTextItem, QGraphicsLineItem
-from PyQt5.QtCore import QPointF, pyqtSignal, pyqtSlot
-from PyQt5.QtGui import QPen, QBrush, QTransform, QFont
-from fretboard_items import FretboardBarreItem, FretboardNoteItem, \
-    FretboardInlayItem, StringButtonItem, FretboardItem
+from PyQt5.QtCore import QPointF, QRectF, pyqtSignal, pyqtSlot
+from PyQt5.QtGui import QPen, QFont
+from fretboard_items import FretboardNotesItem, \
+    FretboardInlayItem, FretboardOverlayItem, StringButtonItem, FretboardItem
+from fretboard_history import FretboardHistory, FretboardState
+from tuning import string_names
+from voicing import MUTED, neck_positions, open_pitch_classes, voicing_from_active_notes
 
 
 class FretboardScene(QGraphicsScene):
@@ -11,6 +14,9 @@ class FretboardScene(QGraphicsScene):
     existing_note_pressed = pyqtSignal(int, int)
     new_note_pressed = pyqtSignal(int, int)
     notes_changed = pyqtSignal(dict)
+    # pointer dragged (scene coordinates) or released after a press, see FretboardView.dragTo
+    pointer_moved = pyqtSignal(float, float)
+    pointer_released = pyqtSignal()
 
 
 class FretboardView(QtWidgets.QGraphicsView):
@@ -19,14 +25,22 @@ class FretboardView(QtWidgets.QGraphicsView):
     BARRE_THICKNESS = NOTEDIAMETER
     STRING_BTN_SITZE = 5
 
-    def __init__(self, num_frets=13, tuning: list[str] = ["E", "A", "D", "G", "B", "E"], fret_start=0, parent=None) -> None:
+    def __init__(self, num_frets=13, tuning: list[str] = ["E", "A", "D", "G", "B", "E"], fret_start=0, parent=None,
+                 visible_frets: int | None = None) -> None:
         super().__init__(parent)
         # self.initialize()
 
         self.fret_start = fret_start
         self.num_frets = num_frets
+        # only the frets in the visible window get scene items, which are
+        # recycled when scrolling (wheel) or zooming (ctrl + wheel) along the neck
+        self.visible_frets = min(visible_frets or num_frets, num_frets)
+        self.first_fret = 0
+        self.inlays = []
         self.num_strings = len(tuning)
         self.tuning = tuning
+        # notes and barres are all painted by notes_item, these map them to
+        # their scene rectangles (None for the open strings)
         self.note_items = {}
         self.barre_items = {}
         self.active = {}
@@ -36,6 +50,13 @@ class FretboardView(QtWidgets.QGraphicsView):
         self.moving_barre_fret = None
         self.open_top = False
         self.open_bottom = True
+        # (chord mask, scale mask, root) highlighted over the whole neck, see setOverlay
+        self.overlay = None
+        # every edit updates the state incrementally, so that a snapshot for
+        # the history is just a reference to it
+        self.state = FretboardState.empty(self.num_strings)
+        self.history = FretboardHistory(self.state)
+        self.restoring = False
 
         # set up scene
         scene = FretboardScene()
@@ -47,6 +68,15 @@ class FretboardView(QtWidgets.QGraphicsView):
         super().resizeEvent(event)
         self.fitInView(self.scene().sceneRect(), QtCore.Qt.KeepAspectRatio)
 
+    def wheelEvent(self, event: QtGui.QWheelEvent) -> None:
+        steps = event.angleDelta().y() // 120
+        if steps:
+            if event.modifiers() & QtCore.Qt.ControlModifier:
+                self.setVisibleFrets(self.visible_frets - steps)
+            else:
+                self.setFirstFret(self.first_fret - steps)
+        event.accept()
+
     def sizeHint(self):
         return self.mapFromScene(self.sceneRect()).boundingRect().size()
 
@@ -58,9 +88,20 @@ class FretboardView(QtWidgets.QGraphicsView):
         # or the barre itself. Thus, we check the intersected item
         if not self.note_pressed_coord:
             return
-        sp = self.mapToScene(event.pos())
-        item = self.scene().itemAt(sp, QTransform())
-        if item and (isinstance(item, FretboardItem) or isinstance(item, FretboardBarreItem)):
+        self.dragTo(self.mapToScene(event.pos()))
+        return super().mouseMoveEvent(event)
+
+    def dragTo(self, sp: QPointF) -> None:
+        if not self.note_pressed_coord:
+            return
+        self.scene().pointer_moved.emit(sp.x(), sp.y())
+        # the barre follows the cursor over the fretboard or the barre itself,
+        # the notes are hit-tested by the item that paints them
+        on_barre = self.moving_barre_item is not None and \
+            self.notes_item.barreContains(self.moving_barre_item, sp)
+        on_fretboard = self.fretboard.sceneBoundingRect().contains(sp) and \
+            self.notes_item.noteAt(sp) is None
+        if on_barre or on_fretboard:
             np_fret, np_string = self.note_pressed_coord
             string = int((sp.x() + self.FRETWIDTH / 2) / self.FRETWIDTH)
 
@@ -68,10 +109,10 @@ class FretboardView(QtWidgets.QGraphicsView):
                 # the barre is reduced to a single note: delete the current barre if any
                 # and generate a note
                 if self.moving_barre_item:
-                    self.scene().removeItem(self.moving_barre_item)
                     self.moving_barre_item = None
                     self.moving_barre_string_coord = None
                     self.moving_barre_fret = None
+                    self.updateNotes()
                 self.addSingleNote((np_fret, string))
             else:
                 # We're in barre mode: check if we need to create one,  extend it or shrink it
@@ -82,10 +123,6 @@ class FretboardView(QtWidgets.QGraphicsView):
                     self.moving_barre_fret = np_fret
                     self.moving_barre_string_coord = string_coord
 
-                    # we delete the old barre before generating the new one
-                    if self.moving_barre_item:
-                        self.scene().removeItem(self.moving_barre_item)
-
                     # check if the barre intersects with any notes and overwrite them (delete the notes)
                     coords_to_delete = []
                     leftmost_string, rightmost_string = sorted(
@@ -99,20 +136,16 @@ class FretboardView(QtWidgets.QGraphicsView):
                     for coord in coords_to_delete:
                         self.removeSingleNote(coord)
 
-                    (x, y, w, h) = self.calculateBarreRect(
-                        np_fret, self.moving_barre_string_coord
-                    )
-
-                    self.moving_barre_item = FretboardBarreItem(
-                        self.moving_barre_fret, self.moving_barre_string_coord, x, y + self.y_offset, w, h
-                    )
-
-                    self.scene().addItem(self.moving_barre_item)
+                    # replaces the previous extent of the barre, if any
+                    self.moving_barre_item = self.barreRect(np_fret, self.moving_barre_string_coord)
                     self.updateActiveStringsAndNotes()
 
-        return super().mouseMoveEvent(event)
-
     def mouseReleaseEvent(self, event: QtGui.QMouseEvent) -> None:
+        self.release()
+        return super().mouseReleaseEvent(event)
+
+    def release(self) -> None:
+        self.scene().pointer_released.emit()
         if self.moving_barre_item and self.moving_barre_string_coord and self.moving_barre_fret:
             self.addBarreItem(
                 self.moving_barre_fret, self.moving_barre_string_coord, self.moving_barre_item)
@@ -121,8 +154,9 @@ class FretboardView(QtWidgets.QGraphicsView):
         self.moving_barre_string_coord = None
         self.moving_barre_item = None
         self.note_pressed_coord = None
-
-        return super().mouseReleaseEvent(event)
+        self.updateNotes()
+        # a press, drag and release is one history entry
+        self.commitState()
 
     @pyqtSlot(int, int)
     def onNewNotePressed(self, fret: int, string: int):
@@ -159,7 +193,7 @@ class FretboardView(QtWidgets.QGraphicsView):
         # tuning
         self.tuning_items = [
             QGraphicsTextItem(string_name)
-            for string_name in self.tuning
+            for string_name in string_names(self.tuning)
         ]
         for i, ti in enumerate(self.tuning_items):
             ti.setFont(QFont("Courier New", 6))
@@ -184,7 +218,7 @@ class FretboardView(QtWidgets.QGraphicsView):
 
         # initialize frets and strings
         self.fretboard = FretboardItem(
-            self.num_frets,
+            self.visible_frets,
             self.num_strings,
             self.FRETWIDTH,
             self.FRETHEIGHT,
@@ -198,36 +232,34 @@ class FretboardView(QtWidgets.QGraphicsView):
         # fret label
         self.fret_text_item = QGraphicsTextItem()
         self.fret_text_item.setDefaultTextColor(QtCore.Qt.darkGray)
-        fret_pos = QPointF(-20, self.y_offset - 10)
         fret_font = QFont("Courier New", 7, weight=100)
-        self.fret_text_item.setPos(fret_pos)
         self.fret_text_item.setFont(fret_font)
         self.scene().addItem(self.fret_text_item)
         # to keep the symmetry
         self.fret_text_dummy_item = QGraphicsTextItem()
         self.fret_text_dummy_item.setVisible(False)
-        fret_pos.setX(self.FRETWIDTH * (self.num_strings - 1))
         self.fret_text_dummy_item.setFont(fret_font)
-        self.fret_text_dummy_item.setPos(fret_pos)
         self.scene().addItem(self.fret_text_dummy_item)
 
-        # inlays
-        self.inlays = [
-            FretboardInlayItem(
-                0.,
-                (fret - 1) * self.FRETHEIGHT + self.y_offset,
-                (self.num_strings - 1) * self.FRETWIDTH,
-                self.FRETHEIGHT,
-                fret,
-                self.num_strings
-            )
-            for fret in range(1, self.num_frets+1)
-        ]
-        for inlay in self.inlays:
-            inlay.setZValue(-1)
-            self.scene().addItem(inlay)
+        # inlays, a pool of one item per visible fret
+        self.inlays = []
 
-        self.updateFretStart()
+        # chord/scale overlay, above the inlays and below the notes
+        self.overlay_item = FretboardOverlayItem()
+        self.overlay_item.setZValue(-0.5)
+        self.scene().addItem(self.overlay_item)
+
+        # every note and barre, see FretboardNotesItem
+        self.notes_item = FretboardNotesItem(
+            self.num_frets,
+            self.num_strings,
+            self.FRETWIDTH,
+            self.FRETHEIGHT,
+            QPointF(0, self.y_offset),
+            self.NOTEDIAMETER
+        )
+        self.scene().addItem(self.notes_item)
+        self.updateNotes()
 
         # string buttons
         self.string_button_items = [
@@ -244,14 +276,93 @@ class FretboardView(QtWidgets.QGraphicsView):
         for str_btn in self.string_button_items:
             self.scene().addItem(str_btn)
 
+        self.updateWindow()
+        self.updateOverlay()
+
         # connect note press signal to slot
         self.scene().barre_pressed.connect(self.onBarrePressed)
         self.scene().existing_note_pressed.connect(self.onExistingNotePressed)
         self.scene().new_note_pressed.connect(self.onNewNotePressed)
 
+    def setFirstFret(self, fret: int) -> None:
+        fret = max(0, min(fret, self.num_frets - self.visible_frets))
+        if fret != self.first_fret:
+            self.first_fret = fret
+            self.updateWindow()
+
+    def setVisibleFrets(self, num_frets: int) -> None:
+        num_frets = max(1, min(num_frets, self.num_frets))
+        if num_frets != self.visible_frets:
+            self.visible_frets = num_frets
+            self.first_fret = min(self.first_fret, self.num_frets - num_frets)
+            self.updateWindow()
+
+    def updateWindow(self) -> None:
+        """
+        Moves the fixed items (tuning, string buttons, fret label) along with the
+        visible window and hands the pooled inlays over to the frets in it.
+        Notes and barres keep their neck coordinates, they are bounded by the
+        number of strings and are simply clipped by the scene rectangle.
+        """
+        top = self.first_fret * self.FRETHEIGHT
+        for i, ti in enumerate(self.tuning_items):
+            ti.setPos(i * self.FRETWIDTH - ti.boundingRect().width() / 2., top)
+        self.fretboard.setWindow(self.first_fret, self.visible_frets,
+                                 QPointF(0, top + self.y_offset))
+        self.fret_text_item.setPos(-20, top + self.y_offset - 10)
+        self.fret_text_dummy_item.setPos(self.FRETWIDTH * (self.num_strings - 1), top + self.y_offset - 10)
+        for str_btn in self.string_button_items:
+            str_btn.setPos(0, top - self.FRETHEIGHT * (self.num_frets - self.visible_frets))
+
+        while len(self.inlays) < self.visible_frets:
+            inlay = FretboardInlayItem(
+                0., 0., (self.num_strings - 1) * self.FRETWIDTH, self.FRETHEIGHT, 0, self.num_strings)
+            inlay.setZValue(-1)
+            self.scene().addItem(inlay)
+            self.inlays.append(inlay)
+        for i, inlay in enumerate(self.inlays):
+            fret = self.first_fret + i + 1
+            inlay.setVisible(i < self.visible_frets)
+            if i < self.visible_frets and inlay.fret != fret:
+                inlay.setFret(fret, (fret - 1) * self.FRETHEIGHT + self.y_offset)
+
+        self.updateFretStart()
+        rect = self.fretboard.sceneBoundingRect()
+        for item in self.tuning_items + self.string_button_items + [self.fret_text_item, self.fret_text_dummy_item]:
+            rect = rect.united(item.sceneBoundingRect())
+        self.scene().setSceneRect(rect)
+        self.fitInView(rect, QtCore.Qt.KeepAspectRatio)
+
     def setCapo(self, fret: int) -> None:
         self.fret_start = fret
         self.updateFretStart()
+        self.updateOverlay()
+
+    def setOverlay(self, chord_mask: int = 0, scale_mask: int = 0, root: int = -1) -> None:
+        """
+        Highlights every fretted position of the root, the chord tones and the
+        scale tones (pitch-class masks, bit 0 is C) along the whole neck.
+        """
+        self.overlay = (chord_mask, scale_mask, root)
+        self.updateOverlay()
+
+    def clearOverlay(self) -> None:
+        self.overlay = None
+        self.updateOverlay()
+
+    def updateOverlay(self) -> None:
+        if self.overlay is None:
+            self.overlay_item.setVisible(False)
+            return
+        frets, strings, kinds = neck_positions(open_pitch_classes(self.tuning), self.num_frets,
+                                               *self.overlay, capo=self.fret_start)
+        # open strings have no position on the neck
+        fretted = frets > 0
+        xs = strings[fretted] * self.FRETWIDTH
+        ys = frets[fretted] * self.FRETHEIGHT - self.FRETHEIGHT / 2 + self.y_offset
+        self.overlay_item.setPositions(list(zip(xs.tolist(), ys.tolist(), kinds[fretted].tolist())),
+                                       self.NOTEDIAMETER)
+        self.overlay_item.setVisible(True)
 
     def setTuning(self, tuning_array: list[str]) -> None:
         self.tuning = tuning_array
@@ -266,9 +377,69 @@ class FretboardView(QtWidgets.QGraphicsView):
         self.moving_barre_string_coord = None
         self.moving_barre_fret = None
         self.initGui()
+        self.state = FretboardState.empty(self.num_strings)
+        self.updateActiveStringsAndNotes()
+        if len(self.history.current.notes) == self.num_strings:
+            self.commitState()
+        else:
+            # states of another instrument can not be restored
+            self.history.reset(self.state)
+
+    def clearNotes(self) -> None:
+        # removes notes and barres only, keeping the rest of the scene
+        self.note_items = {}
+        self.barre_items = {}
+        self.state = FretboardState.empty(self.num_strings)
+        self.updateActiveStringsAndNotes()
+
+    def setVoicing(self, voicing: tuple[int, ...], barres: list[tuple[int, tuple[int, int]]] = []) -> None:
+        self.clearNotes()
+        for fret, string_coord in barres:
+            self.addBarre(fret, string_coord)
+        for string, fret in enumerate(voicing):
+            if fret != MUTED:
+                self.addSingleNote((fret, string))
+        self.commitState()
+
+    def commitState(self) -> None:
+        if not self.restoring:
+            self.history.push(self.state)
+
+    def undo(self) -> None:
+        state = self.history.undo()
+        if state is not None:
+            self.restoreState(state)
+
+    def redo(self) -> None:
+        state = self.history.redo()
+        if state is not None:
+            self.restoreState(state)
+
+    def restoreState(self, state: FretboardState) -> None:
+        # only the notes and barres that differ are removed or created
+        notes, removed, added = self.state.diff(state)
+        self.restoring = True
+        for fret, string_coord in removed:
+            self.removeBarreItem(fret, string_coord)
+        for string, _ in notes:
+            current = self.state.notes[string]
+            if current != MUTED:
+                self.removeSingleNote((current, string))
+        for fret, string_coord in added:
+            self.addBarre(fret, string_coord)
+        for string, fret in notes:
+            if fret != MUTED:
+                self.addSingleNote((fret, string))
+        self.restoring = False
+        # keep the history's instance, so that it stays shared
+        self.state = state
         self.updateActiveStringsAndNotes()
 
     def updateActiveStringsAndNotes(self) -> None:
+        if self.restoring:
+            # updated once the whole state is restored
+            return
+        self.updateNotes()
         active_strings = set()
         active_notes = {}
 
@@ -303,12 +474,17 @@ class FretboardView(QtWidgets.QGraphicsView):
             self.scene().notes_changed.emit(active_notes)
             self.active = active_notes
 
+        root_string = min(active_strings) if active_strings else None
         for i, sbi in enumerate(self.string_button_items):
-            sbi.is_active = i in active_strings
-            sbi.is_root = False
+            is_active = i in active_strings
+            is_root = i == root_string
+            if sbi.is_active != is_active or sbi.is_root != is_root:
+                sbi.is_active = is_active
+                sbi.is_root = is_root
+                sbi.update()
 
-        if len(active_strings) > 0:
-            self.string_button_items[list(active_strings)[0]].is_root = True
+    def voicing(self) -> tuple[int, ...]:
+        return voicing_from_active_notes(self.active, self.num_strings)
 
     def setOpenTop(self, enable: bool) -> None:
         self.open_top = enable
@@ -316,7 +492,8 @@ class FretboardView(QtWidgets.QGraphicsView):
 
     def setOpenBottom(self, enable: bool) -> None:
         self.open_bottom = enable
-        self.fretboard.open_bottom = enable
+        self.fretboard.open_bottom = enable or \
+            self.first_fret + self.visible_frets < self.num_frets
 
     def addSingleNote(self, note_coords: tuple[int, int]) -> None:
         # check if it doesn't exist already
@@ -328,45 +505,35 @@ class FretboardView(QtWidgets.QGraphicsView):
                     for sleft, sright in self.barre_items[fret]:
                         if string >= sleft and string <= sright:
                             return
-                # create circle for the note and add to dictionary
-                x = string * self.FRETWIDTH - self.NOTEDIAMETER / 2
-                y = fret * self.FRETHEIGHT - self.FRETHEIGHT / 2 - self.NOTEDIAMETER / 2
-                note = FretboardNoteItem(
-                    fret,
-                    string,
-                    x,
-                    y + self.y_offset,
-                    self.NOTEDIAMETER,
-                    self.NOTEDIAMETER
-                )
                 # overwrites previous note onthe same string, if any
                 for f, s in self.note_items:
                     if s == string:
                         self.removeSingleNote((f, string))
                         break
-                note.setBrush(QBrush(note.pen().color()))
-                self.scene().addItem(note)
-                self.note_items[(fret, string)] = note
+                # circle of the note
+                x = string * self.FRETWIDTH - self.NOTEDIAMETER / 2
+                y = fret * self.FRETHEIGHT - self.FRETHEIGHT / 2 - self.NOTEDIAMETER / 2
+                self.note_items[(fret, string)] = QRectF(
+                    x, y + self.y_offset, self.NOTEDIAMETER, self.NOTEDIAMETER)
             else:
-                # adds a dummy value to the dict for tracking
+                # open strings are not painted, only tracked
                 self.note_items[(fret, string)] = None
+            self.state = self.state.with_note(string, fret)
             self.updateActiveStringsAndNotes()
 
     def removeSingleNote(self, note_coords: tuple[int, int]) -> None:
         fret, string = note_coords
         if (fret, string) in self.note_items:
-            if fret > 0:
-                # open strings are not added to the scene
-                self.scene().removeItem(self.note_items[(fret, string)])
             del self.note_items[(fret, string)]
+            self.state = self.state.with_note(string, MUTED)
             self.updateActiveStringsAndNotes()
 
-    def addBarreItem(self, fret: int, string_coord: tuple[int, int], item: FretboardBarreItem) -> None:
+    def addBarreItem(self, fret: int, string_coord: tuple[int, int], rect: QRectF) -> None:
         # make sure the string coordinates are sorted from left to right
         string_coord = tuple(sorted(string_coord))
         if fret not in self.barre_items:
             # first barre in fret, add it
-            self.barre_items[fret] = {string_coord: item}
+            self.barre_items[fret] = {string_coord: rect}
         else:
             # check if there are overlapping barres on the same fret and keep track of
             # them for later deletion
@@ -390,25 +557,29 @@ class FretboardView(QtWidgets.QGraphicsView):
             if len(coords_to_delete) > 0:
                 for coord in coords_to_delete:
                     self.removeBarreItem(fret, coord)
-
-                self.scene().removeItem(item)
-
-                (x, y, w, h) = self.calculateBarreRect(fret, string_coord)
-                item_to_add = FretboardBarreItem(
-                    fret, string_coord, x, y + self.y_offset, w, h
-                )
-                self.barre_items[fret][string_coord] = item_to_add
-                self.scene().addItem(item_to_add)
+                self.barre_items[fret][string_coord] = self.barreRect(fret, string_coord)
             else:
-                self.barre_items[fret][string_coord] = item
+                self.barre_items[fret][string_coord] = rect
+        self.state = self.state.with_barre(fret, string_coord)
         self.updateActiveStringsAndNotes()
 
+    def addBarre(self, fret: int, string_coord: tuple[int, int]) -> None:
+        self.addBarreItem(fret, string_coord, self.barreRect(fret, string_coord))
+
     def removeBarreItem(self, fret: int, string_coords: tuple[int, int]) -> None:
         if fret in self.barre_items and string_coords in self.barre_items[fret]:
-            self.scene().removeItem(self.barre_items[fret][string_coords])
             del self.barre_items[fret][string_coords]
+            self.state = self.state.without_barre(fret, string_coords)
             self.updateActiveStringsAndNotes()
 
+    def barreRect(self, fret: int, string_coords: tuple[int, int]) -> QRectF:
+        (x, y, w, h) = self.calculateBarreRect(fret, string_coords)
+        return QRectF(x, y + self.y_offset, w, h)
+
+    def updateNotes(self) -> None:
+        # repaints the notes and barres, the scene items stay as they are
+        self.notes_item.setNotes(self.note_items, self.barre_items, self.moving_barre_item)
+
     def calculateBarreRect(self, fret: int, string_coords: tuple[int, int]):
         x0, x1 = sorted(string_coords)
         x = x0 * self.FRETWIDTH
@@ -418,11 +589,15 @@ class FretboardView(QtWidgets.QGraphicsView):
         return (x, y, w, self.BARRE_THICKNESS)
 
     def updateFretStart(self) -> None:
-        self.setOpenTop(self.fret_start > 0)
-        self.fret_text_item.setVisible(self.fret_start > 0)
-        self.nutmeg_item.setVisible(self.fret_start == 0)
-        fret_digit_last = (self.fret_start % 10)
-        fret_digit_before_last = (self.fret_start // 10) % 10
+        # the label shows the fret above the visible window
+        fret_top = self.fret_start + self.first_fret
+        self.setOpenTop(fret_top > 0)
+        self.fretboard.open_bottom = self.open_bottom or \
+            self.first_fret + self.visible_frets < self.num_frets
+        self.fret_text_item.setVisible(fret_top > 0)
+        self.nutmeg_item.setVisible(fret_top == 0)
+        fret_digit_last = (fret_top % 10)
+        fret_digit_before_last = (fret_top // 10) % 10
 
         if fret_digit_before_last == 1:
             superscript = "th"
@@ -435,7 +610,7 @@ class FretboardView(QtWidgets.QGraphicsView):
                 superscript = "rd"
             else:
                 superscript = "th"
-        html = "{}<sup>{}</sup>".format(self.fret_start, superscript)
+        html = "{}<sup>{}</sup>".format(fret_top, superscript)
         self.fret_text_item.setHtml(html)
         self.fret_text_dummy_item.setHtml(html)
 
@@ -0,0 +1,79 @@
+import numpy as np
+from note import Note
+
+
+class Key():
+    # Krumhansl-Kessler probe tone profiles, indexed by distance to the tonic
+    MAJOR_PROFILE = [6.35, 2.23, 3.48, 2.33, 4.38, 4.09,
+                     2.52, 5.19, 2.39, 3.66, 2.29, 2.88]
+    MINOR_PROFILE = [6.33, 2.68, 3.52, 5.38, 2.60, 3.53,
+                     2.54, 4.75, 3.98, 2.69, 3.34, 3.17]
+
+    # tonics that are conventionally spelled with flats
+    FLAT_TONICS = {
+        "major": {1, 3, 5, 8, 10},
+        "minor": {0, 2, 3, 5, 7, 10},
+    }
+
+    def __init__(self, tonic: int, mode: str = "major") -> None:
+        self.tonic = tonic % 12
+        self.mode = mode
+        if self.tonic in self.FLAT_TONICS[mode]:
+            self.pitch = Note.PITCHES_FLAT[self.tonic]
+        else:
+            self.pitch = Note.PITCHES_SHARP[self.tonic]
+
+    def __eq__(self, __o: "Key") -> bool:
+        return isinstance(__o, Key) and self.tonic == __o.tonic and self.mode == __o.mode
+
+    def __hash__(self) -> int:
+        return hash((self.tonic, self.mode))
+
+    def __str__(self) -> str:
+        return f"{self.pitch} {self.mode}"
+
+    @property
+    def index(self) -> int:
+        # position of this key in KEYS and in the rows of the profile matrix
+        return self.tonic + (12 if self.mode == "minor" else 0)
+
+    @property
+    def name_short(self) -> str:
+        return self.pitch + ("m" if self.mode == "minor" else "")
+
+
+KEYS = [Key(tonic, "major") for tonic in range(12)] + \
+    [Key(tonic, "minor") for tonic in range(12)]
+
+
+def _profile_matrix() -> np.ndarray:
+    rows = [np.roll(Key.MAJOR_PROFILE, tonic) for tonic in range(12)] + \
+        [np.roll(Key.MINOR_PROFILE, tonic) for tonic in range(12)]
+    matrix = np.array(rows, dtype=np.float64)
+    # centre and normalise each profile so that a dot product against an equally
+    # prepared histogram is the Pearson correlation
+    matrix -= matrix.mean(axis=1, keepdims=True)
+    matrix /= np.linalg.norm(matrix, axis=1, keepdims=True)
+    return matrix
+
+
+# (24 x 12) matrix, rows ordered as KEYS
+KEY_PROFILES = _profile_matrix()
+
+
+def pitch_class(note: Note) -> int:
+    return note.check_pitch_ind(note.pitch)
+
+
+def key_correlations(histograms: np.ndarray) -> np.ndarray:
+    """
+    Correlate pitch-class histograms against all 24 key profiles at once.
+    Accepts a single (12,) histogram or a (N x 12) matrix and returns the
+    correlations with shape (24,) or (N x 24) respectively.
+    """
+    hist = np.asarray(histograms, dtype=np.float64)
+    centered = hist - hist.mean(axis=-1, keepdims=True)
+    norm = np.linalg.norm(centered, axis=-1, keepdims=True)
+    # flat (or empty) histograms correlate with nothing
+    norm[norm == 0] = 1.
+    return (centered / norm) @ KEY_PROFILES.T
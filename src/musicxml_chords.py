@@ -0,0 +1,260 @@
+import os
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from typing import IO, Iterable, Iterator
+from xml.etree.ElementTree import iterparse
+
+from chord import Chord
+from note import Note
+from shared_tables import attach_naming_tables, publish_naming_tables
+
+STEPS = {"C": 0, "D": 2, "E": 4, "F": 5, "G": 7, "A": 9, "B": 11}
+
+# MusicXML harmony kinds as chord_templates.json symbols; kinds without a
+# template are written out but not checked
+HARMONY_KINDS = {
+    "major": "", "minor": "m", "augmented": "aug", "diminished": "dim",
+    "dominant": "7", "major-seventh": "maj7", "minor-seventh": "m7",
+    "diminished-seventh": "dim7", "augmented-seventh": "7#5", "half-diminished": "m7b5",
+    "major-minor": "mmaj7", "major-sixth": "6", "minor-sixth": "m6",
+    "dominant-ninth": "9", "major-ninth": "maj9", "minor-ninth": "m9",
+    "dominant-11th": "11", "minor-11th": "m11", "dominant-13th": "13",
+    "major-13th": "maj13", "minor-13th": "m13", "suspended-second": "sus2",
+    "suspended-fourth": "sus4", "power": "5",
+}
+
+
+class MeasureChords():
+    def __init__(self, number: str, chords: list[tuple[int, str]]) -> None:
+        self.number = number
+        # (beat, name), from beat 1, a new entry whenever the name changes
+        self.chords = chords
+
+    def __str__(self) -> str:
+        return f"{self.number}: " + " ".join(f"{name}@{beat}" for beat, name in self.chords)
+
+
+class HarmonyCheck():
+    def __init__(self, measure: str, beat: int, written: str, computed: str, agrees: bool | None) -> None:
+        self.measure = measure
+        self.beat = beat
+        self.written = written
+        self.computed = computed
+        # None when the written kind has no template to compare with
+        self.agrees = agrees
+
+    def __str__(self) -> str:
+        status = {True: "ok", False: "differs", None: "unchecked"}[self.agrees]
+        return f"{self.measure}:{self.beat} {self.written} / {self.computed} {status}"
+
+
+class ScoreAnalysis():
+    def __init__(self, measures: list[MeasureChords], harmonies: list[HarmonyCheck]) -> None:
+        self.measures = measures
+        self.harmonies = harmonies
+
+    def mismatches(self) -> list[HarmonyCheck]:
+        return [check for check in self.harmonies if check.agrees is False]
+
+
+def open_score(path: str, archive: zipfile.ZipFile | None = None) -> IO[bytes]:
+    """
+    The score XML as a binary stream. In compressed .mxl files, the score is
+    the rootfile listed in META-INF/container.xml.
+    """
+    if archive is None:
+        return open(path, "rb")
+    name = None
+    if "META-INF/container.xml" in archive.namelist():
+        for _, elem in iterparse(archive.open("META-INF/container.xml")):
+            if elem.tag.endswith("rootfile"):
+                name = elem.get("full-path")
+                break
+    if name is None:
+        name = next(n for n in archive.namelist() if not n.startswith("META-INF") and n.endswith("xml"))
+    return archive.open(name)
+
+
+def pitch_value(pitch) -> int:
+    # MIDI number of a <pitch> element
+    alter = round(float(pitch.findtext("alter", "0")))
+    return (int(pitch.findtext("octave")) + 1) * 12 + STEPS[pitch.findtext("step").strip()] + alter
+
+
+def step_name(step: str, alter: str | None) -> tuple[str, int]:
+    # (spelling, pitch class) of a step and its alteration
+    alter = round(float(alter or 0))
+    return step + ("#" * alter if alter > 0 else "b" * -alter), (STEPS[step] + alter) % 12
+
+
+class MusicXMLAnalyzer():
+    """
+    Names the simultaneous pitches of partwise MusicXML scores, per beat or
+    per measure. The score is read with iterparse and every measure is
+    dropped from the tree once read, so that memory stays flat whatever the
+    length of the score; per time slot, only the pitch-class mask and the
+    lowest pitch are kept, over all the parts. Notes sound in every slot
+    they overlap, and slots with fewer than min_pitch_classes stay unnamed.
+    """
+
+    def __init__(self, per: str = "beat", min_pitch_classes: int = 2) -> None:
+        if per not in ("beat", "measure"):
+            raise ValueError(f"Can only analyse per beat or measure, not {per}")
+        self.per = per
+        self.min_pitch_classes = min_pitch_classes
+        # (mask, bass pitch class) -> (name, root pitch class, template symbol)
+        self.names = {}
+
+    def events(self, source: IO[bytes]) -> Iterator[tuple]:
+        """
+        ("measure", index, number), ("note", index, slots, pitch) and
+        ("harmony", index, slot, written, root, symbol) events, measures being
+        counted from 0 within every part.
+        """
+        divisions, beats, beat_type = 1, 4, 4
+        part, index, position, last_start = None, -1, 0, 0
+        for event, elem in iterparse(source, events=("start", "end")):
+            tag = elem.tag
+            if event == "start":
+                if tag == "part":
+                    part, index = elem, -1
+                elif tag == "measure" and part is not None:
+                    index += 1
+                    position = last_start = 0
+                    yield "measure", index, elem.get("number", str(index + 1))
+                continue
+
+            if tag == "divisions":
+                divisions = max(1, round(float(elem.text)))
+            elif tag == "time" and elem.find("beats") is not None:
+                # composite meters, e.g. 3+2
+                beats = sum(int(b) for b in elem.findtext("beats").split("+"))
+                beat_type = int(elem.findtext("beat-type"))
+            elif tag == "backup":
+                position -= round(float(elem.findtext("duration")))
+            elif tag == "forward":
+                position += round(float(elem.findtext("duration")))
+            elif tag == "note":
+                if elem.find("grace") is not None or elem.find("cue") is not None:
+                    continue
+                duration = round(float(elem.findtext("duration", "0")))
+                start = last_start if elem.find("chord") is not None else position
+                last_start, position = start, start + duration
+                pitch = elem.find("pitch")
+                if pitch is not None:
+                    slots = self.slots(start, start + duration, divisions, beats, beat_type)
+                    yield "note", index, slots, pitch_value(pitch)
+            elif tag == "harmony":
+                root = elem.find("root")
+                if root is not None:
+                    offset = round(float(elem.findtext("offset", "0")))
+                    slot = self.slots(position + offset, position + offset, divisions, beats, beat_type)[0]
+                    kind = elem.findtext("kind", "major").strip()
+                    symbol = HARMONY_KINDS.get(kind)
+                    written, root_pc = step_name(root.findtext("root-step").strip(), root.findtext("root-alter"))
+                    written += symbol if symbol is not None else elem.find("kind").get("text", kind)
+                    bass = elem.find("bass")
+                    if bass is not None:
+                        written += "/" + step_name(bass.findtext("bass-step").strip(), bass.findtext("bass-alter"))[0]
+                    yield "harmony", index, slot, written, root_pc, symbol
+            elif tag == "measure" and part is not None:
+                # everything in the measure has been read
+                part.clear()
+
+    def slots(self, start: int, end: int, divisions: int, beats: int, beat_type: int) -> range:
+        if self.per == "measure":
+            return range(1)
+        beat = divisions * 4 / beat_type
+        first = max(0, min(beats - 1, int(start // beat)))
+        last = max(first, min(beats - 1, int(-(-end // beat)) - 1))
+        return range(first, last + 1)
+
+    def name(self, mask: int, bass: int) -> tuple[str, int, str | None]:
+        key = (mask, bass)
+        if key not in self.names:
+            notes = set(Note(f"{Note.PITCHES_SHARP[pc]}4") for pc in range(12) if mask & (1 << pc) and pc != bass)
+            notes.add(Note(f"{Note.PITCHES_SHARP[bass]}3"))
+            chord = Chord(notes)
+            top = chord.variants[0]
+            template = getattr(top, "template", None)
+            self.names[key] = (str(chord), Note.PITCH_INDEX[top.root.pitch],
+                               template.symbol if template is not None else None)
+        return self.names[key]
+
+    def analyse_stream(self, source: IO[bytes]) -> ScoreAnalysis:
+        numbers = []
+        # per measure, {slot: [mask, lowest pitch]}
+        slots = []
+        harmonies = []
+        for event in self.events(source):
+            kind, index = event[0], event[1]
+            if kind == "measure":
+                if index == len(numbers):
+                    numbers.append(event[2])
+                    slots.append({})
+            elif kind == "note":
+                pitch = event[3]
+                for slot in event[2]:
+                    current = slots[index].setdefault(slot, [0, pitch])
+                    current[0] |= 1 << (pitch % 12)
+                    current[1] = min(current[1], pitch)
+            else:
+                harmonies.append(event[1:])
+
+        measures = []
+        computed = {}
+        for index, number in enumerate(numbers):
+            chords = []
+            for slot in sorted(slots[index]):
+                mask, lowest = slots[index][slot]
+                if bin(mask).count("1") >= self.min_pitch_classes:
+                    computed[(index, slot)] = self.name(mask, lowest % 12)
+                    name = computed[(index, slot)][0]
+                    if not chords or chords[-1][1] != name:
+                        chords.append((slot + 1, name))
+            measures.append(MeasureChords(number, chords))
+
+        checks = []
+        for index, slot, written, root, symbol in harmonies:
+            name, computed_root, computed_symbol = computed.get((index, slot), ("", -1, None))
+            agrees = None if symbol is None else (root == computed_root and symbol == computed_symbol)
+            checks.append(HarmonyCheck(numbers[index], slot + 1, written, name, agrees))
+        return ScoreAnalysis(measures, checks)
+
+    def analyse(self, path: str) -> ScoreAnalysis:
+        if os.path.splitext(path)[1].lower() == ".mxl":
+            with zipfile.ZipFile(path) as archive, open_score(path, archive) as source:
+                return self.analyse_stream(source)
+        with open_score(path) as source:
+            return self.analyse_stream(source)
+
+
+def analyse_files(paths: Iterable[str], processes: int = 1, analyzer: MusicXMLAnalyzer | None = None,
+                  chunk_size: int = 8) -> Iterator[tuple[str, ScoreAnalysis]]:
+    # (path, analysis) of every score, in order, yielded as they are done
+    if analyzer is None:
+        analyzer = MusicXMLAnalyzer()
+    if processes == 1:
+        for path in paths:
+            yield path, analyzer.analyse(path)
+        return
+    paths = list(paths)
+    with ProcessPoolExecutor(max_workers=processes, initializer=attach_naming_tables,
+                             initargs=(publish_naming_tables(),)) as executor:
+        yield from zip(paths, executor.map(analyzer.analyse, paths, chunksize=chunk_size))
+
+
+if __name__ == '__main__':
+    import argparse
+    parser = argparse.ArgumentParser(description="Name the chords of MusicXML (.musicxml, .xml, .mxl) scores")
+    parser.add_argument("paths", nargs="+")
+    parser.add_argument("--per", choices=["beat", "measure"], default="beat")
+    parser.add_argument("--processes", type=int, default=None)
+    args = parser.parse_args()
+
+    for path, analysis in analyse_files(args.paths, args.processes, MusicXMLAnalyzer(args.per)):
+        print(path)
+        for measure in analysis.measures:
+            print(f"  {measure}")
+        for check in analysis.mismatches():
+            print(f"  harmony {check}")
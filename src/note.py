@@ -1,9 +1,15 @@
+import sys
+
 
 class Note():
+    __slots__ = ("pitch", "octave", "letter", "accident")
+
     PITCHES_SHARP = ["C", "C#", "D", "D#", "E",
                      "F", "F#", "G", "G#", "A", "A#", "B"]
     PITCHES_FLAT = ["C", "Db", "D", "Eb", "E",
                     "F", "Gb", "G", "Ab", "A", "Bb", "B"]
+    # pitch class of every spelling above
+    PITCH_INDEX = {pitch: i for pitches in [PITCHES_SHARP, PITCHES_FLAT] for i, pitch in enumerate(pitches)}
 
     def __init__(self, note: str) -> None:
         self.pitch = ""
@@ -25,7 +31,7 @@ class Note():
             elif len(self.check_pitch(letter)) > 0:
                 octave = self.check_octave(note[1:])
                 if octave >= 0:
-                    self.pitch = letter
+                    self.pitch = sys.intern(letter)
                     self.octave = octave
         elif len(note) == 2:
             letter = note[0].upper()
@@ -92,23 +98,19 @@ class Note():
             return Note(f"{self.PITCHES_SHARP[pitch_ind]}")
 
     def assign_pitch(self, letter: str, accident: str = ""):
-        self.letter = letter
-        self.accident = accident
-        self.pitch = letter + accident
+        # interned, so that millions of notes share a handful of strings
+        self.letter = sys.intern(letter)
+        self.accident = sys.intern(accident)
+        self.pitch = sys.intern(letter + accident)
 
     def check_pitch(self, pitch: str):
-        if pitch in self.PITCHES_FLAT or pitch in self.PITCHES_SHARP:
+        if pitch in self.PITCH_INDEX:
             return pitch
         else:
             return ""
 
     def check_pitch_ind(self, pitch: str):
-        if pitch in self.PITCHES_FLAT:
-            return self.PITCHES_FLAT.index(pitch)
-        elif pitch in self.PITCHES_SHARP:
-            return self.PITCHES_SHARP.index(pitch)
-        else:
-            return -1
+        return self.PITCH_INDEX.get(pitch, -1)
 
     def check_octave(self, octave_str: str):
         retval = -1
@@ -1,23 +1,67 @@
+import os
+from typing import Iterable
+
 from PyQt5 import QtCore, QtGui, QtWidgets, QtSvg
 
+from note import Note
+
 # credits to @eyllanesc from whom this was inspired
 
+# MIDI range of a full piano, A0 to C8
+PIANO_LOWEST, PIANO_KEYS = 21, 88
+
+# index of every pitch class among the white keys of its octave, black keys
+# take the one of the white key on their left
+WHITE_INDEX = [0, 0, 1, 1, 2, 3, 3, 4, 4, 5, 5, 6]
+BLACK_PITCH_CLASSES = {1, 3, 6, 8, 10}
+
+BLACKKEY_OVERLAY = os.path.join(os.path.dirname(os.path.abspath(__file__)), "blackkey_overlay.svg")
+
+
+def white_index(midi: int) -> int:
+    octave, pc = divmod(midi, 12)
+    return octave * 7 + WHITE_INDEX[pc]
+
+
+def midi_note(midi: int) -> Note:
+    # MIDI 60 is C4
+    return Note(f"{Note.PITCHES_SHARP[midi % 12]}{midi // 12 - 1}")
+
+
+class PianoScene(QtWidgets.QGraphicsScene):
+    key_pressed = QtCore.pyqtSignal(int)
+    key_released = QtCore.pyqtSignal(int)
+
+
 class PianoKey(QtWidgets.QGraphicsRectItem):
-    def __init__(self, black=False, rect=QtCore.QRectF(), parent=None):
+    # one renderer for all the black keys
+    blackkey_renderer = None
+
+    def __init__(self, black=False, rect=QtCore.QRectF(), parent=None, midi=-1):
         super(PianoKey, self).__init__(rect, parent)
+        self.midi = midi
         self.m_pressed = False
         self.m_selectedBrush = QtGui.QBrush()
         self.m_brush = QtGui.QBrush(
             QtCore.Qt.black) if black else QtGui.QBrush(QtCore.Qt.white)
         self.m_black = black
-        self.m_blackkey_renderer = QtSvg.QSvgRenderer("blackkey_overlay.svg")
+        if PianoKey.blackkey_renderer is None:
+            PianoKey.blackkey_renderer = QtSvg.QSvgRenderer(BLACKKEY_OVERLAY)
         self.m_black_pen = QtGui.QPen(QtCore.Qt.black, 1)
         self.m_gray_pen = QtGui.QPen(QtGui.QBrush(QtCore.Qt.gray), 1,
                                      QtCore.Qt.SolidLine, QtCore.Qt.RoundCap, QtCore.Qt.RoundJoin)
+        # keys are redrawn from a pixmap unless their own state changes
+        self.setCacheMode(QtWidgets.QGraphicsItem.DeviceCoordinateCache)
 
     def setPressedBrush(self, brush):
         self.m_selectedBrush = brush
 
+    def setPressed(self, pressed: bool) -> None:
+        # invalidates this key's rectangle only
+        if pressed != self.m_pressed:
+            self.m_pressed = pressed
+            self.update()
+
     def paint(self, painter, option, widget):
         if self.m_pressed:
             if self.m_selectedBrush.style() != QtCore.Qt.NoBrush:
@@ -29,7 +73,7 @@ class PianoKey(QtWidgets.QGraphicsRectItem):
         painter.setPen(self.m_black_pen)
         painter.drawRoundedRect(self.rect(), 15, 15, QtCore.Qt.RelativeSize)
         if self.m_black:
-            self.m_blackkey_renderer.render(painter, self.rect())
+            self.blackkey_renderer.render(painter, self.rect())
         else:
             points = [
                 QtCore.QPointF(self.rect().left()+1.5, self.rect().bottom()-1),
@@ -40,45 +84,72 @@ class PianoKey(QtWidgets.QGraphicsRectItem):
             painter.drawPolyline(QtGui.QPolygonF(points))
 
     def mousePressEvent(self, event):
-        self.m_pressed = True
-        self.update()
+        self.scene().key_pressed.emit(self.midi)
         super(PianoKey, self).mousePressEvent(event)
         event.accept()
 
     def mouseReleaseEvent(self, event):
-        self.m_pressed = False
-        self.update()
+        self.scene().key_released.emit(self.midi)
         super(PianoKey, self).mouseReleaseEvent(event)
 
 
 class PianoKeyBoard(QtWidgets.QGraphicsView):
+    """
+    Keys from MIDI note lowest on, num_octaves octaves of them unless
+    num_keys is given (PIANO_LOWEST and PIANO_KEYS make a full piano).
+
+    Pressed notes come from the mouse or from setPressed/press/release, e.g.
+    driven by MIDI input. Changes are collected and applied once per frame:
+    only the keys whose state differs from what is shown are repainted, and
+    notes_changed is emitted once with the sounding notes as a set of Notes,
+    ready for Chord.
+    """
     KEYWIDTH, KEYHEIGHT = 18, 100
+    # milliseconds between two flushes of the pressed state
+    FRAME_INTERVAL = 16
 
-    def __init__(self, num_octaves=2,  parent=None):
+    notes_changed = QtCore.pyqtSignal(set)
+
+    def __init__(self, num_octaves=2,  parent=None, lowest: int = 48, num_keys: int | None = None):
         super(PianoKeyBoard, self).__init__(parent)
         self.initialize()
         self.m_numOctaves = num_octaves
-        scene = QtWidgets.QGraphicsScene(QtCore.QRectF(
-            0, 0, self.KEYWIDTH * self.m_numOctaves * 7, self.KEYHEIGHT), self)
+        self.m_lowest = lowest
+        self.m_numKeys = num_keys if num_keys is not None else num_octaves * 12
+        highest = lowest + self.m_numKeys - 1
+        origin = white_index(lowest)
+        width = (white_index(highest) - origin + 1) * self.KEYWIDTH
+        if highest % 12 in BLACK_PITCH_CLASSES:
+            width += self.KEYWIDTH
+        scene = PianoScene(QtCore.QRectF(0, 0, width, self.KEYHEIGHT), self)
         self.setScene(scene)
-        numkeys = self.m_numOctaves * 12
-
-        for i in range(numkeys):
-            octave = i//12*7
-            j = i % 12
-            if j >= 5:
-                j += 1
-            if j % 2 == 0:
-                x = (octave + j/2)*self.KEYWIDTH
+        scene.key_pressed.connect(self.press)
+        scene.key_released.connect(self.release)
+
+        # key item of every MIDI note, None outside the keyboard
+        self.m_keys = [None] * 128
+        # pressed notes as requested, and as currently shown
+        self.m_pending = set()
+        self.m_shown = set()
+        self.m_timer = QtCore.QTimer(self)
+        self.m_timer.setSingleShot(True)
+        self.m_timer.setInterval(self.FRAME_INTERVAL)
+        self.m_timer.timeout.connect(self.flush)
+
+        highlight = QtWidgets.QApplication.palette().highlight()
+        for midi in range(lowest, highest + 1):
+            x = (white_index(midi) - origin) * self.KEYWIDTH
+            if midi % 12 not in BLACK_PITCH_CLASSES:
                 key = PianoKey(rect=QtCore.QRectF(
-                    x, 0, self.KEYWIDTH, self.KEYHEIGHT), black=False)
+                    x, 0, self.KEYWIDTH, self.KEYHEIGHT), black=False, midi=midi)
             else:
-                x = (octave + j//2) * self.KEYWIDTH + self.KEYWIDTH * 6//10 + 1
+                x += self.KEYWIDTH * 6//10 + 1
                 key = PianoKey(rect=QtCore.QRectF(
-                    x, 0, self.KEYWIDTH * 8//10 - 1, self.KEYHEIGHT * 6//10), black=True)
+                    x, 0, self.KEYWIDTH * 8//10 - 1, self.KEYHEIGHT * 6//10), black=True, midi=midi)
                 key.setZValue(1)
-            key.setPressedBrush(QtWidgets.QApplication.palette().highlight())
+            key.setPressedBrush(highlight)
             self.scene().addItem(key)
+            self.m_keys[midi] = key
 
     def initialize(self):
         self.setAttribute(QtCore.Qt.WA_InputMethodEnabled, False)
@@ -97,6 +168,44 @@ class PianoKeyBoard(QtWidgets.QGraphicsView):
             QtWidgets.QGraphicsView.DontAdjustForAntialiasing, True)
         self.setBackgroundBrush(QtWidgets.QApplication.palette().base())
 
+    def key(self, midi: int) -> PianoKey | None:
+        return self.m_keys[midi] if 0 <= midi < 128 else None
+
+    def setPressed(self, notes: Iterable[int]) -> None:
+        # the complete set of pressed MIDI notes; notes off the keyboard are ignored
+        self.m_pending = set(midi for midi in notes if self.key(midi) is not None)
+        self.schedule()
+
+    def press(self, midi: int) -> None:
+        if self.key(midi) is not None:
+            self.m_pending.add(midi)
+            self.schedule()
+
+    def release(self, midi: int) -> None:
+        self.m_pending.discard(midi)
+        self.schedule()
+
+    def schedule(self) -> None:
+        if not self.m_timer.isActive():
+            self.m_timer.start()
+
+    def flush(self) -> None:
+        self.m_timer.stop()
+        changed = self.m_pending ^ self.m_shown
+        if not changed:
+            return
+        for midi in changed:
+            self.m_keys[midi].setPressed(midi in self.m_pending)
+        self.m_shown = set(self.m_pending)
+        self.notes_changed.emit(self.notes())
+
+    def pressed(self) -> set[int]:
+        # MIDI notes as currently shown
+        return set(self.m_shown)
+
+    def notes(self) -> set[Note]:
+        return set(midi_note(midi) for midi in self.m_shown)
+
     def resizeEvent(self, event):
         super(PianoKeyBoard, self).resizeEvent(event)
         self.fitInView(self.scene().sceneRect(), QtCore.Qt.KeepAspectRatio)
@@ -111,9 +220,15 @@ if __name__ == '__main__':
     app.setStyle('fusion')
     w = QtWidgets.QWidget()
     lay = QtWidgets.QVBoxLayout(w)
-    lay.addWidget(QtWidgets.QLabel("Piano Keyboard",
-                  alignment=QtCore.Qt.AlignCenter))
-    lay.addWidget(PianoKeyBoard(4))
-    w.resize(640, 480)
+    label = QtWidgets.QLabel("Piano Keyboard", alignment=QtCore.Qt.AlignCenter)
+    lay.addWidget(label)
+    keyboard = PianoKeyBoard(lowest=PIANO_LOWEST, num_keys=PIANO_KEYS)
+    lay.addWidget(keyboard)
+
+    def onNotesChanged(notes: set) -> None:
+        from chord import Chord
+        label.setText(str(Chord(notes)) or "Piano Keyboard")
+    keyboard.notes_changed.connect(onNotesChanged)
+    w.resize(1280, 240)
     w.show()
     sys.exit(app.exec_())
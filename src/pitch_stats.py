@@ -0,0 +1,152 @@
+import json
+import re
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterable, Iterator
+
+import numpy as np
+
+from key import KEYS, Key, key_correlations
+from note import Note
+
+# note names with an optional octave, e.g. "Eb4" or "F#"
+NOTE_NAME = re.compile(r"^([A-G][#b]?)-?\d*$")
+
+
+def event_pitch_class(pitch: str | int) -> int:
+    # MIDI numbers, or spellings of Note.PITCHES_SHARP/PITCHES_FLAT
+    if isinstance(pitch, (int, np.integer)) or pitch.isdigit():
+        return int(pitch) % 12
+    match = NOTE_NAME.match(pitch)
+    return Note.PITCH_INDEX.get(match.group(1), -1) if match else -1
+
+
+def read_events(path: str) -> Iterator[tuple[float, float, str]]:
+    """
+    (onset, duration, pitch) note events, one per line, separated by commas or
+    whitespace; blank lines and lines starting with # are skipped.
+    """
+    with open(path) as f:
+        for line in f:
+            fields = line.replace(",", " ").split()
+            if fields and not fields[0].startswith("#"):
+                yield float(fields[0]), float(fields[1]), fields[2]
+
+
+def sounding_time(onsets: np.ndarray, ends: np.ndarray, pcs: np.ndarray, times: np.ndarray) -> np.ndarray:
+    """
+    (len(times) x 12) matrix of how long every pitch class has sounded up to
+    each time. A note adds clip(t - onset, 0, duration), i.e. (t - onset) once
+    started minus (t - end) once over, which prefix sums over the sorted
+    onsets and ends give for all times at once.
+    """
+    result = np.zeros((len(times), 12))
+    for pc in range(12):
+        selected = pcs == pc
+        for sign, points in ((1., onsets[selected]), (-1., ends[selected])):
+            points = np.sort(points)
+            prefix = np.concatenate(([0.], np.cumsum(points)))
+            count = np.searchsorted(points, times, side="right")
+            result[:, pc] += sign * (count * times - prefix[count])
+    return result
+
+
+class PitchProfile():
+    def __init__(self, source: str, histogram: np.ndarray, correlations: np.ndarray,
+                 window_starts: np.ndarray, window_histograms: np.ndarray,
+                 window_correlations: np.ndarray) -> None:
+        self.source = source
+        # duration-weighted pitch-class histogram of the piece, and its
+        # correlation with every key (ordered as key.KEYS)
+        self.histogram = histogram
+        self.correlations = correlations
+        # the same per window, one row per window
+        self.window_starts = window_starts
+        self.window_histograms = window_histograms
+        self.window_correlations = window_correlations
+
+    @property
+    def key(self) -> Key | None:
+        if not self.histogram.any():
+            return None
+        return KEYS[int(np.argmax(self.correlations))]
+
+    def window_keys(self) -> list[Key | None]:
+        best = np.argmax(self.window_correlations, axis=1)
+        sounding = self.window_histograms.any(axis=1)
+        return [KEYS[index] if active else None for index, active in zip(best.tolist(), sounding.tolist())]
+
+    def summary(self) -> dict:
+        key = self.key
+        return {
+            "source": self.source,
+            "key": str(key) if key else None,
+            "correlation": round(float(self.correlations.max()), 4) if key else 0.,
+            "histogram": [round(value, 4) for value in self.histogram.tolist()],
+            "windows": [key.name_short if key else None for key in self.window_keys()],
+        }
+
+
+class PitchProfiler():
+    """
+    Pitch-class histograms and Krumhansl-Kessler key correlations of note
+    events, for the whole piece and for windows of window time units every
+    hop units. Every window histogram is a difference of two rows of the
+    sounding-time matrix, so that all windows of a piece are scored against
+    the 24 key profiles in one (windows x 12) by (12 x 24) product.
+    """
+
+    def __init__(self, window: float = 8., hop: float = 4.) -> None:
+        if window <= 0 or hop <= 0:
+            raise ValueError("The window and the hop must be positive")
+        self.window = window
+        self.hop = hop
+
+    def profile(self, events: Iterable[tuple[float, float, str | int]], source: str = "") -> PitchProfile:
+        events = [(onset, duration, event_pitch_class(pitch)) for onset, duration, pitch in events]
+        onsets = np.array([event[0] for event in events], dtype=np.float64)
+        durations = np.array([event[1] for event in events], dtype=np.float64)
+        pcs = np.array([event[2] for event in events], dtype=np.int64)
+        ends = onsets + np.maximum(durations, 0.)
+
+        start = onsets.min() if len(onsets) else 0.
+        end = ends.max() if len(ends) else 0.
+        num_windows = max(1, int(np.ceil((end - start - self.window) / self.hop)) + 1)
+        starts = start + self.hop * np.arange(num_windows)
+        # the piece, then the window starts and ends
+        times = np.concatenate(([end], starts, starts + self.window))
+        sounded = sounding_time(onsets, ends, pcs, times)
+
+        histogram = sounded[0]
+        windows = sounded[1 + num_windows:] - sounded[1:1 + num_windows]
+        return PitchProfile(source, histogram, key_correlations(histogram),
+                            starts, windows, key_correlations(windows))
+
+    def profile_file(self, path: str) -> PitchProfile:
+        return self.profile(read_events(path), path)
+
+
+def profile_files(paths: Iterable[str], processes: int = 1, profiler: PitchProfiler | None = None,
+                  chunk_size: int = 64) -> Iterator[PitchProfile]:
+    # one profile per file, in order, yielded as they are done
+    if profiler is None:
+        profiler = PitchProfiler()
+    if processes == 1:
+        for path in paths:
+            yield profiler.profile_file(path)
+        return
+    with ProcessPoolExecutor(max_workers=processes) as executor:
+        yield from executor.map(profiler.profile_file, list(paths), chunksize=chunk_size)
+
+
+if __name__ == '__main__':
+    import argparse
+    parser = argparse.ArgumentParser(description="Pitch-class and key statistics of note event files, "
+                                                 "one JSON object per file")
+    parser.add_argument("paths", nargs="+")
+    parser.add_argument("--window", type=float, default=8.)
+    parser.add_argument("--hop", type=float, default=4.)
+    parser.add_argument("--processes", type=int, default=None)
+    args = parser.parse_args()
+
+    for profile in profile_files(args.paths, args.processes, PitchProfiler(args.window, args.hop)):
+        print(json.dumps(profile.summary()), flush=True)
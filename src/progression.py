@@ -0,0 +1,139 @@
+from collections import deque
+from typing import Iterable, Iterator
+
+import numpy as np
+
+from chord import Chord, ChordVariant
+from key import KEYS, Key, key_correlations, pitch_class
+
+
+class ChordLabel():
+    def __init__(self, chord: Chord, key: Key | None, numeral: str = "",
+                 function: str = "", key_changed: bool = False) -> None:
+        self.chord = chord
+        self.key = key
+        self.numeral = numeral
+        self.function = function
+        self.key_changed = key_changed
+
+    def __str__(self) -> str:
+        return self.numeral
+
+
+class ProgressionAnalyzer():
+    """
+    Streaming key detection and Roman-numeral labelling. Every fed chord is
+    added to a sliding window of pitch-class counts which is scored against
+    all 24 keys in one matrix product.
+    """
+    # degrees are spelled relative to the major scale of the tonic, so that
+    # e.g. the natural minor reads i ii° bIII iv v bVI bVII
+    NUMERAL_MAP = {
+        0: "I",
+        1: "bII",
+        2: "II",
+        3: "bIII",
+        4: "III",
+        5: "IV",
+        6: "#IV",
+        7: "V",
+        8: "bVI",
+        9: "VI",
+        10: "bVII",
+        11: "VII",
+    }
+
+    FUNCTION_MAP = {
+        "major": {
+            0: "tonic", 4: "tonic", 9: "tonic",
+            2: "subdominant", 5: "subdominant",
+            7: "dominant", 11: "dominant",
+        },
+        "minor": {
+            0: "tonic", 3: "tonic", 8: "tonic",
+            2: "subdominant", 5: "subdominant",
+            7: "dominant", 10: "dominant", 11: "dominant",
+        },
+    }
+
+    TRIAD_SUFFIX_MAP = {
+        "major": "",
+        "minor": "",
+        "diminished": "°",
+        "augmented": "+",
+        "sus4": "sus4",
+        "sus2": "sus2",
+    }
+
+    # extra weight given to the root of each chord in the window histogram
+    ROOT_WEIGHT = 1.
+
+    def __init__(self, window: int = 8, hysteresis: float = 0.1) -> None:
+        self.window = window
+        # how much better another key has to score before the current one is left
+        self.hysteresis = hysteresis
+        self.reset()
+
+    def reset(self) -> None:
+        self.history = deque()
+        self.histogram = np.zeros(12)
+        self.key = None
+
+    def feed(self, chord: str | set | Chord) -> ChordLabel:
+        if not isinstance(chord, Chord):
+            chord = Chord(chord)
+
+        vector = self.pitch_class_vector(chord)
+        self.history.append(vector)
+        self.histogram += vector
+        if len(self.history) > self.window:
+            self.histogram -= self.history.popleft()
+
+        key_changed = False
+        if self.histogram.any():
+            scores = key_correlations(self.histogram)
+            best = int(np.argmax(scores))
+            if self.key is None:
+                self.key = KEYS[best]
+                key_changed = True
+            elif best != self.key.index and \
+                    scores[best] - scores[self.key.index] > self.hysteresis:
+                self.key = KEYS[best]
+                key_changed = True
+
+        return self.label(chord, self.key, key_changed)
+
+    def analyze(self, chords: Iterable[str | set | Chord]) -> Iterator[ChordLabel]:
+        for chord in chords:
+            yield self.feed(chord)
+
+    def pitch_class_vector(self, chord: Chord) -> np.ndarray:
+        vector = np.zeros(12)
+        for note in chord.notes:
+            vector[pitch_class(note)] = 1.
+        if chord.variants:
+            vector[pitch_class(chord.variants[0].root)] += self.ROOT_WEIGHT
+        return vector
+
+    def label(self, chord: Chord, key: Key | None, key_changed: bool = False) -> ChordLabel:
+        if key is None or not chord.variants:
+            return ChordLabel(chord, key, key_changed=key_changed)
+
+        variant = chord.variants[0]
+        degree = (pitch_class(variant.root) - key.tonic) % 12
+        numeral = self.NUMERAL_MAP[degree]
+        function = self.FUNCTION_MAP[key.mode].get(degree, "chromatic")
+
+        if isinstance(variant, ChordVariant) and variant.triad:
+            triad = next(iter(variant.triad))
+            if triad in ("minor", "diminished"):
+                numeral = numeral.lower()
+            suffix = self.TRIAD_SUFFIX_MAP[triad]
+            if "7" in variant.seventh:
+                # a diminished triad with a minor seventh is half-diminished
+                suffix = "ø7" if triad == "diminished" else suffix + "7"
+            if "maj7" in variant.seventh:
+                suffix += "maj7"
+            numeral += suffix
+
+        return ChordLabel(chord, key, numeral, function, key_changed)
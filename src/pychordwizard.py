@@ -0,0 +1,105 @@
+"""
+Command line interface to the naming engine. It never imports Qt or numpy,
+and parses its few options by hand, so that it starts fast enough to be
+called once per line from shell pipelines:
+
+    python -m pychordwizard name "C3 E4 G5"
+    python -m pychordwizard name --all C E G Bb
+    cat chords.txt | python -m pychordwizard name -
+"""
+import sys
+
+USAGE = """usage: python -m pychordwizard <command> [options]
+
+commands:
+  name [--all] [--json] NOTES...   name a set of notes, e.g. "C3 E4 G5"
+  name -                           name every line of stdin, one JSON object per line
+  dataset OUT [options]            generate the chord chart dataset (see dataset --help)
+"""
+
+
+class UsageError(Exception):
+    pass
+
+
+def name_record(notes: str) -> dict:
+    # shared with the other sessions through the persistent analysis cache
+    from analysis_cache import analyse
+    result = analyse(notes)
+    return {"notes": notes, "name": result["name"], "names": result["names"]}
+
+
+def write_json(record: dict, out) -> None:
+    import json
+    out.write(json.dumps(record, ensure_ascii=False) + "\n")
+    out.flush()
+
+
+def name_stream(lines, out) -> int:
+    count = 0
+    for line in lines:
+        notes = line.strip()
+        if notes:
+            write_json(name_record(notes), out)
+            count += 1
+    return count
+
+
+def command_name(args: list[str], stdin=None, out=None) -> int:
+    stdin = sys.stdin if stdin is None else stdin
+    out = sys.stdout if out is None else out
+    show_all = "--all" in args
+    as_json = "--json" in args
+    notes = [arg for arg in args if arg not in ("--all", "--json")]
+    unknown = [arg for arg in notes if arg.startswith("--")]
+    if unknown:
+        raise UsageError(f"unknown option {unknown[0]}")
+    if not notes:
+        raise UsageError("no notes given")
+
+    if notes == ["-"]:
+        name_stream(stdin, out)
+        return 0
+
+    record = name_record(" ".join(notes))
+    if as_json:
+        write_json(record, out)
+    elif show_all:
+        out.write("\n".join(record["names"]) + "\n")
+    else:
+        out.write(record["name"] + "\n")
+    return 0 if record["name"] else 1
+
+
+def command_dataset(args: list[str]) -> int:
+    # numpy and the process pool are only needed here
+    from chord_dataset import main as dataset_main
+    return dataset_main(args)
+
+
+COMMANDS = {
+    "name": command_name,
+    "dataset": command_dataset,
+}
+
+
+def main(argv: list[str] | None = None) -> int:
+    argv = sys.argv[1:] if argv is None else argv
+    if not argv or argv[0] in ("-h", "--help") or argv[0] not in COMMANDS:
+        sys.stderr.write(USAGE)
+        return 0 if argv and argv[0] in ("-h", "--help") else 2
+    try:
+        return COMMANDS[argv[0]](argv[1:])
+    except UsageError as e:
+        sys.stderr.write(f"{USAGE}\nerror: {e}\n")
+        return 2
+    except BrokenPipeError:
+        # the reading end of a pipe went away, e.g. | head
+        sys.stderr.close()
+        return 0
+    except KeyboardInterrupt:
+        return 130
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,27 +1,25 @@
-from PyQt5 import QtWidgets
+from PyQt5 import QtGui, QtWidgets
 from fretboard_widget import FretboardView
-from chord import Chord
-from note import Note
+from analysis_cache import analyse
+from chord_preview import ChordPreview
+from session_recorder import SessionRecorder
+from tuning import NUM_STRINGS_TUNING_MAP, parse_tuning, string_notes
+import os
 import sys
+import tempfile
 
 
 class PyChordWizardGuitar(QtWidgets.QMainWindow):
-    NUM_STRINGS_TUNING_MAP = {
-        "6": {
-            "Standard": "E-A-D-G-B-E",
-            "Drop D": "D-A-D-G-B-E",
-            "Open D": "D-A-D-F#-A-D",
-        },
-        "7": {
-            "Standard": "B-E-A-D-G-B-E"
-        },
-    }
+    NUM_FRETS = 24
+    VISIBLE_FRETS = 13
 
     def __init__(self, parent=None) -> None:
         super().__init__(parent)
 
         self.active_notes = []
         self.chord_name_items = []
+        self.recorder = None
+        self.preview = ChordPreview()
 
         lay_main = QtWidgets.QHBoxLayout()
         widget = QtWidgets.QWidget()
@@ -30,7 +28,7 @@ class PyChordWizardGuitar(QtWidgets.QMainWindow):
         self.setWindowTitle("PyChordWizard Guitar")
 
         # Fretboard
-        self.fretboard = FretboardView()
+        self.fretboard = FretboardView(num_frets=self.NUM_FRETS, visible_frets=self.VISIBLE_FRETS)
         self.fretboard.setOpenBottom(True)
         self.fretboard.scene().notes_changed.connect(self.onNotesChanged)
         lay_main.addWidget(self.fretboard)
@@ -41,9 +39,9 @@ class PyChordWizardGuitar(QtWidgets.QMainWindow):
         # String number combobox
         lay_grid.addWidget(QtWidgets.QLabel("Number of strings"), 0, 0)
         self.cb_num_strings = QtWidgets.QComboBox()
-        for num_string in self.NUM_STRINGS_TUNING_MAP:
+        for num_string in NUM_STRINGS_TUNING_MAP:
             self.cb_num_strings.addItem(num_string)
-        self.cb_num_strings.setCurrentIndex(0)
+        self.cb_num_strings.setCurrentText("6")
         self.cb_num_strings.currentIndexChanged.connect(
             self.onNumStringsChanged)
         lay_grid.addWidget(self.cb_num_strings, 0, 1)
@@ -84,8 +82,38 @@ class PyChordWizardGuitar(QtWidgets.QMainWindow):
         action_file_clear.setShortcut("Ctrl+K")
         action_file_clear.triggered.connect(self.onClear)
         menu_file.addAction(action_file_clear)
+        self.action_file_record = QtWidgets.QAction("Record session", self)
+        self.action_file_record.setCheckable(True)
+        self.action_file_record.toggled.connect(self.onRecordToggled)
+        menu_file.addAction(self.action_file_record)
+        menu_file.addSeparator()
+        action_file_play = QtWidgets.QAction("Play chord", self)
+        action_file_play.setShortcut("Ctrl+P")
+        action_file_play.triggered.connect(self.onPlay)
+        menu_file.addAction(action_file_play)
+        action_file_export = QtWidgets.QAction("Export sound...", self)
+        action_file_export.triggered.connect(self.onExportSound)
+        menu_file.addAction(action_file_export)
         menubar.addMenu(menu_file)
 
+        # Edit menu
+        menu_edit = menubar.addMenu("Edit")
+        action_edit_undo = QtWidgets.QAction("Undo", self)
+        action_edit_undo.setShortcut(QtGui.QKeySequence.Undo)
+        action_edit_undo.triggered.connect(self.fretboard.undo)
+        menu_edit.addAction(action_edit_undo)
+        action_edit_redo = QtWidgets.QAction("Redo", self)
+        action_edit_redo.setShortcut(QtGui.QKeySequence.Redo)
+        action_edit_redo.triggered.connect(self.fretboard.redo)
+        menu_edit.addAction(action_edit_redo)
+
+        # View menu
+        menu_view = menubar.addMenu("View")
+        self.action_view_overlay = QtWidgets.QAction("Chord tones on the neck", self)
+        self.action_view_overlay.setCheckable(True)
+        self.action_view_overlay.toggled.connect(self.updateChordName)
+        menu_view.addAction(self.action_view_overlay)
+
         self.setMenuBar(menubar)
 
     def onNumStringsChanged(self) -> None:
@@ -100,23 +128,9 @@ class PyChordWizardGuitar(QtWidgets.QMainWindow):
         tuning = self.cb_tuning.currentText()
         if tuning:
             # get the notes for each string
-            tuning = tuning.split()[0]
-            tuning_array = [note for note in tuning.split("-")]
+            tuning_array = parse_tuning(tuning)
             self.fretboard.setTuning(list(tuning_array))
-            # now add the octaves, starting from the highest string,
-            # which is in octave 4 if above 'C4' or octave 3 if below it
-            tuning_array.reverse()
-            if tuning_array[0] >= 'C':
-                tuning_array[0] += "4"
-            else:
-                tuning_array[0] += "3"
-            self.string_notes = [Note(tuning_array[0])]
-
-            for i in range(len(tuning_array) - 1):
-                note = self.string_notes[i]
-                next_note = Note(tuning_array[i+1])
-                self.string_notes += [note.find_below(next_note)]
-            self.string_notes.reverse()
+            self.string_notes = string_notes(tuning_array)
 
     def onNotesChanged(self, active_notes: dict[int, int]) -> None:
         self.active_notes = active_notes
@@ -125,10 +139,35 @@ class PyChordWizardGuitar(QtWidgets.QMainWindow):
     def onClear(self) -> None:
         self.fretboard.clear()
 
+    def onPlay(self) -> None:
+        try:
+            from PyQt5.QtMultimedia import QSound
+        except ImportError:
+            self.statusBar().showMessage("Sound playback needs QtMultimedia, use Export sound instead", 5000)
+            return
+        path = os.path.join(tempfile.gettempdir(), "pychordwizard-preview.wav")
+        QSound.play(self.preview.save(path, self.fretboard.voicing(), self.fretboard.tuning, self.cb_capo.value()))
+
+    def onExportSound(self) -> None:
+        path, _ = QtWidgets.QFileDialog.getSaveFileName(self, "Export sound", "chord.wav", "WAV files (*.wav)")
+        if path:
+            self.preview.save(path, self.fretboard.voicing(), self.fretboard.tuning, self.cb_capo.value())
+
+    def onRecordToggled(self, checked: bool) -> None:
+        if checked:
+            self.recorder = SessionRecorder(self.fretboard)
+            self.recorder.start()
+        else:
+            session = self.recorder.stop()
+            path, _ = QtWidgets.QFileDialog.getSaveFileName(
+                self, "Save session", "session.txt.gz", "Sessions (*.txt *.txt.gz)")
+            if path:
+                session.save(path)
+
     def updateTunings(self) -> None:
         num_strings = self.cb_num_strings.currentText()
         self.cb_tuning.clear()
-        tuning = self.NUM_STRINGS_TUNING_MAP[num_strings]
+        tuning = NUM_STRINGS_TUNING_MAP[num_strings]
         for key, val in tuning.items():
             self.cb_tuning.addItem(f"{val} ({key})")
         self.cb_tuning.setCurrentIndex(0)
@@ -143,18 +182,20 @@ class PyChordWizardGuitar(QtWidgets.QMainWindow):
             for key, val in self.active_notes.items():
                 note = self.string_notes[key] + val + self.cb_capo.value()
                 notes.add(note)
-            chord = Chord(notes)
+            # unique names, best first, from the persistent analysis cache
+            analysis = analyse(" ".join(str(note) for note in notes))
 
             n_cols = 2
-            # eliminate name duplicates by using dict(). set() does not keep the order
-            chord_names = dict()
-            for var in chord.variants:
-                chord_names[str(var)] = None
-            for i, name in enumerate(chord_names):
+            for i, name in enumerate(analysis["names"]):
                 item = QtWidgets.QPushButton(str(name))
                 self.chord_name_items += [item]
                 self.lay_chord_names.addWidget(item, i // n_cols, i % n_cols)
 
+        if self.active_notes and analysis["names"] and self.action_view_overlay.isChecked():
+            self.fretboard.setOverlay(analysis["mask"], root=analysis["root"])
+        else:
+            self.fretboard.clearOverlay()
+
 
 if __name__ == '__main__':
     app = QtWidgets.QApplication(sys.argv)
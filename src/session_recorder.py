@@ -0,0 +1,235 @@
+import gzip
+import time
+from typing import Iterable
+
+from PyQt5.QtCore import QPointF
+
+from fretboard_widget import FretboardScene, FretboardView
+from voicing import MUTED
+
+SESSION_HEADER = "pychordwizard-session"
+SESSION_VERSION = 1
+
+# event kinds, one letter each in the log
+NEW_NOTE, EXISTING_NOTE, BARRE, MOVE, RELEASE = "n", "e", "b", "m", "r"
+
+
+class SessionEvent():
+    def __init__(self, kind: str, t: float, args: tuple = ()) -> None:
+        self.kind = kind
+        # seconds since the start of the recording, informative only
+        self.t = t
+        self.args = args
+
+    def __str__(self) -> str:
+        return " ".join([self.kind, f"{self.t:.3f}"] + [f"{arg:g}" for arg in self.args])
+
+    @classmethod
+    def fromString(cls, line: str) -> "SessionEvent":
+        fields = line.split()
+        kind = fields[0]
+        args = tuple(float(arg) if kind == MOVE else int(arg) for arg in fields[2:])
+        return cls(kind, float(fields[1]), args)
+
+
+class Session():
+    """
+    A recorded fretboard session: the view set-up, the user-level events in
+    order and the voicing at the end, if known. Stored as one line per event,
+    gzipped when the file name ends with .gz.
+    """
+
+    def __init__(self, tuning: list[str], num_frets: int, events: list[SessionEvent] = [],
+                 voicing: tuple[int, ...] | None = None) -> None:
+        self.tuning = list(tuning)
+        self.num_frets = num_frets
+        self.events = list(events)
+        self.voicing = voicing
+
+    def save(self, path: str) -> str:
+        lines = [f"{SESSION_HEADER} {SESSION_VERSION}",
+                 "tuning " + "-".join(self.tuning),
+                 f"frets {self.num_frets}"]
+        lines += [str(event) for event in self.events]
+        if self.voicing is not None:
+            lines.append("voicing " + ",".join(str(fret) for fret in self.voicing))
+        opener = gzip.open if path.endswith(".gz") else open
+        with opener(path, "wt") as f:
+            f.write("\n".join(lines) + "\n")
+        return path
+
+    @classmethod
+    def load(cls, path: str) -> "Session":
+        opener = gzip.open if path.endswith(".gz") else open
+        with opener(path, "rt") as f:
+            lines = [line.strip() for line in f if line.strip()]
+        header = lines[0].split()
+        if header[0] != SESSION_HEADER or int(header[1]) != SESSION_VERSION:
+            raise ValueError(f"{path} is not a version {SESSION_VERSION} session")
+        session = cls([], 0)
+        for line in lines[1:]:
+            if line.startswith("tuning "):
+                session.tuning = line.split()[1].split("-")
+            elif line.startswith("frets "):
+                session.num_frets = int(line.split()[1])
+            elif line.startswith("voicing "):
+                session.voicing = tuple(int(fret) for fret in line.split()[1].split(","))
+            else:
+                session.events.append(SessionEvent.fromString(line))
+        return session
+
+
+class SessionRecorder():
+    """
+    Records the user-level events of a FretboardView's scene: note and barre
+    presses plus the pointer moves and releases that drive barre dragging.
+    """
+
+    def __init__(self, view: FretboardView) -> None:
+        self.view = view
+        self.session = None
+        self.start_time = 0.
+        self.scene = None
+
+    def start(self) -> None:
+        self.session = Session(self.view.tuning, self.view.num_frets)
+        self.start_time = time.perf_counter()
+        self.scene = self.view.scene()
+        self.scene.new_note_pressed.connect(self.onNewNotePressed)
+        self.scene.existing_note_pressed.connect(self.onExistingNotePressed)
+        self.scene.barre_pressed.connect(self.onBarrePressed)
+        self.scene.pointer_moved.connect(self.onPointerMoved)
+        self.scene.pointer_released.connect(self.onPointerReleased)
+
+    def stop(self) -> Session:
+        if self.scene is not None:
+            self.scene.new_note_pressed.disconnect(self.onNewNotePressed)
+            self.scene.existing_note_pressed.disconnect(self.onExistingNotePressed)
+            self.scene.barre_pressed.disconnect(self.onBarrePressed)
+            self.scene.pointer_moved.disconnect(self.onPointerMoved)
+            self.scene.pointer_released.disconnect(self.onPointerReleased)
+            self.scene = None
+        self.session.voicing = self.view.voicing()
+        return self.session
+
+    def isRecording(self) -> bool:
+        return self.scene is not None
+
+    def record(self, kind: str, args: tuple = ()) -> None:
+        self.session.events.append(SessionEvent(kind, time.perf_counter() - self.start_time, args))
+
+    def onNewNotePressed(self, fret: int, string: int) -> None:
+        self.record(NEW_NOTE, (fret, string))
+
+    def onExistingNotePressed(self, fret: int, string: int) -> None:
+        self.record(EXISTING_NOTE, (fret, string))
+
+    def onBarrePressed(self, fret: int, string_coords: tuple[int, int]) -> None:
+        self.record(BARRE, (fret, *string_coords))
+
+    def onPointerMoved(self, x: float, y: float) -> None:
+        self.record(MOVE, (x, y))
+
+    def onPointerReleased(self) -> None:
+        self.record(RELEASE)
+
+
+class ReplayResult():
+    def __init__(self) -> None:
+        # (kind, seconds, number of notes_changed emitted) per event
+        self.events = []
+        # seconds from the start of the causing event to each notes_changed
+        self.notes_changed = []
+        self.voicing = None
+        self.expected = None
+
+    def ok(self) -> bool:
+        return self.expected is None or self.voicing == self.expected
+
+    def summary(self) -> dict[str, dict[str, float]]:
+        # count, total, mean, 95th percentile and max seconds per event kind
+        durations = {}
+        for kind, seconds, _ in self.events:
+            durations.setdefault(kind, []).append(seconds)
+        durations["notes_changed"] = self.notes_changed
+        result = {}
+        for kind, values in durations.items():
+            if not values:
+                continue
+            values = sorted(values)
+            result[kind] = {
+                "count": len(values),
+                "total": sum(values),
+                "mean": sum(values) / len(values),
+                "p95": values[min(len(values) - 1, int(0.95 * len(values)))],
+                "max": values[-1],
+            }
+        return result
+
+
+def replay(session: Session, view: FretboardView | None = None, repeat: int = 1) -> ReplayResult:
+    """
+    Replays the session as fast as possible, each repetition from a cleared
+    view. The events go through the same scene signals as the items' mouse
+    presses, so the whole interaction logic of the view is exercised.
+    """
+    if view is None:
+        from diagram_renderer import ensure_application
+        ensure_application()
+        view = FretboardView(num_frets=session.num_frets, tuning=session.tuning)
+
+    result = ReplayResult()
+    result.expected = session.voicing
+    scene: FretboardScene = view.scene()
+    event_start = [0.]
+    emitted = [0]
+
+    def onNotesChanged(active_notes: dict) -> None:
+        result.notes_changed.append(time.perf_counter() - event_start[0])
+        emitted[0] += 1
+
+    dispatch = {
+        NEW_NOTE: lambda args: scene.new_note_pressed.emit(*args),
+        EXISTING_NOTE: lambda args: scene.existing_note_pressed.emit(*args),
+        BARRE: lambda args: scene.barre_pressed.emit(args[0], (args[1], args[2])),
+        MOVE: lambda args: view.dragTo(QPointF(*args)),
+        RELEASE: lambda args: view.release(),
+    }
+
+    scene.notes_changed.connect(onNotesChanged)
+    try:
+        for _ in range(repeat):
+            view.clearNotes()
+            for event in session.events:
+                emitted[0] = 0
+                event_start[0] = time.perf_counter()
+                dispatch[event.kind](event.args)
+                result.events.append((event.kind, time.perf_counter() - event_start[0], emitted[0]))
+            result.voicing = view.voicing()
+    finally:
+        scene.notes_changed.disconnect(onNotesChanged)
+    return result
+
+
+def replay_files(paths: Iterable[str], repeat: int = 1) -> dict[str, ReplayResult]:
+    return {path: replay(Session.load(path), repeat=repeat) for path in paths}
+
+
+if __name__ == '__main__':
+    import argparse
+    parser = argparse.ArgumentParser(
+        description="Replay recorded fretboard sessions headless and report the timings")
+    parser.add_argument("sessions", nargs="+")
+    parser.add_argument("--repeat", type=int, default=1)
+    args = parser.parse_args()
+
+    failed = 0
+    for path, result in replay_files(args.sessions, args.repeat).items():
+        status = "ok" if result.ok() else "MISMATCH"
+        voicing = ",".join("x" if fret == MUTED else str(fret) for fret in result.voicing)
+        print(f"{path}: {voicing} {status}")
+        for kind, stats in result.summary().items():
+            print(f"  {kind:>13} {stats['count']:>7} events  mean {1e6 * stats['mean']:8.1f} us"
+                  f"  p95 {1e6 * stats['p95']:8.1f} us  max {1e6 * stats['max']:8.1f} us")
+        failed += not result.ok()
+    raise SystemExit(1 if failed else 0)
@@ -0,0 +1,174 @@
+"""
+Read-only lookup tables shared between processes. A table file is published
+once and memory-mapped by every process that attaches to it, so the pages
+exist once in memory however many workers there are, and attaching costs a
+header parse instead of rebuilding the tables:
+
+    path = publish_naming_tables()
+    with ProcessPoolExecutor(initializer=attach_naming_tables, initargs=(path,)) as executor:
+        ...
+
+File layout: MAGIC, the length of a JSON header (uint32, little endian),
+the header, then the tables, each one aligned to 8 bytes. The header holds
+the version the tables were built for, a digest of the data and the
+(typecode, offset, count) of every table.
+"""
+import hashlib
+import json
+import mmap
+import os
+import struct
+import sys
+import tempfile
+from array import array
+
+from chord_templates import ChordTemplateLibrary, default_library, rules_version
+
+MAGIC = b"PCWTBLS1"
+ALIGNMENT = 8
+
+NAMING_TABLES = ["template_index", "template_score", "template_extras"]
+
+
+def _aligned(offset: int) -> int:
+    return (offset + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+
+
+def tables_directory() -> str:
+    # RAM backed where available
+    return "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir()
+
+
+def tables_path(version: str, directory: str | None = None) -> str:
+    return os.path.join(directory or tables_directory(), f"pychordwizard-tables-{version}.bin")
+
+
+class SharedTables():
+    """
+    A published table file, mapped read-only. Tables are returned as
+    memoryviews cast to their typecode: indexing them reads the mapped pages
+    directly. Views handed out stay valid until close().
+    """
+
+    def __init__(self, path: str, mapping: mmap.mmap, header: dict) -> None:
+        self.path = path
+        self.mapping = mapping
+        self.version = header["version"]
+        self.digest = header["digest"]
+        self.layout = header["tables"]
+        self.views = {}
+
+    @classmethod
+    def publish(cls, tables: dict[str, array], version: str, path: str) -> "SharedTables":
+        """
+        Writes the tables to path and attaches to them. The file is written
+        next to path and renamed, so processes never see a partial file.
+        """
+        layout = {}
+        offset = 0
+        for name, table in tables.items():
+            layout[name] = (table.typecode, offset, len(table))
+            offset = _aligned(offset + len(table) * table.itemsize)
+        data = bytearray(offset)
+        for name, table in tables.items():
+            start = layout[name][1]
+            data[start:start + len(table) * table.itemsize] = table.tobytes()
+        header = json.dumps({"version": version, "byteorder": sys.byteorder,
+                             "digest": hashlib.sha256(data).hexdigest(), "tables": layout}).encode()
+        prefix = MAGIC + struct.pack("<I", len(header)) + header
+        prefix += bytes(_aligned(len(prefix)) - len(prefix))
+
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(prefix)
+            f.write(data)
+        os.replace(tmp_path, path)
+        return cls.attach(path, version)
+
+    @classmethod
+    def attach(cls, path: str, version: str | None = None, verify: bool = False) -> "SharedTables":
+        """
+        Maps a published file. Raises ValueError if it is not a table file,
+        was built for another version or, with verify, if its data does not
+        match its digest.
+        """
+        with open(path, "rb") as f:
+            mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            if mapping[:len(MAGIC)] != MAGIC:
+                raise ValueError(f"{path} is not a table file")
+            header_size, = struct.unpack_from("<I", mapping, len(MAGIC))
+            header_start = len(MAGIC) + 4
+            header = json.loads(mapping[header_start:header_start + header_size])
+            if header["byteorder"] != sys.byteorder:
+                raise ValueError(f"{path} was written with another byte order")
+            if version is not None and header["version"] != version:
+                raise ValueError(f"{path} holds tables of version {header['version']}, not {version}")
+            data_start = _aligned(header_start + header_size)
+            if verify and hashlib.sha256(mapping[data_start:]).hexdigest() != header["digest"]:
+                raise ValueError(f"{path} is corrupt")
+        except Exception:
+            mapping.close()
+            raise
+        # offsets in the header are relative to the data
+        header["tables"] = {name: (typecode, data_start + offset, count)
+                            for name, (typecode, offset, count) in header["tables"].items()}
+        return cls(path, mapping, header)
+
+    def names(self) -> list[str]:
+        return list(self.layout)
+
+    def __getitem__(self, name: str) -> memoryview:
+        if name not in self.views:
+            typecode, offset, count = self.layout[name]
+            size = count * array(typecode).itemsize
+            self.views[name] = memoryview(self.mapping)[offset:offset + size].cast(typecode)
+        return self.views[name]
+
+    def close(self) -> None:
+        # the mapping cannot be closed while views of it exist
+        for view in self.views.values():
+            view.release()
+        self.views = {}
+        self.mapping.close()
+
+
+def naming_tables() -> dict[str, array]:
+    # built from the template file, never from tables attached to the default library
+    return dict(zip(NAMING_TABLES, ChordTemplateLibrary.load().build()))
+
+
+def publish_naming_tables(directory: str | None = None) -> str:
+    """
+    Publishes the chord naming tables of the current rules and returns the
+    path to attach to. A file left by an earlier run with the same rules is
+    reused as it is.
+    """
+    version = rules_version()
+    path = tables_path(version, directory)
+    try:
+        SharedTables.attach(path, version, verify=True).close()
+        return path
+    except (OSError, ValueError):
+        pass
+    SharedTables.publish(naming_tables(), version, path).close()
+    return path
+
+
+# tables attached by this process, kept open for its lifetime
+_attached = None
+
+
+def attach_naming_tables(path: str) -> SharedTables:
+    """
+    Makes the default library name chords from the published tables. Meant
+    as a process pool initializer; raises ValueError if the file was built
+    for other naming rules than the ones of this process.
+    """
+    global _attached
+    tables = SharedTables.attach(path, rules_version())
+    default_library().attach(*(tables[name] for name in NAMING_TABLES))
+    if _attached is not None and _attached is not tables:
+        _attached.close()
+    _attached = tables
+    return tables
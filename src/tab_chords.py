@@ -0,0 +1,135 @@
+import re
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterable, Iterator
+
+from chord_dataset import voicing_name
+from shared_tables import attach_naming_tables, publish_naming_tables
+from tuning import parse_tuning, semitones, string_notes
+
+# a staff line: optional string label, a bar, then dashes, frets and the usual
+# technique marks (hammer-ons, slides, bends...)
+TAB_LINE = re.compile(r"^\s*(?:[A-Ga-g][#b]?\d?)?\s*\|(?P<body>[-0-9|hpbrxX/\\~()<>^.*=svt ]*-[-0-9|hpbrxX/\\~()<>^.*=svt ]*)$")
+FRET = re.compile(r"\d{1,2}")
+
+# frets above this are read as two single-digit notes ("57" is 5 then 7)
+MAX_FRET = 24
+
+
+class TabChord():
+    def __init__(self, system: int, column: int, notes: dict[int, int], name: str) -> None:
+        self.system = system
+        self.column = column
+        # active_notes-style {string: fret}, lowest string first
+        self.notes = notes
+        self.name = name
+
+    def __str__(self) -> str:
+        return f"{self.system}:{self.column} {self.name}"
+
+
+def tab_systems(lines: Iterable[str], num_strings: int) -> Iterator[list[str]]:
+    """
+    Groups consecutive staff lines into systems of num_strings lines, the
+    highest string first as written, and yields their bodies (what follows
+    the first bar). Lines are consumed one by one, so that files of any size
+    are read in constant memory.
+    """
+    staff = []
+    for line in lines:
+        match = TAB_LINE.match(line.rstrip("\r\n"))
+        if match:
+            staff.append(match.group("body"))
+            if len(staff) == num_strings:
+                yield staff
+                staff = []
+        else:
+            # anything else (lyrics, chord names, blank lines) ends a system,
+            # and incomplete ones are dropped
+            staff = []
+
+
+def fret_tokens(body: str) -> Iterator[tuple[int, int, int]]:
+    # (start column, end column, fret) of every note on a staff line
+    for match in FRET.finditer(body):
+        start, digits = match.start(), match.group()
+        if int(digits) > MAX_FRET:
+            yield start, start + 1, int(digits[0])
+            yield start + 1, start + 2, int(digits[1])
+        else:
+            yield start, match.end(), int(digits)
+
+
+def system_slices(system: list[str]) -> Iterator[tuple[int, dict[int, int]]]:
+    """
+    The vertical slices of a system, as (column, {string: fret}). Notes whose
+    columns overlap belong to the same slice, so that a two-digit fret lines
+    up with the single-digit ones struck with it.
+    """
+    num_strings = len(system)
+    tokens = sorted((start, end, num_strings - 1 - line, fret)
+                    for line, body in enumerate(system)
+                    for start, end, fret in fret_tokens(body))
+    column, slice_end, notes = -1, -1, {}
+    for start, end, string, fret in tokens:
+        if start >= slice_end or string in notes:
+            if notes:
+                yield column, notes
+            column, slice_end, notes = start, end, {}
+        notes[string] = fret
+        slice_end = max(slice_end, end)
+    if notes:
+        yield column, notes
+
+
+class TabImporter():
+    """
+    Names every chord of plain-text tablature with the given tuning. Names
+    are looked up by interval structure (see chord_dataset.voicing_name), so
+    that the same shape anywhere on the neck is only named once.
+    """
+
+    def __init__(self, tuning: list[str] = ["E", "A", "D", "G", "B", "E"]) -> None:
+        self.tuning = tuning
+        self.open_pitches = [semitones(note) for note in string_notes(tuning)]
+
+    def chords(self, lines: Iterable[str]) -> Iterator[TabChord]:
+        for index, system in enumerate(tab_systems(lines, len(self.tuning))):
+            for column, notes in system_slices(system):
+                pitches = [self.open_pitches[string] + fret for string, fret in notes.items()]
+                yield TabChord(index, column, notes, voicing_name(pitches))
+
+    def read(self, path: str) -> list[TabChord]:
+        with open(path, encoding="utf-8", errors="replace") as f:
+            return list(self.chords(f))
+
+
+def import_files(paths: Iterable[str], processes: int = 1, tuning: list[str] = ["E", "A", "D", "G", "B", "E"],
+                 chunk_size: int = 64) -> Iterator[tuple[str, list[TabChord]]]:
+    """
+    (path, chords) of every file, in order. With several processes, the files
+    are handed to the workers chunk_size at a time and the results are
+    yielded as they come, so that whole tab archives can be streamed.
+    """
+    importer = TabImporter(tuning)
+    if processes == 1:
+        for path in paths:
+            yield path, importer.read(path)
+        return
+    paths = list(paths)
+    with ProcessPoolExecutor(max_workers=processes, initializer=attach_naming_tables,
+                             initargs=(publish_naming_tables(),)) as executor:
+        yield from zip(paths, executor.map(importer.read, paths, chunksize=chunk_size))
+
+
+if __name__ == '__main__':
+    import argparse
+    parser = argparse.ArgumentParser(description="Name the chords of ASCII tablature files")
+    parser.add_argument("paths", nargs="+")
+    parser.add_argument("--tuning", default="E-A-D-G-B-E")
+    parser.add_argument("--processes", type=int, default=None)
+    args = parser.parse_args()
+
+    for path, chords in import_files(args.paths, args.processes, parse_tuning(args.tuning)):
+        print(path)
+        for chord in chords:
+            print(f"  {chord}")
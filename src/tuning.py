@@ -0,0 +1,77 @@
+from note import Note
+
+# tunings per number of strings, lowest string first. Octaves are optional and
+# only needed where the strings are not in descending pitch from the highest one,
+# e.g. re-entrant or paired-course tunings
+NUM_STRINGS_TUNING_MAP = {
+    "4": {
+        "Bass": "E1-A1-D2-G2",
+        "Bass Drop D": "D1-A1-D2-G2",
+        "Ukulele": "G4-C4-E4-A4",
+        "Ukulele Low G": "G3-C4-E4-A4",
+    },
+    "5": {
+        "Bass": "B0-E1-A1-D2-G2",
+        "Banjo Open G": "G4-D3-G3-B3-D4",
+    },
+    "6": {
+        "Standard": "E-A-D-G-B-E",
+        "Drop D": "D-A-D-G-B-E",
+        "Open D": "D-A-D-F#-A-D",
+        "Bass": "B0-E1-A1-D2-G2-C3",
+    },
+    "7": {
+        "Standard": "B-E-A-D-G-B-E",
+        "Drop A": "A-E-A-D-G-B-E",
+    },
+    "8": {
+        "Standard": "F#-B-E-A-D-G-B-E",
+    },
+    "9": {
+        "Standard": "C#-F#-B-E-A-D-G-B-E",
+    },
+    "10": {
+        "Standard": "G#-C#-F#-B-E-A-D-G-B-E",
+    },
+    "11": {
+        "Standard": "D#-G#-C#-F#-B-E-A-D-G-B-E",
+    },
+    "12": {
+        "12-String": "E3-E2-A3-A2-D4-D3-G4-G3-B3-B3-E4-E4",
+    },
+}
+
+
+def parse_tuning(tuning: str) -> list[str]:
+    # "E-A-D-G-B-E (Standard)" -> ["E", "A", "D", "G", "B", "E"]
+    tuning = tuning.split()[0]
+    return [note for note in tuning.split("-")]
+
+
+def string_notes(tuning: list[str]) -> list[Note]:
+    # add the octaves, starting from the highest string, which is in octave 4
+    # if above 'C4' or octave 3 if below it. Every other string without an
+    # explicit octave is the closest one below its higher neighbour
+    notes = []
+    for name in reversed(tuning):
+        note = Note(name)
+        if note.octave < 0:
+            if notes:
+                note = notes[-1].find_below(note)
+            elif name >= 'C':
+                note = Note(name + "4")
+            else:
+                note = Note(name + "3")
+        notes.append(note)
+    notes.reverse()
+    return notes
+
+
+def string_names(tuning: list[str]) -> list[str]:
+    # labels for the strings, without octaves
+    return [Note(name).pitch for name in tuning]
+
+
+def semitones(note: Note) -> int:
+    # absolute pitch, in semitones above C0
+    return note - Note("C0")
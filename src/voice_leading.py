@@ -0,0 +1,120 @@
+from typing import Iterable
+
+import numpy as np
+
+from chord import Chord
+from key import pitch_class
+from tuning import semitones, string_notes
+from voicing import MUTED, MUTE_COST, find_voicings
+
+
+class VoiceLeadingCost():
+    """
+    Default cost model: finger movement between consecutive voicings plus a
+    per-voicing difficulty. Any object with the same two methods can be handed
+    to VoiceLeadingOptimizer instead; both work on (voicings x strings) arrays.
+    """
+
+    def __init__(self, movement_weight: float = 1., difficulty_weight: float = 1.,
+                 mute_cost: int = MUTE_COST) -> None:
+        self.movement_weight = movement_weight
+        self.difficulty_weight = difficulty_weight
+        self.mute_cost = mute_cost
+
+    def difficulty(self, voicings: np.ndarray) -> np.ndarray:
+        fretted = voicings > 0
+        num_fretted = fretted.sum(axis=1)
+        high = np.where(fretted, voicings, 0).max(axis=1)
+        low = np.where(fretted, voicings, np.iinfo(np.int8).max).min(axis=1)
+        low = np.where(num_fretted > 0, low, 0)
+        num_muted = (voicings == MUTED).sum(axis=1)
+        # stretch, fingers, thin voicings and, slightly, the hand position up the neck
+        cost = (high - low) + 0.5 * (num_fretted + num_muted) + 0.1 * low
+        return self.difficulty_weight * cost
+
+    def transition(self, prev: np.ndarray, next: np.ndarray) -> np.ndarray:
+        # (prev x next) matrix of voicing distances, see voicing.voicing_distance
+        a = prev[:, None, :].astype(np.int32)
+        b = next[None, :, :].astype(np.int32)
+        a_muted = a == MUTED
+        b_muted = b == MUTED
+        dist = np.where(a_muted | b_muted, 0, np.abs(a - b))
+        dist += np.where(a_muted != b_muted, self.mute_cost, 0)
+        return self.movement_weight * dist.sum(axis=2)
+
+
+class VoiceLeadingOptimizer():
+    """
+    Picks one voicing per chord so that the summed difficulty and movement
+    over the whole progression is minimal: a Viterbi pass over the lattice of
+    candidate voicings, keeping the beam_width cheapest paths at every step.
+    """
+
+    def __init__(self, tuning: list[str] = ["E", "A", "D", "G", "B", "E"], capo: int = 0,
+                 num_frets: int = 12, max_span: int = 4, beam_width: int = 64,
+                 cost: VoiceLeadingCost | None = None) -> None:
+        self.tuning = tuning
+        self.capo = capo
+        self.open_pitches = [semitones(note) + capo for note in string_notes(tuning)]
+        self.num_frets = num_frets
+        self.max_span = max_span
+        self.beam_width = beam_width
+        self.cost = cost if cost is not None else VoiceLeadingCost()
+        self.candidate_cache = {}
+
+    def candidates(self, chord: str | set | Chord) -> tuple[np.ndarray, np.ndarray]:
+        if not isinstance(chord, Chord):
+            chord = Chord(chord)
+        if not chord.notes:
+            raise ValueError("Empty chord in progression")
+        pcs = frozenset(pitch_class(note) for note in chord.notes)
+        # without octaves there is no lowest note, so the chord is voiced from its root
+        if chord.notes[0].octave >= 0:
+            bass = pitch_class(chord.notes[0])
+        else:
+            bass = pitch_class(chord.variants[0].root)
+
+        key = (pcs, bass)
+        if key not in self.candidate_cache:
+            voicings = find_voicings(pcs, self.open_pitches, bass, self.num_frets, self.max_span)
+            if len(voicings) == 0:
+                # fall back to inversions rather than giving up
+                voicings = find_voicings(pcs, self.open_pitches, -1, self.num_frets, self.max_span)
+            if len(voicings) == 0:
+                raise ValueError(f"No voicing found for {' '.join(str(n) for n in chord.notes)}")
+            self.candidate_cache[key] = (voicings, self.cost.difficulty(voicings))
+        return self.candidate_cache[key]
+
+    def solve(self, progression: Iterable[str | set | Chord]) -> list[tuple[int, ...]]:
+        lattice = [self.candidates(chord) for chord in progression]
+        if not lattice:
+            return []
+
+        voicings, costs = lattice[0]
+        states, costs = self.prune(np.arange(len(voicings)), costs)
+        steps = [(voicings, states, np.zeros(len(states), dtype=int))]
+
+        for next_voicings, difficulty in lattice[1:]:
+            prev_voicings, prev_states, _ = steps[-1]
+            # (beam x candidates) path costs, then the best predecessor per candidate
+            total = costs[:, None] + self.cost.transition(prev_voicings[prev_states], next_voicings)
+            best_prev = np.argmin(total, axis=0)
+            next_costs = total[best_prev, np.arange(len(next_voicings))] + difficulty
+            next_states, costs = self.prune(np.arange(len(next_voicings)), next_costs)
+            steps.append((next_voicings, next_states, best_prev[next_states]))
+
+        # backtrack from the cheapest final state
+        path = []
+        beam_pos = int(np.argmin(costs))
+        for voicings, states, back in reversed(steps):
+            path.append(tuple(int(fret) for fret in voicings[states[beam_pos]]))
+            beam_pos = int(back[beam_pos])
+        path.reverse()
+        return path
+
+    def prune(self, states: np.ndarray, costs: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        if len(states) <= self.beam_width:
+            return states, costs
+        keep = np.argpartition(costs, self.beam_width)[:self.beam_width]
+        keep.sort()
+        return states[keep], costs[keep]
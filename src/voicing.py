@@ -0,0 +1,138 @@
+import numpy as np
+
+from note import Note
+
+# A voicing is a tuple with one fret per string, ordered like the fretboard
+# strings (lowest string first). Muted strings hold MUTED, open strings 0.
+MUTED = -1
+
+# cost, in semitones of finger movement, of playing or muting a string
+MUTE_COST = 2
+
+
+def voicing_from_active_notes(active_notes: dict[int, int], num_strings: int) -> tuple[int, ...]:
+    return tuple(active_notes.get(string, MUTED) for string in range(num_strings))
+
+
+def active_notes_from_voicing(voicing: tuple[int, ...]) -> dict[int, int]:
+    return {string: fret for string, fret in enumerate(voicing) if fret != MUTED}
+
+
+def open_pitch_classes(tuning: list[str]) -> list[int]:
+    notes = [Note(pitch) for pitch in tuning]
+    return [note.check_pitch_ind(note.pitch) for note in notes]
+
+
+def string_mask(voicing: tuple[int, ...]) -> int:
+    mask = 0
+    for string, fret in enumerate(voicing):
+        if fret != MUTED:
+            mask |= 1 << string
+    return mask
+
+
+def pitch_class_mask(voicing: tuple[int, ...], open_pcs: list[int], capo: int = 0) -> int:
+    mask = 0
+    for fret, open_pc in zip(voicing, open_pcs):
+        if fret != MUTED:
+            mask |= 1 << ((open_pc + fret + capo) % 12)
+    return mask
+
+
+# kinds of neck positions, see neck_positions; the higher kind wins
+SCALE_TONE, CHORD_TONE, ROOT_TONE = 1, 2, 3
+
+
+def neck_positions(open_pcs: list[int], num_frets: int, chord_mask: int = 0, scale_mask: int = 0,
+                   root: int = -1, capo: int = 0) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    (frets, strings, kinds) of every position from the open strings up to
+    num_frets that sounds the root, a chord tone (chord_mask) or a scale tone
+    (scale_mask), computed over the whole (frets x strings) pitch matrix at once.
+    """
+    pcs = (np.asarray(open_pcs)[None, :] + capo + np.arange(num_frets + 1)[:, None]) % 12
+    bits = np.left_shift(1, pcs)
+    kinds = np.where(pcs == root, ROOT_TONE,
+                     np.where(bits & chord_mask, CHORD_TONE,
+                              np.where(bits & scale_mask, SCALE_TONE, 0)))
+    frets, strings = np.nonzero(kinds)
+    return frets, strings, kinds[frets, strings]
+
+
+def voicing_distance(v0: tuple[int, ...], v1: tuple[int, ...], mute_cost: int = MUTE_COST) -> int:
+    dist = 0
+    for f0, f1 in zip(v0, v1):
+        if f0 == MUTED and f1 == MUTED:
+            continue
+        elif f0 == MUTED or f1 == MUTED:
+            dist += mute_cost
+        else:
+            dist += abs(f0 - f1)
+    return dist
+
+
+def find_voicings(pitch_classes: set[int], open_pitches: list[int], bass: int = -1,
+                  num_frets: int = 12, max_span: int = 4, max_fingers: int = 4,
+                  min_strings: int = 3, inner_mutes: bool = False) -> np.ndarray:
+    """
+    All playable voicings sounding exactly the given pitch classes, as a
+    (voicings x strings) array sorted lexicographically. open_pitches are the
+    absolute pitches (e.g. semitones above C0) of the open strings, capo
+    included. If bass >= 0, the lowest sounding note must have that pitch class.
+    """
+    chord_mask = 0
+    for pc in pitch_classes:
+        chord_mask |= 1 << (pc % 12)
+    open_pitches = np.asarray(open_pitches)
+    num_strings = len(open_pitches)
+    frets = np.arange(num_frets + 1)
+
+    found = []
+    # each window holds the voicings whose lowest fretted note is on fret `low`,
+    # (low = 0 for open-string only voicings), so windows never overlap
+    for low in range(0, num_frets + 1):
+        high = min(low + max_span - 1, num_frets) if low > 0 else 0
+        rows = np.zeros((1, 0), dtype=np.int8)
+        for pitch in open_pitches:
+            matching = frets[(chord_mask >> ((pitch + frets) % 12)) & 1 == 1]
+            options = [MUTED] + [f for f in matching if f == 0 or low <= f <= high]
+            rows = np.concatenate((
+                np.repeat(rows, len(options), axis=0),
+                np.tile(np.array(options, dtype=np.int8), len(rows))[:, None]
+            ), axis=1)
+            # one finger is always needed on the lowest fret (possibly a barre),
+            # every note above it takes another one
+            rows = rows[(rows > low).sum(axis=1) <= max_fingers - 1]
+            if not inner_mutes and rows.shape[1] > 1:
+                # drop partial voicings as soon as they play again after a muted
+                # string, which keeps the product small on many-string instruments
+                played = rows != MUTED
+                gap = played[:, -1] & ~played[:, -2] & played[:, :-1].any(axis=1)
+                rows = rows[~gap]
+        if low > 0:
+            rows = rows[(rows == low).any(axis=1)]
+        found.append(rows)
+
+    voicings = np.concatenate(found)
+    played = voicings != MUTED
+    voicings = voicings[played.sum(axis=1) >= min_strings]
+    played = voicings != MUTED
+
+    # every pitch class has to be present
+    pcs = (open_pitches + voicings) % 12
+    masks = np.bitwise_or.reduce(np.where(played, 1 << pcs, 0), axis=1)
+    keep = masks == chord_mask
+
+    if not inner_mutes:
+        # no muted string between the lowest and highest played string
+        first = np.argmax(played, axis=1)
+        last = num_strings - 1 - np.argmax(played[:, ::-1], axis=1)
+        keep &= (last - first + 1) == played.sum(axis=1)
+
+    if bass >= 0:
+        pitches = np.where(played, open_pitches + voicings, np.iinfo(np.int32).max)
+        lowest = np.argmin(pitches, axis=1)
+        keep &= (open_pitches[lowest] + voicings[np.arange(len(voicings)), lowest]) % 12 == bass % 12
+
+    voicings = voicings[keep]
+    return voicings[np.lexsort(voicings.T[::-1])]
@@ -0,0 +1,167 @@
+from typing import Iterable
+
+import numpy as np
+
+from voicing import MUTED, MUTE_COST, open_pitch_classes, pitch_class_mask, string_mask
+
+
+class VoicingBucket():
+    """
+    All indexed voicings that play the same set of strings. Rows are sorted by
+    their fret sum, which is their L1 distance to the open-string pivot, so a
+    distance query only has to look at a contiguous window of rows.
+    """
+
+    def __init__(self, mask: int, frets: np.ndarray, ids: np.ndarray, pc_masks: np.ndarray) -> None:
+        self.mask = mask
+        self.strings = [s for s in range(frets.shape[1]) if mask & (1 << s)]
+        sums = frets[:, self.strings].sum(axis=1, dtype=np.int32)
+        order = np.argsort(sums, kind="stable")
+        self.frets = frets[order]
+        self.ids = ids[order]
+        self.pc_masks = pc_masks[order]
+        self.sums = sums[order]
+        self.max_fret = int(self.frets[:, self.strings].max()) if self.strings else 0
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+
+class VoicingIndex():
+    """
+    Precomputed index over a voicing library, answering "similar voicing"
+    queries without scanning the whole library. Voicings are bucketed by played
+    strings and by pitch-class mask, and each string bucket is ordered by fret
+    sum to bound the voice-leading distance from below.
+    """
+
+    def __init__(self, tuning: list[str] = ["E", "A", "D", "G", "B", "E"], capo: int = 0,
+                 mute_cost: int = MUTE_COST) -> None:
+        self.tuning = tuning
+        self.num_strings = len(tuning)
+        self.open_pcs = open_pitch_classes(tuning)
+        self.capo = capo
+        self.mute_cost = mute_cost
+        self.frets = np.zeros((0, self.num_strings), dtype=np.int8)
+        self.pc_masks = np.zeros(0, dtype=np.int16)
+        self.pending = []
+        self.buckets = {}
+        self.pitch_class_buckets = {}
+
+    def __len__(self) -> int:
+        return len(self.frets) + len(self.pending)
+
+    def __getitem__(self, voicing_id: int) -> tuple[int, ...]:
+        self.build()
+        return tuple(int(fret) for fret in self.frets[voicing_id])
+
+    def add(self, voicing: tuple[int, ...]) -> int:
+        if len(voicing) != self.num_strings:
+            raise ValueError(f"Voicing {voicing} does not have {self.num_strings} strings")
+        self.pending.append(tuple(voicing))
+        return len(self) - 1
+
+    def extend(self, voicings: Iterable[tuple[int, ...]] | np.ndarray) -> None:
+        if isinstance(voicings, np.ndarray):
+            self.build(voicings)
+        else:
+            for voicing in voicings:
+                self.add(voicing)
+
+    def build(self, frets: np.ndarray | None = None) -> None:
+        chunks = [self.frets]
+        if self.pending:
+            chunks.append(np.asarray(self.pending, dtype=np.int8))
+            self.pending = []
+        if frets is not None:
+            chunks.append(frets.astype(np.int8).reshape(-1, self.num_strings))
+        if len(chunks) == 1:
+            return
+        self.frets = np.concatenate(chunks)
+
+        played = self.frets != MUTED
+        string_masks = played @ (1 << np.arange(self.num_strings))
+        pcs = (np.array(self.open_pcs) + self.frets + self.capo) % 12
+        self.pc_masks = np.bitwise_or.reduce(
+            np.where(played, 1 << pcs, 0), axis=1).astype(np.int16)
+
+        # group by string mask
+        ids = np.arange(len(self.frets))
+        order = np.argsort(string_masks, kind="stable")
+        masks, starts = np.unique(string_masks[order], return_index=True)
+        ends = list(starts[1:]) + [len(order)]
+        self.buckets = {}
+        for mask, start, end in zip(masks, starts, ends):
+            rows = order[start:end]
+            self.buckets[int(mask)] = VoicingBucket(
+                int(mask), self.frets[rows], ids[rows], self.pc_masks[rows])
+
+        # group by pitch-class mask
+        order = np.argsort(self.pc_masks, kind="stable")
+        masks, starts = np.unique(self.pc_masks[order], return_index=True)
+        ends = list(starts[1:]) + [len(order)]
+        self.pitch_class_buckets = {
+            int(mask): order[start:end] for mask, start, end in zip(masks, starts, ends)
+        }
+
+    def similar(self, voicing: tuple[int, ...], max_distance: int,
+                same_chord: bool = False) -> list[tuple[int, tuple[int, ...]]]:
+        """
+        Voicings within max_distance semitones of total finger movement, as
+        (distance, voicing) pairs sorted by distance. With same_chord only
+        voicings sounding the same pitch classes are returned.
+        """
+        self.build()
+        query = np.array(voicing, dtype=np.int32)
+        query_mask = string_mask(voicing)
+        query_pcs = pitch_class_mask(voicing, self.open_pcs, self.capo)
+
+        found_dists = []
+        found_ids = []
+        for mask, bucket in self.buckets.items():
+            # strings played in only one of both voicings cost mute_cost each
+            base = (mask ^ query_mask).bit_count() * self.mute_cost
+            if base > max_distance:
+                continue
+            common = [s for s in bucket.strings if query_mask & (1 << s)]
+            extra = (mask & ~query_mask).bit_count()
+            budget = max_distance - base
+            # the fret sum over the common strings must be within the remaining
+            # budget; frets on strings the query does not play widen the window
+            query_sum = int(query[common].sum())
+            lo = np.searchsorted(bucket.sums, query_sum - budget, "left")
+            hi = np.searchsorted(bucket.sums, query_sum + budget + extra * bucket.max_fret, "right")
+            if lo >= hi:
+                continue
+            window = bucket.frets[lo:hi, common].astype(np.int32)
+            dists = base + np.abs(window - query[common]).sum(axis=1)
+            selected = dists <= max_distance
+            if same_chord:
+                selected &= bucket.pc_masks[lo:hi] == query_pcs
+            found_dists.append(dists[selected])
+            found_ids.append(bucket.ids[lo:hi][selected])
+
+        if not found_ids:
+            return []
+        dists = np.concatenate(found_dists)
+        ids = np.concatenate(found_ids)
+        order = np.lexsort((ids, dists))
+        return [(int(dists[i]), self[int(ids[i])]) for i in order]
+
+    def sharing_strings(self, strings: Iterable[int], limit: int | None = None) -> list[tuple[int, ...]]:
+        self.build()
+        needed = 0
+        for string in strings:
+            needed |= 1 << string
+        ids = [bucket.ids for mask, bucket in sorted(self.buckets.items())
+               if mask & needed == needed]
+        if not ids:
+            return []
+        ids = np.sort(np.concatenate(ids))[:limit]
+        return [self[int(i)] for i in ids]
+
+    def with_pitch_classes(self, voicing: tuple[int, ...], limit: int | None = None) -> list[tuple[int, ...]]:
+        self.build()
+        pc_mask = pitch_class_mask(voicing, self.open_pcs, self.capo)
+        ids = self.pitch_class_buckets.get(pc_mask, [])[:limit]
+        return [self[int(i)] for i in ids]
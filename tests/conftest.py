@@ -1,8 +1,14 @@
+import os
 import sys
+import tempfile
 import os.path as osp
 
 # Make sure that the application source directory (this directory's parent) is
 # on sys.path.
 print("opa")
 here = osp.join(osp.dirname(osp.abspath(__file__)), osp.pardir, "src")
-sys.path.insert(0, here)
\ No newline at end of file
+sys.path.insert(0, here)
+
+# the command line and the service share a persistent analysis cache, keep the
+# one of the test session away from the user's
+os.environ.setdefault("PYCHORDWIZARD_CACHE", osp.join(tempfile.mkdtemp(), "analysis.sqlite3"))
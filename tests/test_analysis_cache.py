@@ -0,0 +1,78 @@
+import asyncio
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from src.analysis_cache import AnalysisCache, analyse_notes, cache_key
+from src.chord_service import ChordService
+from src.pychordwizard import name_record
+
+CHORDS = ["C3 E3 G3", "A2 C3 E3", "G2 B2 D3 F3", "D3 F#3 A3", "E2 B2 E3 G#3", "F2 A2 C3 E3"]
+
+
+def fill(path: str, notes: list[str]) -> list[dict]:
+    cache = AnalysisCache(path)
+    return [cache.analyse(n) for n in notes]
+
+
+def test_analyse(tmp_path) -> None:
+    path = str(tmp_path / "cache.sqlite3")
+    cache = AnalysisCache(path)
+    result = cache.analyse("G3 E3 C3")
+    assert (result == analyse_notes("C3 E3 G3") and result["name"] == "C" and result["root"] == 0)
+    # the note set is the key, and another session finds it
+    assert (AnalysisCache(path).get("C3 G3 E3") == result)
+    assert (cache.hits == 0 and cache.misses == 1)
+    cache.analyse("C3 E3 G3")
+    assert (cache.hits == 1 and len(cache) == 1)
+
+
+def test_versions(tmp_path) -> None:
+    path = str(tmp_path / "cache.sqlite3")
+    old = AnalysisCache(path, version="old")
+    old.analyse("C3 E3 G3")
+    new = AnalysisCache(path, version="new")
+    # opening with other rules empties the cache
+    assert (len(new) == 0 and new.get("C3 E3 G3") is None)
+    # and what a process with the old rules still writes is never read
+    old.analyse("A2 C3 E3")
+    assert (new.get("A2 C3 E3") is None)
+
+
+def test_eviction(tmp_path) -> None:
+    cache = AnalysisCache(str(tmp_path / "cache.sqlite3"), max_entries=3, touch_interval=0., evict_every=1)
+    for notes in CHORDS[:3]:
+        cache.analyse(notes)
+    # reading the first one makes the second one the least recently used
+    cache.get(CHORDS[0])
+    cache.analyse(CHORDS[3])
+    assert (len(cache) == 3)
+    assert (cache.get(CHORDS[1]) is None and cache.get(CHORDS[0]) is not None)
+
+
+def test_processes(tmp_path) -> None:
+    path = str(tmp_path / "cache.sqlite3")
+    # overlapping note sets written from four processes at once
+    with ProcessPoolExecutor(4) as executor:
+        results = list(executor.map(fill, [path] * 4, [CHORDS[i:] + CHORDS[:i] for i in range(4)]))
+    assert (len(AnalysisCache(path)) == len(CHORDS))
+    assert (results[1][0] == results[0][1] == analyse_notes(CHORDS[1]))
+
+
+def test_users(tmp_path) -> None:
+    cache = AnalysisCache(str(tmp_path / "cache.sqlite3"))
+    cache.analyse("C E G Bb")
+
+    async def main():
+        service = ChordService(store=cache)
+        await service.start()
+        results = await asyncio.gather(service.lookup("Bb G E C"), service.lookup("A C E"))
+        await service.stop()
+        return results
+    stored, named = asyncio.run(main())
+    # the service reuses the stored analysis, and stores its own
+    assert (stored["name"] == "C7" and named["name"] == "Am")
+    assert (cache.get("A C E") == named)
+    # the command line uses the cache of the session (see conftest)
+    assert (name_record("C3 E3 G3")["name"] == "C")
+    assert (AnalysisCache(os.environ["PYCHORDWIZARD_CACHE"]).get("G3 E3 C3") is not None)
+    assert (cache_key("G E C") == "C E G")
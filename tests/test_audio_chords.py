@@ -0,0 +1,92 @@
+import time
+import wave
+
+import numpy as np
+from src.audio_chords import ChromaChordRecognizer, WavReader, recognize_files
+
+SAMPLE_RATE = 22050
+
+
+def tone(midi_notes: list[int], duration: float) -> np.ndarray:
+    t = np.arange(int(duration * SAMPLE_RATE)) / SAMPLE_RATE
+    signal = np.zeros_like(t)
+    for midi in midi_notes:
+        freq = 440. * 2 ** ((midi - 69) / 12.)
+        signal += np.sin(2 * np.pi * freq * t)
+    return signal / len(midi_notes)
+
+
+def write_wav(path, signal: np.ndarray, sample_width: int = 2, channels: int = 1) -> None:
+    full_scale = (1 << (8 * sample_width - 1)) - 1
+    samples = np.round(signal * 0.5 * full_scale).astype("<i4")
+    samples = np.repeat(samples[:, None], channels, axis=1)
+    raw = samples.view(np.uint8).reshape(-1, channels, 4)[:, :, :sample_width]
+    with wave.open(str(path), "wb") as w:
+        w.setnchannels(channels)
+        w.setsampwidth(sample_width)
+        w.setframerate(SAMPLE_RATE)
+        w.writeframes(raw.tobytes())
+
+
+def song() -> np.ndarray:
+    # C - G - Am, with the root doubled in the bass
+    return np.concatenate((
+        tone([48, 60, 64, 67], 1.5),
+        tone([43, 62, 67, 71], 1.5),
+        tone([45, 60, 64, 69], 1.5),
+    ))
+
+
+def test_wav_reader(tmp_path) -> None:
+    path = tmp_path / "stereo.wav"
+    write_wav(path, song(), channels=2)
+    reader = WavReader(str(path))
+    assert (reader.sample_rate == SAMPLE_RATE)
+    assert (reader.channels == 2)
+    chunks = list(reader.chunks(10000))
+    assert (sum(len(chunk) for chunk in chunks) == reader.num_frames)
+    assert (max(len(chunk) for chunk in chunks) == 10000)
+
+
+def test_recognize(tmp_path) -> None:
+    path = tmp_path / "song.wav"
+    write_wav(path, song())
+    segments = ChromaChordRecognizer().recognize(str(path))
+    assert ([segment.name for segment in segments] == ["C", "G", "Am"])
+    assert (abs(segments[1].start - 1.5) < 0.2)
+    assert (abs(segments[2].start - 3.0) < 0.2)
+
+
+def test_recognize_24bit(tmp_path) -> None:
+    path = tmp_path / "song24.wav"
+    write_wav(path, song(), sample_width=3)
+    segments = ChromaChordRecognizer().recognize(str(path))
+    assert ([segment.name for segment in segments] == ["C", "G", "Am"])
+
+
+def test_recognize_silence(tmp_path) -> None:
+    path = tmp_path / "silence.wav"
+    write_wav(path, np.zeros(SAMPLE_RATE))
+    assert (ChromaChordRecognizer().recognize(str(path)) == [])
+
+
+def test_faster_than_real_time(tmp_path) -> None:
+    path = tmp_path / "long.wav"
+    signal = np.tile(song(), 4)
+    write_wav(path, signal)
+    start = time.perf_counter()
+    ChromaChordRecognizer().recognize(str(path))
+    elapsed = time.perf_counter() - start
+    assert (elapsed < 0.5 * len(signal) / SAMPLE_RATE)
+
+
+def test_recognize_files(tmp_path) -> None:
+    paths = []
+    for i in range(2):
+        path = tmp_path / f"song{i}.wav"
+        write_wav(path, song())
+        paths.append(str(path))
+    results = recognize_files(paths, processes=2)
+    assert ([path for path, _ in results] == paths)
+    for _, segments in results:
+        assert ([segment.name for segment in segments] == ["C", "G", "Am"])
@@ -94,7 +94,42 @@ def test_sevenths():
 
 
 def test_extensions():
-    pass
+    test_array = [
+        ["C E G D", "Cadd9"],
+        ["C Eb G D", "Cmadd9"],
+        ["C E G F#", "C(add#11)"],
+        ["C E G Bb D", "C9"],
+        ["C E G Bb Db", "C7b9"],
+        ["C E G B D", "Cmaj9"],
+        ["C E G Bb D A", "C13"],
+        ["C E G Bb F#", "C7#11"],
+    ]
+    for t in test_array:
+        assert (str(Chord(t[0])) == t[1])
+
+
+def test_lazy_variants():
+    chord = Chord("E3 G3 C4")
+    # no per-instance dicts, no names formatted before they are asked for
+    assert (all(not hasattr(variant, "__dict__") for variant in chord.variants))
+    assert (all(variant.formatted is None for variant in chord.variants))
+    top = chord.variants[0]
+    assert (str(top) == "C/E" and top.name_complete == "C major over E")
+    assert (chord.variants[1].formatted is None)
+    # variants share the chord's notes
+    assert ([str(note) for note in top.notes] == ["C4", "E3", "G3"])
+    assert (all(variant.chord_notes is chord.notes for variant in chord.variants))
+    assert (top.triad == ("major",) and top.seventh == () and top.extensions == ())
+
+
+def test_doubled_notes():
+    doubled = Chord("C3 E3 G3 C4 E4 G4")
+    single = Chord("C3 E3 G3")
+    # one variant per pitch class, rooted at its lowest note
+    assert (len(doubled.variants) == 3 and len(doubled.notes) == 6)
+    assert ([str(v) for v in doubled.variants] == [str(v) for v in single.variants])
+    assert ([str(v.root) for v in doubled.variants] == ["C3", "E3", "G3"])
+    assert (doubled.pc_mask == (1 << 0) | (1 << 4) | (1 << 7))
 
 
 if __name__ == "__main__":
@@ -0,0 +1,50 @@
+import time
+
+import numpy as np
+import pytest
+
+from src.chord import Chord
+from src.chord_accessor import ChordNamer, mask_notes, name_column
+
+C_MAJOR = (1 << 0) | (1 << 4) | (1 << 7)
+
+
+def test_mask_notes():
+    assert (mask_notes(C_MAJOR) == "C E G")
+    assert (mask_notes(0) == "")
+
+
+def test_name_column():
+    values = ["C3 E3 G3", "G3 E3 C3", None, "A2 C3 E3 G3", "C3 E3 G3", float("nan"), "C E"]
+    names = name_column(values)
+    assert (names.tolist() == ["C", "C", "", "Am7", "C", "", str(Chord("C E"))])
+    assert (name_column(values, "quality").tolist()[:4] == ["major", "major", "", "minor seventh"])
+    assert (name_column(values, "root").tolist()[3] == "A")
+    # bitmask columns
+    masks = np.array([C_MAJOR, C_MAJOR << 2, 0], dtype=np.int64)
+    assert (name_column(masks).tolist() == ["C", "D", ""])
+
+
+def test_chunks():
+    values = ["C E G", "D F A", "C E G Bb", None] * 10
+    namer = ChordNamer()
+    # the same result whatever the chunk size, and each chord named once
+    assert (namer.column(values, chunk_size=3).tolist() == name_column(values).tolist())
+    assert (len(namer.cache) == 3)
+
+
+def test_speed():
+    values = np.array(["C3 E3 G3", "A2 C3 E3", "G2 B2 D3 F3", "D3 F#3 A3"] * 50000, dtype=object)
+    start = time.perf_counter()
+    names = name_column(values, chunk_size=65536)
+    assert (time.perf_counter() - start < 2.)
+    assert (names[-1] == "D" and names[2] == "G7")
+
+
+def test_accessor():
+    pd = pytest.importorskip("pandas")
+    df = pd.DataFrame({"notes": ["C E G", "A C E", None, "C E G"]}, index=[10, 11, 12, 13])
+    names = df["notes"].chord.name()
+    assert (names.tolist() == ["C", "Am", "", "C"])
+    assert (names.index.tolist() == [10, 11, 12, 13])
+    assert (df["notes"].chord.quality().tolist()[1] == "minor")
@@ -0,0 +1,34 @@
+import itertools
+
+from src.chord_corpus import CORPUS_VERSION, GOLDEN_PATH, compare, corpus, \
+    load_golden, name_corpus, spellings
+
+# the full corpus is checked by running chord_corpus.py; the test suite checks
+# every STRIDE-th entry to stay fast
+STRIDE = 8
+
+
+def test_spellings() -> None:
+    c_major = (1 << 0) | (1 << 4) | (1 << 7)
+    assert (spellings(c_major, 0) == ["C3 E3 G3", "C2 E3 G4", "C3 E3 G3 C4 E4 G4"])
+    assert (spellings(c_major, 7) == ["G3 C4 E4", "G2 C4 E5", "G3 C4 E4 G4 C5 E5"])
+
+
+def test_corpus_size() -> None:
+    entries = list(corpus())
+    assert (len(entries) == len(set(notes for _, notes in entries)))
+    assert (set(size for size, _ in entries) == set(range(1, 13)))
+    # one entry without octaves per set, plus two or three spellings per bass
+    assert (sum(1 for size, _ in entries if size == 12) == 1 + 2 * 12)
+
+
+def test_golden() -> None:
+    golden = load_golden(GOLDEN_PATH)
+    assert (len(golden) == len(list(corpus())))
+    entries = list(itertools.islice(corpus(), 0, None, STRIDE))
+    names, throughput = name_corpus(entries)
+    assert (sum(count for count, _ in throughput.values()) == len(entries))
+    sampled = {notes: golden[notes] for _, notes in entries}
+    diffs = compare(sampled, names)
+    assert (diffs == []), f"{len(diffs)} naming differences against corpus v{CORPUS_VERSION}, " \
+        f"e.g. {diffs[:5]}"
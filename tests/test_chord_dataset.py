@@ -0,0 +1,54 @@
+import io
+import os
+
+from src.chord import Chord
+from src.chord_dataset import MANIFEST, generate, read_chunk, voicing_name
+from src.note import Note
+
+
+def run(out_dir, **kwargs) -> dict:
+    # a single user tuning keeps the dataset small
+    options = dict(extra_tunings=["G-D-G-B-D"], strings=[], capos=1, num_frets=5, processes=1,
+                   progress=io.StringIO())
+    options.update(kwargs)
+    return generate(str(out_dir), **options)
+
+
+def test_voicing_name():
+    for pitches in [[40, 47, 52, 56, 59, 64], [45, 52, 57, 60, 64], [43, 47, 50, 53, 55, 59], [40, 43, 48]]:
+        for shift in range(12):
+            shifted = [pitch + shift for pitch in pitches]
+            notes = set(Note(f"{Note.PITCHES_SHARP[p % 12]}{p // 12}") for p in shifted)
+            assert (voicing_name(shifted) == str(Chord(notes)))
+
+
+def test_generate(tmp_path):
+    manifest = run(tmp_path)
+    assert (len(manifest["chunks"]) == 12)
+    assert (not os.path.exists(tmp_path / "checkpoint.json"))
+    rows = list(read_chunk(str(tmp_path / manifest["chunks"][7]["file"])))
+    assert (len(rows) == manifest["chunks"][7]["rows"])
+    # the shapes over G, with and without capo
+    assert ({row["capo"] for row in rows} == {0, 1})
+    assert ({row["root"] for row in rows} == {"G", "G#"})
+    open_g = [row for row in rows if row["voicing"] == "0,0,0,0,0" and row["capo"] == 0]
+    assert ([row["name"] for row in open_g] == ["G"])
+    capo = [row for row in rows if row["voicing"] == "0,0,0,0,0" and row["capo"] == 1]
+    assert ([row["name"] for row in capo] == ["G#"])
+
+
+def test_resume(tmp_path):
+    manifest = run(tmp_path)
+    os.remove(tmp_path / manifest["chunks"][3]["file"])
+    progress = io.StringIO()
+    resumed = run(tmp_path, progress=progress)
+    assert ("11 of 12 chunks already done" in progress.getvalue())
+    assert ("[1/1]" in progress.getvalue())
+    # the same bytes, so reruns diff cleanly
+    assert (resumed == manifest)
+    # another configuration starts over
+    progress = io.StringIO()
+    other = run(tmp_path, capos=0, progress=progress)
+    assert ("[12/12]" in progress.getvalue())
+    assert (other["chunks"][3]["rows"] < manifest["chunks"][3]["rows"])
+    assert (sorted(os.listdir(tmp_path)) == sorted([MANIFEST] + [chunk["file"] for chunk in other["chunks"]]))
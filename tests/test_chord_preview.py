@@ -0,0 +1,78 @@
+import time
+
+import numpy as np
+from src.audio_chords import WavReader
+from src.chord_preview import ChordPreview, voicing_frequencies
+from src.voicing import MUTED
+
+X = MUTED
+STANDARD = ["E", "A", "D", "G", "B", "E"]
+
+
+def peak_frequency(samples: np.ndarray, sample_rate: int) -> float:
+    spectrum = np.abs(np.fft.rfft(samples))
+    return np.fft.rfftfreq(len(samples), 1. / sample_rate)[spectrum.argmax()]
+
+
+def test_frequencies() -> None:
+    # open A string, and the same note on the low E string with a capo
+    assert (voicing_frequencies((X, 0, X, X, X, X), STANDARD) == [(1, 110.)])
+    assert (voicing_frequencies((3, X, X, X, X, X), STANDARD, capo=2) == [(0, 110.)])
+    assert ([round(freq, 2) for _, freq in voicing_frequencies((0, 2, 2, 1, 0, 0), STANDARD)] ==
+            [82.41, 123.47, 164.81, 207.65, 246.94, 329.63])
+
+
+def test_render() -> None:
+    preview = ChordPreview(duration=1.)
+    samples = preview.render((X, 0, X, X, X, X), STANDARD)
+    assert (samples.dtype == np.float32 and len(samples) == preview.sample_rate)
+    assert (abs(peak_frequency(samples, preview.sample_rate) - 110.) < 2.)
+    assert (0.85 < np.abs(samples).max() <= 0.9 + 1e-6)
+    # the sound decays
+    assert (np.abs(samples[-2000:]).max() < 0.5 * np.abs(samples[:2000]).max())
+    # no strings, no sound
+    assert (not preview.render((X,) * 6, STANDARD).any())
+
+
+def test_strum() -> None:
+    preview = ChordPreview(duration=0.5, strum=0.05)
+    both = preview.render((X, X, X, X, 0, 0), STANDARD)
+    low = preview.render((X, X, X, X, 0, X), STANDARD)
+    # the high E enters 50 ms after the B: up to then only the B sounds
+    onset = int(0.05 * preview.sample_rate)
+    ratio = both[:onset] / np.where(low[:onset] == 0, 1, low[:onset])
+    assert (np.allclose(ratio[100:], ratio[100], rtol=1e-3))
+    assert (not np.allclose(both[onset + 100:onset + 400] / ratio[100], low[onset + 100:onset + 400], atol=1e-3))
+
+
+def test_cache() -> None:
+    preview = ChordPreview(duration=0.2, cache_size=2)
+    c_major = preview.render((X, 3, 2, 0, 1, 0), STANDARD)
+    assert (preview.render((X, 3, 2, 0, 1, 0), STANDARD) is c_major)
+    assert (not c_major.flags.writeable)
+    # the capo and the tuning are part of the key
+    assert (preview.render((X, 3, 2, 0, 1, 0), STANDARD, capo=2) is not c_major)
+    preview.render((X, 3, 2, 0, 1, 0), ["D", "A", "D", "G", "B", "E"])
+    # the least recently used buffer was evicted
+    assert (len(preview.cache) == 2)
+    assert (((X, 3, 2, 0, 1, 0), tuple(STANDARD), 0) not in preview.cache)
+
+
+def test_speed() -> None:
+    preview = ChordPreview()
+    preview.render((0, 2, 2, 1, 0, 0), STANDARD)
+    start = time.perf_counter()
+    for fret in range(1, 11):
+        preview.render((fret, fret + 2, fret + 2, fret + 1, fret, fret), STANDARD)
+    # milliseconds per 1.5 s, six string buffer
+    assert ((time.perf_counter() - start) / 10 < 0.02)
+
+
+def test_save(tmp_path) -> None:
+    preview = ChordPreview(duration=0.5)
+    path = preview.save(str(tmp_path / "e.wav"), (0, 2, 2, 1, 0, 0), STANDARD)
+    reader = WavReader(path)
+    assert (reader.sample_rate == preview.sample_rate and reader.channels == 1)
+    samples = np.concatenate(list(reader.chunks(4096))) / 32767
+    assert (len(samples) == len(preview.render((0, 2, 2, 1, 0, 0), STANDARD)))
+    assert (np.abs(samples - preview.render((0, 2, 2, 1, 0, 0), STANDARD)).max() < 1e-3)
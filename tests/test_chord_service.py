@@ -0,0 +1,84 @@
+import asyncio
+import json
+
+from src.chord_service import ChordService, ChordServiceClient, ChordServiceError, cache_key
+
+
+def run(coroutine):
+    return asyncio.run(coroutine)
+
+
+def test_cache_key():
+    assert (cache_key("G E  C") == cache_key("C E G"))
+
+
+def test_name():
+    async def main():
+        service = ChordService()
+        await service.start()
+        host, port = service.address()[:2]
+        client = ChordServiceClient()
+        await client.connect(host, port)
+        c = await client.name("C E G")
+        many = await client.name_many(["A C E", "G E C", "C E G Bb"])
+        metrics = await client.metrics()
+        await client.close()
+        await service.stop()
+        return c, many, metrics
+    c, many, metrics = run(main())
+    assert (c["name"] == "C" and c["names"][0] == "C")
+    assert ([result["name"] for result in many] == ["Am", "C", "C7"])
+    # "G E C" is the cached "C E G"
+    assert (metrics["cache_hits"] == 1)
+    assert (metrics["requests"] == 3)
+
+
+def test_batching():
+    async def main():
+        service = ChordService(batch_delay=0.01)
+        await service.start()
+        host, port = service.address()[:2]
+        clients = [ChordServiceClient() for _ in range(4)]
+        for client in clients:
+            await client.connect(host, port)
+        notes = [f"C{octave} E{octave} G{octave}" for octave in range(8)]
+        results = await asyncio.gather(*[clients[i % 4].name(n) for i, n in enumerate(notes * 2)])
+        metrics = await clients[0].metrics()
+        for client in clients:
+            await client.close()
+        await service.stop()
+        return results, metrics
+    results, metrics = run(main())
+    assert (all(result["name"] == "C" for result in results))
+    # concurrent requests are named together, duplicates only once
+    assert (metrics["batches"] < 8)
+    assert (metrics["mean_batch_size"] > 1)
+    assert (metrics["latency_max"] >= metrics["latency_p50"] > 0)
+
+
+def test_errors(tmp_path):
+    async def main():
+        service = ChordService()
+        path = str(tmp_path / "chords.sock")
+        await service.start(path=path)
+        client = ChordServiceClient()
+        await client.connect(path=path)
+        errors = []
+        for method, params in [("nope", None), ("name", {"notes": 3})]:
+            try:
+                await client.call(method, params)
+            except ChordServiceError as e:
+                errors.append(e.code)
+        # malformed lines get a parse error and the connection stays usable
+        reader, writer = await asyncio.open_unix_connection(path)
+        writer.write(b"{not json\n")
+        parse_error = json.loads(await reader.readline())
+        writer.close()
+        pong = await client.call("ping")
+        await client.close()
+        await service.stop()
+        return errors, parse_error, pong
+    errors, parse_error, pong = run(main())
+    assert (errors == [-32601, -32602])
+    assert (parse_error["error"]["code"] == -32700)
+    assert (pong == "pong")
@@ -0,0 +1,61 @@
+from src.chord import Chord
+from src.chord_templates import ChordTemplate, ChordTemplateLibrary, default_library, interval_mask, rotate
+
+
+def test_interval_mask():
+    assert (interval_mask(["3", "5"]) == (1 << 4) | (1 << 7))
+    # the root is implied and enharmonic names share a bit
+    assert (interval_mask([0, "b3", "#9"]) == 1 << 3)
+    # C E G as an interval mask above E
+    assert (rotate(0b10010001, 4) == interval_mask(["b3", "b6"]) | 1)
+
+
+def test_match():
+    library = default_library()
+    template, score, extras = library.match(interval_mask(["3", "5", "b7"]) | 1)
+    assert (template.symbol == "7" and extras == 0)
+    template, _, extras = library.match(interval_mask(["3", "5", "#11"]) | 1)
+    assert (template.symbol == "" and library.extension_names(template, extras) == ["add#11"])
+    # a lonely root matches nothing
+    assert (library.match(1) is None)
+
+
+def test_match_roots():
+    # A C E G: Am7 over A, C6 over C, nothing over the missing roots
+    pc_mask = (1 << 9) | (1 << 0) | (1 << 4) | (1 << 7)
+    matches = default_library().match_roots(pc_mask)
+    assert (matches[9][0].symbol == "m7")
+    assert (matches[0][0].symbol == "6")
+    assert (matches[2] is None)
+
+
+def test_table_matches_scan():
+    # the lookup table agrees with scoring every template directly
+    library = default_library()
+    for mask in range(1, 1 << 12, 2):
+        best = None
+        for template in library.templates:
+            if mask & template.required != template.required or mask & template.forbidden:
+                continue
+            extras = mask & ~(template.required | template.optional) & 0xFFE
+            score = template.weight + 0.01 * template.required.bit_count() - \
+                library.extra_penalty * extras.bit_count()
+            if best is None or score > best:
+                best = score
+        match = library.match(mask)
+        assert ((match is None and best is None) or match[1] == best)
+
+
+def test_custom_template():
+    library = ChordTemplateLibrary.load()
+    mask = interval_mask(["4", "5", "b7", "9", "13"]) | 1
+    assert (library.match(mask)[0].symbol != "13sus4")
+    library.add(ChordTemplate("13sus4", "dominant thirteenth suspended fourth",
+                              ["4", "b7", "13"], ["5", "9"], ["3", "b3"], weight=9))
+    assert (library.match(mask)[0].symbol == "13sus4")
+
+
+def test_slash_names():
+    assert (str(Chord("E3 G3 C4")) == "C/E")
+    assert (str(Chord("A2 C3 E3 G3")) == "Am7")
+    assert (str(Chord("C3 A3 E4 G4")) == "C6")
@@ -0,0 +1,59 @@
+import os
+
+import pytest
+
+pytest.importorskip("PyQt5")
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from src.diagram_renderer import Diagram, DiagramRenderer, render_diagrams  # noqa: E402
+from src.voicing import MUTED  # noqa: E402
+
+X = MUTED
+
+
+@pytest.fixture(scope="module")
+def renderer() -> DiagramRenderer:
+    return DiagramRenderer()
+
+
+def test_set_diagram(renderer) -> None:
+    renderer.setDiagram(Diagram((X, 3, 2, 0, 1, 0)))
+    assert (renderer.view.fret_start == 0)
+    assert (renderer.view.voicing() == (X, 3, 2, 0, 1, 0))
+    # shapes up the neck are moved so that they fit the diagram
+    renderer.setDiagram(Diagram((8, 10, 10, 9, 8, 8), barres=[(8, (0, 5))]))
+    assert (renderer.view.fret_start == 7)
+    assert (renderer.view.voicing() == (1, 3, 3, 2, 1, 1))
+    assert (list(renderer.view.barre_items[1]) == [(0, 5)])
+    # and the view is reused, not rebuilt
+    renderer.setDiagram(Diagram((X, 0, 2, 2, 1, 0)))
+    assert (renderer.view.voicing() == (X, 0, 2, 2, 1, 0))
+    assert (renderer.view.barre_items == {})
+
+
+def test_render(renderer) -> None:
+    image = renderer.render((X, 3, 2, 0, 1, 0))
+    assert (image.width() == renderer.width)
+    assert (image is renderer.render({"voicing": (X, 0, 2, 2, 1, 0), "name": "Am"}))
+
+
+def test_save(renderer, tmp_path) -> None:
+    png = renderer.save(Diagram((X, 3, 2, 0, 1, 0), "C"), str(tmp_path / "c.png"))
+    svg = renderer.save(Diagram((X, 3, 2, 0, 1, 0), "C"), str(tmp_path / "c.svg"))
+    assert (os.path.getsize(png) > 0)
+    with open(svg) as f:
+        assert ("<svg" in f.read())
+    sheet = renderer.saveSheet([(X, 3, 2, 0, 1, 0)] * 5, str(tmp_path / "sheet.png"), columns=2)
+    from PyQt5.QtGui import QImage
+    image = QImage(sheet)
+    assert ((image.width(), image.height()) == (2 * renderer.width, 3 * renderer.height))
+
+
+def test_render_diagrams(tmp_path) -> None:
+    voicings = [(X, 3, 2, 0, 1, fret) for fret in range(4)]
+    paths = render_diagrams(voicings, str(tmp_path), processes=1)
+    assert ([os.path.basename(path) for path in paths] ==
+            ["00000.png", "00001.png", "00002.png", "00003.png"])
+    assert (all(os.path.getsize(path) > 0 for path in paths))
+    paths = render_diagrams(voicings, str(tmp_path / "pool"), fmt="svg", processes=2, batch_size=2)
+    assert (len(paths) == 4 and all(os.path.exists(path) for path in paths))
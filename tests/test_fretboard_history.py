@@ -0,0 +1,60 @@
+from src.fretboard_history import FretboardHistory, FretboardState
+from src.voicing import MUTED
+
+X = MUTED
+
+
+def test_state_sharing():
+    empty = FretboardState.empty(6)
+    state = empty.with_note(1, 3)
+    assert (state.notes == (X, 3, X, X, X, X))
+    assert (empty.notes == (X,) * 6)
+    # unchanged parts are shared, no-op edits return the same state
+    assert (state.barres is empty.barres)
+    assert (state.with_note(1, 3) is state)
+    barred = state.with_barre(1, (5, 0))
+    assert (barred.barres == ((1, (0, 5)),))
+    assert (barred.notes is state.notes)
+    assert (barred.without_barre(1, (0, 5)) == state)
+
+
+def test_diff():
+    a = FretboardState((X, 3, 2, 0, 1, 0))
+    b = FretboardState((X, 3, 2, 0, 1, 3), ((1, (0, 4)),))
+    assert (a.diff(b) == ([(5, 3)], [], [(1, (0, 4))]))
+    assert (b.diff(a) == ([(5, 0)], [(1, (0, 4))], []))
+    assert (a.diff(a) == ([], [], []))
+
+
+def test_history():
+    empty = FretboardState.empty(6)
+    history = FretboardHistory(empty)
+    states = [empty]
+    for string in range(6):
+        states.append(states[-1].with_note(string, string))
+        assert (history.push(states[-1]))
+    # pushing the current state again is not a new entry
+    assert (not history.push(states[-1]))
+    assert (len(history) == 7)
+    assert (history.undo() is states[-2])
+    assert (history.undo() is states[-3])
+    assert (history.redo() is states[-2])
+    assert (history.can_redo())
+    # a new edit drops what could have been redone
+    history.push(states[-2].with_note(0, 12))
+    assert (not history.can_redo())
+    while history.can_undo():
+        history.undo()
+    assert (history.current is empty)
+    assert (history.undo() is None)
+
+
+def test_history_limit():
+    history = FretboardHistory(FretboardState.empty(4), limit=3)
+    for fret in range(1, 10):
+        history.push(history.current.with_note(0, fret))
+    assert (len(history) == 4)
+    for _ in range(3):
+        history.undo()
+    assert (history.current.notes == (6, X, X, X))
+    assert (history.undo() is None)
@@ -0,0 +1,130 @@
+import os
+
+import pytest
+
+pytest.importorskip("PyQt5")
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PyQt5 import QtCore  # noqa: E402
+from PyQt5.QtCore import QPointF  # noqa: E402
+from PyQt5.QtTest import QTest  # noqa: E402
+from src.diagram_renderer import ensure_application  # noqa: E402
+from src.fretboard_widget import FretboardView  # noqa: E402
+from src.voicing import MUTED, neck_positions  # noqa: E402
+
+X = MUTED
+
+
+@pytest.fixture
+def view() -> FretboardView:
+    ensure_application()
+    tuning = ["C#", "F#", "B", "E", "A", "D", "G", "B", "E"]
+    return FretboardView(num_frets=24, tuning=tuning, visible_frets=12)
+
+
+def inlay_items(view: FretboardView) -> list:
+    return [item for item in view.inlays if item.scene() is view.scene()]
+
+
+def test_window(view) -> None:
+    assert (len(inlay_items(view)) == 12)
+    assert (sorted(inlay.fret for inlay in inlay_items(view)) == list(range(1, 13)))
+    view.setFirstFret(9)
+    # the same items now cover the frets 10 to 21
+    assert (len(inlay_items(view)) == 12)
+    assert (sorted(inlay.fret for inlay in inlay_items(view)) == list(range(10, 22)))
+    assert (view.fretboard.calculateFretString(view.fretboard.rect().topLeft()) == (10, 0))
+    # the window is clamped to the neck
+    view.setFirstFret(30)
+    assert (view.first_fret == 12)
+    assert (view.fret_text_item.toPlainText() == "12th")
+
+
+def test_zoom(view) -> None:
+    view.setFirstFret(12)
+    view.setVisibleFrets(24)
+    assert (view.first_fret == 0)
+    assert (len([inlay for inlay in inlay_items(view) if inlay.isVisible()]) == 24)
+    view.setVisibleFrets(5)
+    # zooming back in hides the spare items instead of deleting them
+    assert (len(inlay_items(view)) == 24)
+    assert (len([inlay for inlay in inlay_items(view) if inlay.isVisible()]) == 5)
+
+
+def test_notes_outside_window(view) -> None:
+    view.addSingleNote((15, 3))
+    view.addSingleNote((2, 4))
+    view.setFirstFret(10)
+    assert (view.voicing() == (-1, -1, -1, 15, 2, -1, -1, -1, -1))
+    rect = view.scene().sceneRect()
+    assert (rect.contains(view.note_items[(15, 3)]))
+    assert (not rect.contains(view.note_items[(2, 4)]))
+
+
+def click(view: FretboardView, pos: QPointF) -> None:
+    QTest.mouseClick(view.viewport(), QtCore.Qt.LeftButton, pos=view.mapFromScene(pos))
+
+
+def test_notes_item(view) -> None:
+    before = len(view.scene().items())
+    view.setVoicing((X, 3, 2, 0, 1, 0, X, X, X), [(5, (6, 8))])
+    # notes and barres are painted by one item: editing adds no scene items
+    assert (len(view.scene().items()) == before)
+    pressed = []
+    view.scene().existing_note_pressed.connect(lambda fret, string: pressed.append((fret, string)))
+    view.scene().barre_pressed.connect(lambda fret, string_coords: pressed.append((fret, string_coords)))
+    assert (view.notes_item.noteAt(view.note_items[(2, 2)].center()) == (2, 2))
+    click(view, view.note_items[(2, 2)].center())
+    click(view, view.barre_items[5][(6, 8)].center() + QPointF(view.FRETWIDTH / 2, 0))
+    assert (pressed == [(2, 2), (5, (6, 8))])
+    # an empty spot is left to the fretboard, which places a new note
+    click(view, QPointF(4 * view.FRETWIDTH, view.y_offset + 6.5 * view.FRETHEIGHT))
+    assert (len(pressed) == 2)
+    assert (view.voicing() == (X, 3, X, 0, 7, 0, X, X, X))
+
+
+def test_undo_redo(view) -> None:
+    view.setVoicing((X, 3, 2, 0, 1, 0, X, X, X))
+    view.setVoicing((X, 3, 2, 0, 1, 3, X, X, X), [(1, (6, 8))])
+    unchanged = view.note_items[(3, 1)]
+    view.undo()
+    assert (view.voicing() == (X, 3, 2, 0, 1, 0, X, X, X))
+    assert (view.barre_items.get(1, {}) == {})
+    # items of strings that did not change are kept as they are
+    assert (view.note_items[(3, 1)] is unchanged)
+    view.redo()
+    assert (view.voicing() == (X, 3, 2, 0, 1, 3, 1, 1, 1))
+    assert (list(view.barre_items[1]) == [(6, 8)])
+    view.undo()
+    view.undo()
+    view.undo()
+    assert (view.voicing() == (X,) * 9)
+
+
+def test_neck_positions() -> None:
+    c_major = (1 << 0) | (1 << 4) | (1 << 7)
+    frets, strings, kinds = neck_positions([4, 9, 2, 7, 11, 4], 3, c_major, root=0)
+    assert (list(zip(frets.tolist(), strings.tolist(), kinds.tolist())) ==
+            [(0, 0, 2), (0, 3, 2), (0, 5, 2), (1, 4, 3), (2, 2, 2), (3, 0, 2), (3, 1, 3), (3, 5, 2)])
+    # 7 of every 12 semitones are in the C major scale
+    frets, _, kinds = neck_positions([4, 9, 2, 7, 11, 4, 9, 2], 23, scale_mask=0xAB5)
+    assert (len(frets) == 24 * 8 * 7 // 12 and set(kinds.tolist()) == {1})
+
+
+def test_overlay(view) -> None:
+    before = len(view.scene().items())
+    c_major = (1 << 0) | (1 << 4) | (1 << 7)
+    view.setOverlay(c_major, 0xAB5, 0)
+    item = view.overlay_item
+    # a single item, with one path per kind of position
+    assert (len(view.scene().items()) == before and item.isVisible())
+    assert (sorted(item.paths) == [1, 2, 3])
+    # the overlay leaves the clicks to the fretboard, which places new notes
+    assert (item.acceptedMouseButtons() == QtCore.Qt.NoButton)
+    # the capo shifts the pitches under the frets
+    view.setOverlay(root=0)
+    first = item.paths[3]
+    view.setCapo(2)
+    assert (item.paths[3] != first)
+    view.clearOverlay()
+    assert (not item.isVisible())
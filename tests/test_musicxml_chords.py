@@ -0,0 +1,77 @@
+import zipfile
+
+import pytest
+
+from src.musicxml_chords import MusicXMLAnalyzer, analyse_files
+
+
+def note(step: str, octave: int, duration: int, chord: bool = False, alter: int = 0) -> str:
+    return ("<note>" + ("<chord/>" if chord else "") +
+            f"<pitch><step>{step}</step>" + (f"<alter>{alter}</alter>" if alter else "") +
+            f"<octave>{octave}</octave></pitch><duration>{duration}</duration></note>")
+
+
+def harmony(step: str, kind: str, offset: int = 0) -> str:
+    return (f"<harmony><root><root-step>{step}</root-step></root><kind>{kind}</kind>" +
+            (f"<offset>{offset}</offset>" if offset else "") + "</harmony>")
+
+
+# divisions of 2 per quarter, 4/4
+ATTRIBUTES = "<attributes><divisions>2</divisions><time><beats>4</beats><beat-type>4</beat-type></time></attributes>"
+
+SCORE = ('<?xml version="1.0" encoding="UTF-8"?><score-partwise version="4.0">'
+         '<part-list><score-part id="P1"/><score-part id="P2"/></part-list>'
+         # upper part: a C major whole note, then G7 and Am halves, the latter
+         # as a second voice after a backup
+         '<part id="P1">'
+         '<measure number="1">' + ATTRIBUTES + harmony("C", "major") +
+         note("E", 4, 8) + note("G", 4, 8, True) + '</measure>'
+         '<measure number="2">' + harmony("G", "dominant") + harmony("F", "major", 4) +
+         note("B", 3, 4) + note("D", 4, 4, True) + note("F", 4, 4, True) +
+         '<forward><duration>4</duration></forward><backup><duration>8</duration></backup>'
+         '<forward><duration>4</duration></forward>' + note("C", 4, 4) + note("E", 4, 4, True) +
+         '</measure></part>'
+         # bass part
+         '<part id="P2">'
+         '<measure number="1">' + ATTRIBUTES + note("C", 3, 8) + '</measure>'
+         '<measure number="2">' + note("G", 2, 4) + note("A", 2, 4) + '</measure>'
+         '</part></score-partwise>')
+
+
+@pytest.fixture
+def score(tmp_path) -> str:
+    path = tmp_path / "score.musicxml"
+    path.write_text(SCORE)
+    return str(path)
+
+
+def test_measures(score) -> None:
+    analysis = MusicXMLAnalyzer().analyse(score)
+    assert ([measure.number for measure in analysis.measures] == ["1", "2"])
+    assert (analysis.measures[0].chords == [(1, "C")])
+    assert (analysis.measures[1].chords == [(1, "G7"), (3, "Am")])
+    # per measure, all the pitches of the measure together
+    per_measure = MusicXMLAnalyzer("measure").analyse(score)
+    assert ([len(measure.chords) for measure in per_measure.measures] == [1, 1])
+    with pytest.raises(ValueError):
+        MusicXMLAnalyzer("bar")
+
+
+def test_harmonies(score) -> None:
+    analysis = MusicXMLAnalyzer().analyse(score)
+    assert ([check.written for check in analysis.harmonies] == ["C", "G7", "F"])
+    assert ([check.agrees for check in analysis.harmonies] == [True, True, False])
+    assert (str(analysis.mismatches()[0]) == "2:3 F / Am differs")
+
+
+def test_mxl(score, tmp_path) -> None:
+    path = str(tmp_path / "score.mxl")
+    with zipfile.ZipFile(path, "w") as archive:
+        archive.writestr("META-INF/container.xml",
+                         '<container xmlns="urn:oasis:names:tc:opendocument:xmlns:container">'
+                         '<rootfiles><rootfile full-path="music/score.xml"/></rootfiles></container>')
+        archive.writestr("music/score.xml", SCORE)
+    paths = [score, path] * 2
+    results = list(analyse_files(paths, processes=2, chunk_size=1))
+    assert ([p for p, _ in results] == paths)
+    assert (all(analysis.measures[1].chords == [(1, "G7"), (3, "Am")] for _, analysis in results))
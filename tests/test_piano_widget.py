@@ -0,0 +1,67 @@
+import os
+import random
+import time
+
+import pytest
+
+pytest.importorskip("PyQt5")
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from src.chord import Chord  # noqa: E402
+from src.diagram_renderer import ensure_application  # noqa: E402
+from src.piano_widget import PIANO_KEYS, PIANO_LOWEST, PianoKeyBoard, midi_note  # noqa: E402
+
+
+@pytest.fixture
+def keyboard() -> PianoKeyBoard:
+    ensure_application()
+    keyboard = PianoKeyBoard(lowest=PIANO_LOWEST, num_keys=PIANO_KEYS)
+    keyboard.changes = []
+    keyboard.notes_changed.connect(keyboard.changes.append)
+    return keyboard
+
+
+def test_layout(keyboard) -> None:
+    keys = [keyboard.key(midi) for midi in range(128)]
+    assert (sum(key is not None for key in keys) == 88)
+    assert (keyboard.key(20) is None and keyboard.key(109) is None)
+    assert (keyboard.key(21).midi == 21 and keyboard.key(108).midi == 108)
+    white = [key for key in keys if key is not None and not key.m_black]
+    assert (len(white) == 52)
+    # A0 is leftmost, C8 rightmost, and white keys tile the scene
+    assert (keyboard.key(21).rect().left() == 0)
+    assert (keyboard.key(108).rect().right() == keyboard.sceneRect().right() == 52 * PianoKeyBoard.KEYWIDTH)
+    assert (str(midi_note(60)) == "C4" and str(midi_note(21)) == "A0")
+
+
+def test_set_pressed(keyboard) -> None:
+    keyboard.setPressed([60, 64, 67])
+    keyboard.press(72)
+    keyboard.release(64)
+    # nothing is shown or emitted before the frame is flushed
+    assert (keyboard.pressed() == set() and keyboard.changes == [])
+    keyboard.flush()
+    assert (keyboard.pressed() == {60, 67, 72})
+    assert (keyboard.key(60).m_pressed and not keyboard.key(64).m_pressed)
+    assert (len(keyboard.changes) == 1 and str(Chord(keyboard.changes[0])) == "C5")
+    # notes off the keyboard are ignored, an unchanged state emits nothing
+    keyboard.setPressed([10, 60, 67, 72])
+    keyboard.flush()
+    assert (len(keyboard.changes) == 1)
+
+
+def test_dense_events(keyboard) -> None:
+    keyboard.show()
+    random.seed(3)
+    start = time.perf_counter()
+    for _ in range(20):
+        # a frame's worth of dense MIDI: 50 note on/off events
+        for _ in range(50):
+            midi = random.randrange(PIANO_LOWEST, PIANO_LOWEST + PIANO_KEYS)
+            (keyboard.press if random.random() < 0.5 else keyboard.release)(midi)
+        keyboard.flush()
+        keyboard.viewport().repaint()
+    elapsed = time.perf_counter() - start
+    # one emission per frame at most, well within the frame budget
+    assert (len(keyboard.changes) <= 20)
+    assert (elapsed / 20 < PianoKeyBoard.FRAME_INTERVAL / 1000)
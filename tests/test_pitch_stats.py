@@ -0,0 +1,56 @@
+import json
+
+import numpy as np
+
+from src.pitch_stats import PitchProfiler, event_pitch_class, profile_files, sounding_time
+
+C_MAJOR = ["C4", "E4", "G4", "F4", "A4", "C5", "G4", "B4", "D5", "C4"]
+A_MAJOR = ["A3", "C#4", "E4", "D4", "F#4", "A4", "E4", "G#4", "B4", "A4"]
+
+
+def events(start: float, pitches: list[str]) -> list[tuple[float, float, str]]:
+    return [(start + i, 1., pitch) for i, pitch in enumerate(pitches)]
+
+
+def test_pitch_classes() -> None:
+    assert ([event_pitch_class(p) for p in ["C#4", "Db", "Bb-1", "60", 61, "H4"]] == [1, 1, 10, 0, 1, -1])
+
+
+def test_sounding_time() -> None:
+    rng = np.random.default_rng(1)
+    onsets = rng.random(50) * 10
+    ends = onsets + rng.random(50) * 3
+    pcs = rng.integers(0, 12, 50)
+    times = np.linspace(-1, 14, 31)
+    expected = np.zeros((len(times), 12))
+    for onset, end, pc in zip(onsets, ends, pcs):
+        expected[:, pc] += np.clip(times - onset, 0, end - onset)
+    assert (np.allclose(sounding_time(onsets, ends, pcs, times), expected))
+
+
+def test_windows() -> None:
+    profile = PitchProfiler(window=8., hop=4.).profile(events(0, C_MAJOR * 4) + events(40, A_MAJOR * 4))
+    # 80 units, one window every 4 up to the last full one
+    assert (len(profile.window_starts) == 19 and profile.window_histograms.shape == (19, 12))
+    assert (np.allclose(profile.window_histograms.sum(axis=1), 8.))
+    keys = [key.name_short for key in profile.window_keys()]
+    assert (keys[:9] == ["C"] * 9 and keys[-9:] == ["A"] * 9)
+    # the same correlations as window by window
+    assert (np.allclose(profile.window_correlations[3], PitchProfiler().profile(events(0, C_MAJOR * 4)[12:20]).correlations))
+    assert (profile.histogram.sum() == 80.)
+    # no notes, no key
+    empty = PitchProfiler().profile([])
+    assert (empty.key is None and empty.window_keys() == [None])
+
+
+def test_profile_files(tmp_path) -> None:
+    paths = []
+    for i, pitches in enumerate([C_MAJOR, A_MAJOR, ["E3", "G3", "B3", "E4", "D#4", "E4", "B3"]]):
+        path = tmp_path / f"piece{i}.txt"
+        path.write_text("# onset, duration, pitch\n" + "\n".join(f"{o}, {d}, {p}" for o, d, p in events(0, pitches * 2)))
+        paths.append(str(path))
+    profiles = list(profile_files(paths, processes=2, chunk_size=1))
+    assert ([profile.source for profile in profiles] == paths)
+    assert ([str(profile.key) for profile in profiles] == ["C major", "A major", "E minor"])
+    summary = json.loads(json.dumps(profiles[0].summary()))
+    assert (summary["key"] == "C major" and len(summary["histogram"]) == 12)
@@ -0,0 +1,67 @@
+import numpy as np
+from src.key import KEYS, key_correlations
+from src.progression import ProgressionAnalyzer
+
+
+def test_key_correlations() -> None:
+    # C major scale
+    hist = np.zeros(12)
+    hist[[0, 2, 4, 5, 7, 9, 11]] = 1.
+    scores = key_correlations(hist)
+    assert (scores.shape == (24,))
+    assert (str(KEYS[int(np.argmax(scores))]) == "C major")
+    # A harmonic minor scale
+    hist = np.zeros(12)
+    hist[[9, 11, 0, 2, 4, 5, 8]] = 1.
+    hist[9] += 1.
+    assert (str(KEYS[int(np.argmax(key_correlations(hist)))]) == "A minor")
+    # batched and empty histograms
+    batch = key_correlations(np.zeros((3, 12)))
+    assert (batch.shape == (3, 24))
+    assert (not batch.any())
+
+
+def test_key_names() -> None:
+    assert ([key.name_short for key in KEYS[:6]] ==
+            ["C", "Db", "D", "Eb", "E", "F"])
+    assert ([key.name_short for key in KEYS[12:18]] ==
+            ["Cm", "C#m", "Dm", "Ebm", "Em", "Fm"])
+
+
+def test_major_progression() -> None:
+    analyzer = ProgressionAnalyzer()
+    labels = list(analyzer.analyze(
+        ["C E G", "A C E", "F A C", "G B D F", "C E G"]))
+    assert ([str(label) for label in labels] == ["I", "vi", "IV", "V7", "I"])
+    assert ([label.function for label in labels] ==
+            ["tonic", "tonic", "subdominant", "dominant", "tonic"])
+    assert (all(str(label.key) == "C major" for label in labels))
+    assert ([label.key_changed for label in labels] ==
+            [True, False, False, False, False])
+
+
+def test_minor_progression() -> None:
+    analyzer = ProgressionAnalyzer()
+    labels = list(analyzer.analyze(
+        ["A C E", "D F A", "E G# B", "A C E", "F A C", "B D F A", "E G# B D"]))
+    assert ([str(label) for label in labels] ==
+            ["i", "iv", "V", "i", "bVI", "iiø7", "V7"])
+    assert (str(labels[-1].key) == "A minor")
+
+
+def test_modulation() -> None:
+    analyzer = ProgressionAnalyzer(window=4)
+    in_c = ["C E G", "F A C", "G B D", "C E G"]
+    in_d = ["D F# A", "G B D", "A C# E", "D F# A"]
+    labels = list(analyzer.analyze(in_c + in_d + in_d))
+    assert (str(labels[0].key) == "C major")
+    assert (str(labels[-1].key) == "D major")
+    assert (str(labels[-1]) == "I")
+    assert (any(label.key_changed for label in labels[4:]))
+
+
+def test_empty_chords() -> None:
+    analyzer = ProgressionAnalyzer()
+    label = analyzer.feed("")
+    assert (label.key is None)
+    assert (str(label) == "")
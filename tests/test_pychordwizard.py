@@ -0,0 +1,43 @@
+import io
+import json
+import os
+import subprocess
+import sys
+
+from src.pychordwizard import command_name, main
+
+SRC = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.path.pardir, "src")
+
+
+def test_name(capsys):
+    assert (main(["name", "C3", "E4", "G5"]) == 0)
+    assert (capsys.readouterr().out == "C\n")
+    assert (main(["name", "--all", "E3 G3 C4"]) == 0)
+    assert (capsys.readouterr().out.splitlines()[0] == "C/E")
+    assert (main(["name", "--json", "A C E"]) == 0)
+    assert (json.loads(capsys.readouterr().out)["name"] == "Am")
+    # nothing to name
+    assert (main(["name", "I"]) == 1)
+
+
+def test_usage(capsys):
+    assert (main([]) == 2)
+    assert (main(["name"]) == 2)
+    assert (main(["name", "--bogus", "C"]) == 2)
+    assert ("usage" in capsys.readouterr().err)
+
+
+def test_stream():
+    stdin = io.StringIO("C E G\n\nA C E G\n")
+    out = io.StringIO()
+    assert (command_name(["-"], stdin, out) == 0)
+    records = [json.loads(line) for line in out.getvalue().splitlines()]
+    assert ([record["notes"] for record in records] == ["C E G", "A C E G"])
+    assert ([record["name"] for record in records] == ["C", "Am7"])
+
+
+def test_no_heavy_imports():
+    code = ("import sys, pychordwizard; pychordwizard.main(['name', 'C E G']); "
+            "print(sorted(m for m in ('PyQt5', 'numpy') if m in sys.modules))")
+    out = subprocess.run([sys.executable, "-c", code], cwd=SRC, capture_output=True, text=True).stdout
+    assert (out.splitlines() == ["C", "[]"])
@@ -0,0 +1,67 @@
+import os
+
+import pytest
+
+pytest.importorskip("PyQt5")
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PyQt5.QtCore import QPointF  # noqa: E402
+
+from src.diagram_renderer import ensure_application  # noqa: E402
+from src.fretboard_widget import FretboardView  # noqa: E402
+from src.session_recorder import Session, SessionRecorder, replay  # noqa: E402
+from src.voicing import MUTED  # noqa: E402
+
+X = MUTED
+
+
+def play(view: FretboardView) -> None:
+    scene = view.scene()
+    # first fret barre dragged from the low to the high E string
+    scene.new_note_pressed.emit(1, 0)
+    for string in range(6):
+        view.dragTo(QPointF(string * view.FRETWIDTH, view.y_offset + 0.5 * view.FRETHEIGHT))
+    view.release()
+    # then an E major shape on top of it
+    for fret, string in [(3, 1), (3, 2), (2, 3)]:
+        scene.new_note_pressed.emit(fret, string)
+        view.release()
+    # and remove the note on the G string again
+    scene.existing_note_pressed.emit(2, 3)
+    view.release()
+
+
+@pytest.fixture
+def view() -> FretboardView:
+    ensure_application()
+    return FretboardView()
+
+
+def test_record_replay(view, tmp_path) -> None:
+    recorder = SessionRecorder(view)
+    recorder.start()
+    play(view)
+    session = recorder.stop()
+    assert (not recorder.isRecording())
+    assert (session.voicing == (1, 3, 3, 1, 1, 1))
+    assert ([event.kind for event in session.events[:3]] == ["n", "m", "m"])
+
+    path = session.save(str(tmp_path / "session.txt.gz"))
+    loaded = Session.load(path)
+    assert (loaded.tuning == session.tuning and loaded.voicing == session.voicing)
+    assert ([str(event) for event in loaded.events] == [str(event) for event in session.events])
+
+    result = replay(loaded, repeat=3)
+    assert (result.ok())
+    assert (result.voicing == (1, 3, 3, 1, 1, 1))
+    assert (len(result.events) == 3 * len(session.events))
+    summary = result.summary()
+    assert (summary["n"]["count"] == 3 * 4)
+    assert (summary["notes_changed"]["count"] > 0)
+
+
+def test_replay_mismatch(tmp_path) -> None:
+    session = Session(["E", "A", "D", "G", "B", "E"], 13, voicing=(X, 3, 2, 0, 1, 0))
+    result = replay(session)
+    assert (result.voicing == (X,) * 6)
+    assert (not result.ok())
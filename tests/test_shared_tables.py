@@ -0,0 +1,61 @@
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+
+import pytest
+
+from src.chord import Chord
+# the library Chord names with, which src.chord_templates is a separate copy of
+from src.shared_tables import SharedTables, attach_naming_tables, default_library, naming_tables, publish_naming_tables
+
+
+def test_publish_attach(tmp_path):
+    path = str(tmp_path / "tables.bin")
+    tables = {"a": array("h", [-1, 2, 3]), "b": array("d", [0.5, 1.25]), "c": array("H", range(1000))}
+    SharedTables.publish(tables, "v1", path).close()
+    shared = SharedTables.attach(path, "v1", verify=True)
+    assert (shared.names() == ["a", "b", "c"])
+    for name, table in tables.items():
+        assert (shared[name].tolist() == table.tolist())
+        assert (shared[name].readonly)
+    shared.close()
+
+    with pytest.raises(ValueError):
+        SharedTables.attach(path, "v2")
+    # a flipped byte in the data is caught by the digest
+    data = bytearray(open(path, "rb").read())
+    data[-1] ^= 0xFF
+    open(path, "wb").write(data)
+    SharedTables.attach(path, "v1").close()
+    with pytest.raises(ValueError):
+        SharedTables.attach(path, "v1", verify=True)
+
+
+def test_publish_naming_tables(tmp_path):
+    path = publish_naming_tables(str(tmp_path))
+    written = open(path, "rb").read()
+    # an existing file of the same rules is reused
+    assert (publish_naming_tables(str(tmp_path)) == path)
+    assert (open(path, "rb").read() == written)
+
+    built = naming_tables()
+    library = default_library()
+    try:
+        shared = attach_naming_tables(path)
+        for name, table in built.items():
+            assert (shared[name].tolist() == table.tolist())
+        assert (isinstance(library.table[0], memoryview))
+        assert (str(Chord("C E G Bb D")) == "C9")
+        assert (str(Chord("E3 G3 C4")) == "C/E")
+    finally:
+        library.table = None
+
+
+def name_in_worker(notes: str) -> tuple[str, bool]:
+    return str(Chord(notes)), isinstance(default_library().table[0], memoryview)
+
+
+def test_pool_workers(tmp_path):
+    path = publish_naming_tables(str(tmp_path))
+    with ProcessPoolExecutor(2, initializer=attach_naming_tables, initargs=(path,)) as executor:
+        results = list(executor.map(name_in_worker, ["C E G", "A C E G", "D F# A C"]))
+    assert (results == [("C", True), ("Am7", True), ("D7", True)])
@@ -0,0 +1,54 @@
+from src.tab_chords import TabImporter, import_files, system_slices, tab_systems
+
+SONG = """Intro
+e|---0-----3---|-12--
+B|---1-----0---|-12--
+G|---0-----0---|-13--
+D|---2-----0---|-14--
+A|---3-----2---|-14--
+E|---------3---|-12--
+
+Verse (lyrics in between)
+e|--0h2--57--|
+B|--0--------|
+G|--1--------|
+D|--2--------|
+A|--2--------|
+E|--0--------|
+"""
+
+
+def test_systems() -> None:
+    systems = list(tab_systems(SONG.splitlines(), 6))
+    assert (len(systems) == 2)
+    # incomplete staves are dropped
+    assert (list(tab_systems(SONG.splitlines()[:4], 6)) == [])
+    slices = list(system_slices(systems[0]))
+    assert ([column for column, _ in slices] == [3, 9, 15])
+    # lowest string first, and the two-digit frets form one slice
+    assert (slices[0][1] == {1: 3, 2: 2, 3: 0, 4: 1, 5: 0})
+    assert (slices[2][1] == {0: 12, 1: 14, 2: 14, 3: 13, 4: 12, 5: 12})
+    # frets above 24 are consecutive notes
+    assert ([notes for _, notes in system_slices(systems[1])][-2:] == [{5: 5}, {5: 7}])
+
+
+def test_names() -> None:
+    chords = list(TabImporter().chords(SONG.splitlines()))
+    assert ([chord.name for chord in chords[:4]] == ["C", "G", "E", "E"])
+    assert (str(chords[3]) == "1:2 E")
+    # the same tab in drop D
+    drop_d = list(TabImporter(["D", "A", "D", "G", "B", "E"]).chords(SONG.splitlines()))
+    assert (drop_d[1].name != chords[1].name and drop_d[0].name == "C")
+
+
+def test_import_files(tmp_path) -> None:
+    paths = []
+    for i in range(3):
+        path = tmp_path / f"song{i}.txt"
+        path.write_text(SONG * (i + 1))
+        paths.append(str(path))
+    results = list(import_files(paths, processes=2, chunk_size=2))
+    assert ([path for path, _ in results] == paths)
+    assert ([len(chords) for _, chords in results] == [7, 14, 21])
+    _, serial = next(import_files(paths[2:]))
+    assert ([chord.name for chord in results[2][1]] == [chord.name for chord in serial])
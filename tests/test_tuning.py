@@ -0,0 +1,19 @@
+from src.tuning import NUM_STRINGS_TUNING_MAP, parse_tuning, string_names, string_notes
+
+
+def test_string_notes():
+    notes = string_notes(parse_tuning("E-A-D-G-B-E (Standard)"))
+    assert ([str(note) for note in notes] == ["E2", "A2", "D3", "G3", "B3", "E4"])
+    # explicit octaves are kept, e.g. for re-entrant tunings
+    notes = string_notes(parse_tuning("G4-C4-E4-A4"))
+    assert ([str(note) for note in notes] == ["G4", "C4", "E4", "A4"])
+    assert (string_names(["G4", "C4", "E4", "A4"]) == ["G", "C", "E", "A"])
+
+
+def test_tuning_map():
+    assert (sorted(int(num) for num in NUM_STRINGS_TUNING_MAP) == list(range(4, 13)))
+    for num_strings, tunings in NUM_STRINGS_TUNING_MAP.items():
+        for tuning in tunings.values():
+            notes = string_notes(parse_tuning(tuning))
+            assert (len(notes) == int(num_strings))
+            assert (all(note.octave >= 0 for note in notes))
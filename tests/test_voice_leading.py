@@ -0,0 +1,82 @@
+import itertools
+import time
+
+import numpy as np
+from src.tuning import parse_tuning, semitones, string_notes
+from src.voice_leading import VoiceLeadingCost, VoiceLeadingOptimizer
+from src.voicing import MUTED, find_voicings, voicing_distance
+
+X = MUTED
+STANDARD = ["E", "A", "D", "G", "B", "E"]
+
+
+def test_tuning() -> None:
+    assert (parse_tuning("D-A-D-F#-A-D (Open D)") == ["D", "A", "D", "F#", "A", "D"])
+    assert ([str(n) for n in string_notes(STANDARD)] ==
+            ["E2", "A2", "D3", "G3", "B3", "E4"])
+    assert ([str(n) for n in string_notes(["B"] + STANDARD)] ==
+            ["B1", "E2", "A2", "D3", "G3", "B3", "E4"])
+    assert (semitones(string_notes(STANDARD)[0]) == 28)
+
+
+def test_find_voicings() -> None:
+    open_pitches = [semitones(n) for n in string_notes(STANDARD)]
+    voicings = [tuple(v) for v in find_voicings({0, 4, 7}, open_pitches, bass=0).tolist()]
+    for shape in [(X, 3, 2, 0, 1, 0), (X, 3, 5, 5, 5, 3), (8, 10, 10, 9, 8, 8)]:
+        assert (shape in voicings)
+    assert (voicings == sorted(voicings))
+    for voicing in voicings:
+        fretted = [f for f in voicing if f > 0]
+        assert (max(fretted) - min(fretted) < 4)
+    # inversions are only found without the bass constraint
+    assert ((0, 3, 2, 0, 1, 0) not in voicings)
+    assert ([0, 3, 2, 0, 1, 0] in find_voicings({0, 4, 7}, open_pitches).tolist())
+
+
+def test_cost_matches_voicing_distance() -> None:
+    voicings = np.array([[X, 3, 2, 0, 1, 0], [X, 0, 2, 2, 1, 0], [3, 2, 0, 0, 0, 3]])
+    transition = VoiceLeadingCost().transition(voicings, voicings)
+    for i, j in itertools.product(range(3), range(3)):
+        assert (transition[i, j] == voicing_distance(tuple(voicings[i]), tuple(voicings[j])))
+
+
+def test_solve_is_optimal() -> None:
+    progression = ["C E G", "G B D"]
+    optimizer = VoiceLeadingOptimizer(beam_width=10 ** 6)
+    cost = optimizer.cost
+    lattice = [optimizer.candidates(chord) for chord in progression]
+
+    def path_cost(path) -> float:
+        total = sum(cost.difficulty(np.array([v]))[0] for v in path)
+        for a, b in zip(path, path[1:]):
+            total += cost.transition(np.array([a]), np.array([b]))[0, 0]
+        return total
+
+    best = min(path_cost(path) for path in itertools.product(
+        *[[tuple(v) for v in voicings.tolist()] for voicings, _ in lattice]))
+    solved = optimizer.solve(progression)
+    assert (len(solved) == 2)
+    assert (abs(path_cost(solved) - best) < 1e-9)
+    # the beam does not change the result on such a short progression
+    assert (VoiceLeadingOptimizer(beam_width=16).solve(progression) == solved)
+    assert (len(VoiceLeadingOptimizer().solve(progression + ["A C E"])) == 3)
+
+
+def test_custom_cost() -> None:
+    class OpenPositionCost(VoiceLeadingCost):
+        def difficulty(self, voicings: np.ndarray) -> np.ndarray:
+            return 10. * np.where(voicings > 0, voicings, 0).max(axis=1)
+
+    solved = VoiceLeadingOptimizer(cost=OpenPositionCost()).solve(["C E G", "F A C"])
+    assert (max(solved[0]) <= 3)
+    assert (max(solved[1]) <= 3)
+
+
+def test_long_progression() -> None:
+    chords = ["C E G", "A C E", "F A C", "G B D F", "D F A", "E G# B", "Bb D F", "C E G Bb"]
+    progression = [chords[i % len(chords)] for i in range(0, 3 * 300, 3)]
+    start = time.perf_counter()
+    solved = VoiceLeadingOptimizer().solve(progression)
+    assert (time.perf_counter() - start < 1.)
+    assert (len(solved) == 300)
+    assert (VoiceLeadingOptimizer().solve([]) == [])
@@ -0,0 +1,61 @@
+import numpy as np
+from src.voicing import MUTED, active_notes_from_voicing, pitch_class_mask, \
+    string_mask, voicing_distance, voicing_from_active_notes
+from src.voicing_index import VoicingIndex
+
+X = MUTED
+
+
+def test_voicing_helpers() -> None:
+    c_major = (X, 3, 2, 0, 1, 0)
+    assert (voicing_from_active_notes({1: 3, 2: 2, 3: 0, 4: 1, 5: 0}, 6) == c_major)
+    assert (active_notes_from_voicing(c_major) == {1: 3, 2: 2, 3: 0, 4: 1, 5: 0})
+    assert (string_mask(c_major) == 0b111110)
+    # C, E and G
+    assert (pitch_class_mask(c_major, [4, 9, 2, 7, 11, 4]) == (1 << 0) | (1 << 4) | (1 << 7))
+    assert (voicing_distance(c_major, c_major) == 0)
+    assert (voicing_distance(c_major, (X, 3, 2, 0, 1, 3)) == 3)
+    assert (voicing_distance(c_major, (3, 3, 2, 0, 1, 0), mute_cost=1) == 1)
+
+
+def test_similar_matches_brute_force() -> None:
+    rng = np.random.default_rng(1)
+    frets = rng.integers(0, 12, (5000, 6))
+    frets[rng.random(frets.shape) < 0.2] = MUTED
+    voicings = [tuple(int(f) for f in row) for row in frets]
+    index = VoicingIndex()
+    index.extend(voicings)
+    assert (len(index) == len(voicings))
+
+    for query in voicings[:20]:
+        expected = sorted((voicing_distance(query, v), i) for i, v in enumerate(voicings)
+                          if voicing_distance(query, v) <= 4)
+        found = index.similar(query, 4)
+        assert ([d for d, _ in found] == [d for d, _ in expected])
+        assert ([v for _, v in found] == [voicings[i] for _, i in expected])
+
+
+def test_same_chord_and_strings() -> None:
+    index = VoicingIndex()
+    c_major = (X, 3, 2, 0, 1, 0)
+    c_major_small = (X, X, 2, 0, 1, 0)
+    c_barre = (X, 3, 5, 5, 5, 3)
+    a_minor = (X, 0, 2, 2, 1, 0)
+    for voicing in (c_major, c_major_small, c_barre, a_minor):
+        index.add(voicing)
+
+    assert ([v for _, v in index.similar(c_major, 5)] == [c_major, c_major_small, a_minor])
+    assert ([v for _, v in index.similar(c_major, 5, same_chord=True)] ==
+            [c_major, c_major_small])
+    assert (index.with_pitch_classes(c_major) == [c_major, c_major_small, c_barre])
+    assert (index.sharing_strings([1, 2]) == [c_major, c_barre, a_minor])
+    assert (index.sharing_strings([1, 2], limit=1) == [c_major])
+
+
+def test_bulk_array() -> None:
+    index = VoicingIndex(tuning=["G", "C", "E", "A"])
+    index.extend(np.array([[0, 0, 0, 3], [2, 0, 1, 0], [0, 0, 0, 3]]))
+    index.add((0, 0, 0, 0))
+    assert (len(index) == 4)
+    assert ([v for _, v in index.similar((0, 0, 0, 3), 0)] == [(0, 0, 0, 3), (0, 0, 0, 3)])
+    assert (index[3] == (0, 0, 0, 0))